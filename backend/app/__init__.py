@@ -6,6 +6,14 @@ from flask_jwt_extended import JWTManager
 from dotenv import load_dotenv
 from .config import config
 from .database import init_db, cleanup_connector
+from .json_provider import OrjsonProvider
+from .compression import init_compression
+from .metrics import init_metrics
+from .tracing import init_tracing
+from .query_stats import init_query_stats
+from .profiling import init_profiling
+from .warmup import start_warmup, skip_warmup, is_ready, warmup_status
+from .snapshot import restore_snapshot, save_snapshot, start_periodic_snapshots
 
 def create_app(config_name=None):
     """Create and configure Flask application"""
@@ -18,12 +26,31 @@ def create_app(config_name=None):
     
     app = Flask(__name__)
     
+    # Fast JSON encoding for all jsonify() responses
+    app.json = OrjsonProvider(app)
+    
     # Load configuration
     app.config.from_object(config.get(config_name, config['default']))
     
     # Initialize CORS
     CORS(app)
     
+    # Per-route latency, status and in-flight metrics on /metrics (registered
+    # before compression so its after_request hook times compression too)
+    init_metrics(app)
+    
+    # Trace outbound calls (LLMs, Vision, nutrition, Open Food Facts) per request
+    init_tracing(app)
+    
+    # Count SQL statements per request and flag repeated ones (suspected N+1)
+    init_query_stats(app)
+    
+    # Per-request profiling via the X-Profile header (only with PROFILING_TOKEN set)
+    init_profiling(app)
+    
+    # Compress large JSON responses (gzip, or brotli when installed)
+    init_compression(app)
+    
     # Initialize JWT
     jwt = JWTManager(app)
     
@@ -35,13 +62,9 @@ def create_app(config_name=None):
     @jwt.user_lookup_loader
     def user_lookup_callback(_jwt_header, jwt_data):
         identity = jwt_data["sub"]
-        from .models.user import User
-        # Convert identity to integer since user.id is an integer column
-        try:
-            user_id = int(identity)
-            return User.query.filter_by(id=user_id).one_or_none()
-        except (ValueError, TypeError):
-            return None
+        from .services.user_cache import load_user
+        # Short-TTL per-process cache; no query for repeat requests by the same user
+        return load_user(identity)
     
     # Initialize database
     init_db(app)
@@ -52,13 +75,34 @@ def create_app(config_name=None):
     # Register Blueprints
     from .routes.recipes import recipes_bp
     from .routes.auth import auth_bp
+    from .routes.admin import admin_bp
     app.register_blueprint(recipes_bp, url_prefix="/api/recipes")
     app.register_blueprint(auth_bp)
+    app.register_blueprint(admin_bp)
     
     # Simple health check endpoint
     @app.route('/health', methods=['GET'])
     def health():
         return {'status': 'healthy', 'message': 'SnackHack API is running'}
+    
+    # Readiness: 503 until this worker's warm-up has finished
+    @app.route('/ready', methods=['GET'])
+    def ready():
+        status = warmup_status()
+        return status, 200 if is_ready() else 503
+    
+    # Only server processes restore the previous process's caches and pantry
+    # index, warm up in the background and save snapshots (periodically and at
+    # exit); under gunicorn with WARMUP_MODE=post_fork this happens per worker
+    # from gunicorn.conf.py instead, and scripts (init_db.py) leave WARMUP_MODE off
+    if app.config.get('WARMUP_MODE') == 'thread':
+        restore_snapshot(app=app)
+        atexit.register(save_snapshot)
+        start_warmup(app)
+        start_periodic_snapshots()
+    elif app.config.get('WARMUP_MODE') != 'post_fork':
+        # Nothing will warm this process up, so /ready must not wait for it
+        skip_warmup()
 
     return app
 
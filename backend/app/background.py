@@ -0,0 +1,26 @@
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from .config import Config
+
+# Small per-worker pool for work that shouldn't delay the response (e.g. nutrition precompute)
+_executor = ThreadPoolExecutor(max_workers=Config.BACKGROUND_WORKERS, thread_name_prefix='background')
+
+def submit_background(fn, *args, **kwargs):
+    """
+    Run fn(*args, **kwargs) on the background pool inside an app context.
+
+    Must be called during a request or app context. Errors are logged, not
+    raised; the database session is scoped to the task's app context and
+    removed when it ends.
+    """
+    app = current_app._get_current_object()
+
+    def run():
+        with app.app_context():
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                print(f"Background task {getattr(fn, '__name__', fn)} failed: {str(e)}")
+                return None
+
+    return _executor.submit(run)
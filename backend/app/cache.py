@@ -0,0 +1,87 @@
+import threading
+from collections import OrderedDict
+
+# Registry of named caches so their stats can be reported from one place
+_registry = {}
+_registry_lock = threading.Lock()
+
+_MISSING = object()
+
+class LRUCache:
+    """Small thread-safe, bounded LRU cache with hit/miss counters"""
+
+    def __init__(self, name, maxsize=1024):
+        self.name = name
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        with _registry_lock:
+            _registry[name] = self
+
+    def get(self, key, default=None):
+        """Return the cached value for key (marking it most recently used)"""
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Insert or refresh a value, evicting the least recently used entry if full"""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key, default=None):
+        """Remove a single entry"""
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def clear(self):
+        """Drop every entry (counters are kept)"""
+        with self._lock:
+            self._data.clear()
+
+    def items(self):
+        """Snapshot of the cached items, least recently used first"""
+        with self._lock:
+            return list(self._data.items())
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def stats(self):
+        """Return size and hit-rate statistics for this cache"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+def registered_caches():
+    """Every registered cache, keyed by cache name"""
+    with _registry_lock:
+        return dict(_registry)
+
+def cache_stats():
+    """Return stats for every registered cache, keyed by cache name"""
+    with _registry_lock:
+        caches = list(_registry.values())
+    return {cache.name: cache.stats() for cache in caches}
@@ -0,0 +1,53 @@
+import gzip
+from flask import request
+
+# Optional brotli support; gzip is always available
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+def init_compression(app):
+    """Register negotiated gzip/brotli compression for large text responses"""
+
+    min_size = app.config.get('COMPRESS_MIN_SIZE', 1024)
+    mimetypes = set(app.config.get('COMPRESS_MIMETYPES', ['application/json']))
+    gzip_level = app.config.get('COMPRESS_GZIP_LEVEL', 6)
+    brotli_quality = app.config.get('COMPRESS_BROTLI_QUALITY', 4)
+
+    @app.after_request
+    def compress_response(response):
+        response.vary.add('Accept-Encoding')
+
+        if (response.status_code != 200 or
+                response.direct_passthrough or
+                response.is_streamed or
+                'Content-Encoding' in response.headers or
+                response.mimetype not in mimetypes):
+            return response
+
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+
+        encoding = _negotiate_encoding()
+        if encoding == 'br':
+            compressed = brotli.compress(data, quality=brotli_quality)
+        elif encoding == 'gzip':
+            compressed = gzip.compress(data, compresslevel=gzip_level)
+        else:
+            return response
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+def _negotiate_encoding():
+    """Pick the best content coding the client accepts (brotli preferred)"""
+    accept = request.accept_encodings
+    if BROTLI_AVAILABLE and accept.quality('br') > 0:
+        return 'br'
+    if accept.quality('gzip') > 0:
+        return 'gzip'
+    return None
@@ -70,12 +70,111 @@ class Config:
     # CalorieNinjas API Configuration
     CALORIE_NINJAS_API_KEY = os.environ.get('CALORIE_NINJAS_API_KEY')
     CALORIE_NINJAS_BASE_URL = 'https://api.calorieninjas.com/v1/nutrition'
+    NUTRITION_CACHE_SIZE = int(os.environ.get('NUTRITION_CACHE_SIZE', 4096))  # Per-100g entries kept in memory per worker
+    NUTRITION_HTTP_POOL_SIZE = int(os.environ.get('NUTRITION_HTTP_POOL_SIZE', 10))  # Keep-alive connections per worker
+    NUTRITION_HTTP_CONNECT_TIMEOUT = float(os.environ.get('NUTRITION_HTTP_CONNECT_TIMEOUT', 3.05))  # seconds
+    NUTRITION_HTTP_READ_TIMEOUT = float(os.environ.get('NUTRITION_HTTP_READ_TIMEOUT', 10))  # seconds
+    NUTRITION_HTTP_RETRIES = int(os.environ.get('NUTRITION_HTTP_RETRIES', 2))
+    NUTRITION_HTTP_BACKOFF = float(os.environ.get('NUTRITION_HTTP_BACKOFF', 0.3))  # seconds, doubled per retry
     
     # AI Service API Keys
     GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
     GROQ_API_KEY = os.environ.get('GROQ_API_KEY')  # Free AI API (Groq) - Default
     HF_ACCESS_TOKEN = os.environ.get('HF_ACCESS_TOKEN')  # Kept for backwards compatibility, but deprecated
     
+    # Process-local ingredient name -> id cache (entries per worker)
+    INGREDIENT_CACHE_SIZE = int(os.environ.get('INGREDIENT_CACHE_SIZE', 2048))
+    
+    # Recipe bodies at least this long (chars) are stored in shared compressed blobs
+    RECIPE_BLOB_MIN_SIZE = int(os.environ.get('RECIPE_BLOB_MIN_SIZE', 512))
+    RECIPE_BODY_CACHE_SIZE = int(os.environ.get('RECIPE_BODY_CACHE_SIZE', 256))  # Decompressed bodies per worker
+    
+    # Pantry search index: how often to pick up recipes saved by other workers
+    PANTRY_INDEX_REFRESH_SECONDS = int(os.environ.get('PANTRY_INDEX_REFRESH_SECONDS', 30))
+    
+    # Image uploads (ingredient detection)
+    MAX_CONTENT_LENGTH = int(os.environ.get('MAX_CONTENT_LENGTH', 32 * 1024 * 1024))  # Whole request; Flask answers 413 above this
+    MAX_IMAGE_UPLOAD_BYTES = int(os.environ.get('MAX_IMAGE_UPLOAD_BYTES', 15 * 1024 * 1024))  # Per image
+    MAX_IMAGE_PIXELS = int(os.environ.get('MAX_IMAGE_PIXELS', 50_000_000))  # Decompression-bomb guard
+    VISION_BACKEND = os.environ.get('VISION_BACKEND', 'google')  # 'google', 'onnx' (local model) or 'stub'
+    GOOGLE_APPLICATION_CREDENTIALS = os.environ.get('GOOGLE_APPLICATION_CREDENTIALS')  # Defaults to the bundled key file
+    VISION_ONNX_MODEL = os.environ.get('VISION_ONNX_MODEL')  # Path to an ONNX food classifier
+    VISION_ONNX_LABELS = os.environ.get('VISION_ONNX_LABELS')  # Its class names, one per line
+    VISION_MAX_IMAGE_SIDE = int(os.environ.get('VISION_MAX_IMAGE_SIDE', 1024))  # Longest side sent to Vision (px)
+    VISION_IMAGE_FORMAT = os.environ.get('VISION_IMAGE_FORMAT', 'jpeg')  # 'jpeg' or 'webp'
+    VISION_IMAGE_QUALITY = int(os.environ.get('VISION_IMAGE_QUALITY', 85))
+    VISION_MIN_LABEL_SCORE = float(os.environ.get('VISION_MIN_LABEL_SCORE', 0.6))  # Drop less confident labels
+    VISION_MIN_LABEL_TOPICALITY = float(os.environ.get('VISION_MIN_LABEL_TOPICALITY', 0.5))
+    VISION_MAX_LABELS = 15  # Labels validated per image
+    VISION_BATCH_MAX_IMAGES = 16  # Vision's limit for images per synchronous batch request
+    VISION_VALIDATION_WORKERS = int(os.environ.get('VISION_VALIDATION_WORKERS', 8))  # Concurrent OFF lookups per worker
+    VISION_VALIDATION_DEADLINE = float(os.environ.get('VISION_VALIDATION_DEADLINE', 4.0))  # seconds for all lookups
+    IMAGE_HASH_CACHE_SIZE = int(os.environ.get('IMAGE_HASH_CACHE_SIZE', 512))  # Detected photos remembered per worker
+    IMAGE_HASH_MAX_DISTANCE = int(os.environ.get('IMAGE_HASH_MAX_DISTANCE', 6))  # dHash bits (of 64) for a near-duplicate
+    
+    # Password hashing (bcrypt on a small process pool, see services/password_hasher.py)
+    # Pinned so every worker hashes with the same cost; pick it with benchmarks/bench_password_hashing.py
+    BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))  # bcrypt's default cost, used by all existing hashes
+    BCRYPT_TARGET_MS = int(os.environ.get('BCRYPT_TARGET_MS', 250))  # Target hash time for the benchmark's suggestion
+    BCRYPT_MIN_ROUNDS = 12
+    BCRYPT_MAX_ROUNDS = 14
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 0))  # Pool processes per worker; 0 = hash inline
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 8))  # Queued logins before 503
+    PASSWORD_HASH_QUEUE_TIMEOUT = float(os.environ.get('PASSWORD_HASH_QUEUE_TIMEOUT', 2.0))  # seconds
+    
+    # Users of JWT-authenticated requests, cached per worker
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 1024))
+    USER_CACHE_TTL_SECONDS = int(os.environ.get('USER_CACHE_TTL_SECONDS', 60))  # Max staleness across workers
+    
+    # Worker threads for post-response work (nutrition precompute)
+    BACKGROUND_WORKERS = int(os.environ.get('BACKGROUND_WORKERS', 2))
+    
+    # Warm-up of lazy services after boot (see app/warmup.py); /ready answers 503 until it finishes
+    WARMUP_ENABLED = os.environ.get('WARMUP_ENABLED', 'true').lower() == 'true'
+    WARMUP_MODE = os.environ.get('WARMUP_MODE', 'off')  # 'thread' (from create_app, run.py/wsgi.py), 'post_fork' (gunicorn hook) or 'off' (scripts)
+    WARMUP_DB_CONNECTIONS = int(os.environ.get('WARMUP_DB_CONNECTIONS', 2))  # Pool connections opened up front
+    
+    # Snapshot of warm in-memory state (caches, pantry index), restored at boot (see app/snapshot.py)
+    SNAPSHOT_ENABLED = os.environ.get('SNAPSHOT_ENABLED', 'true').lower() == 'true'
+    SNAPSHOT_PATH = os.environ.get('SNAPSHOT_PATH', os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'instance', 'warm_state.npz'
+    ))
+    SNAPSHOT_INTERVAL_SECONDS = int(os.environ.get('SNAPSHOT_INTERVAL_SECONDS', 300))  # 0 = only at shutdown
+    SNAPSHOT_MAX_AGE_SECONDS = int(os.environ.get('SNAPSHOT_MAX_AGE_SECONDS', 24 * 3600))  # Older snapshots are ignored
+    
+    # Prometheus metrics endpoint; set METRICS_TOKEN to require 'Authorization: Bearer <token>'
+    METRICS_PATH = '/metrics'
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    
+    # Outbound call tracing (see app/tracing.py); exporter: 'jsonl', 'otel' or 'none'
+    TRACING_ENABLED = os.environ.get('TRACING_ENABLED', 'true').lower() == 'true'
+    TRACING_EXPORTER = os.environ.get('TRACING_EXPORTER', 'none')  # Server-Timing headers and metrics work without one
+    TRACING_JSONL_PATH = os.environ.get('TRACING_JSONL_PATH', os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'instance', 'traces.jsonl'
+    ))
+    TRACING_JSONL_MAX_BYTES = int(os.environ.get('TRACING_JSONL_MAX_BYTES', 50 * 1024 * 1024))  # Rotated to <path>.1 beyond this
+    TRACING_QUEUE_SIZE = int(os.environ.get('TRACING_QUEUE_SIZE', 10000))  # Spans waiting to be written; more are dropped
+    TRACING_SERVICE_NAME = os.environ.get('OTEL_SERVICE_NAME', 'snackhack-api')
+    TRACING_ALL_REQUESTS = os.environ.get('TRACING_ALL_REQUESTS', 'false').lower() == 'true'  # Also export requests without outbound calls
+    
+    # Per-request SQL statement counts and N+1 detection (see app/query_stats.py)
+    QUERY_STATS_ENABLED = os.environ.get('QUERY_STATS_ENABLED', 'true').lower() == 'true'
+    QUERY_N_PLUS_ONE_THRESHOLD = int(os.environ.get('QUERY_N_PLUS_ONE_THRESHOLD', 5))  # Repeats of one SELECT shape per request
+    
+    # On-demand profiling (see app/profiling.py and routes/admin.py); disabled unless PROFILING_TOKEN is set
+    PROFILING_TOKEN = os.environ.get('PROFILING_TOKEN')
+    PROFILING_DIR = os.environ.get('PROFILING_DIR', os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'instance', 'profiles'
+    ))
+    PROFILING_INTERVAL_MS = float(os.environ.get('PROFILING_INTERVAL_MS', 10))  # Stack sampling interval
+    PROFILING_MAX_SECONDS = int(os.environ.get('PROFILING_MAX_SECONDS', 60))  # Longest sampling session
+    
+    # Response compression
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))  # bytes
+    COMPRESS_MIMETYPES = ['application/json', 'text/plain']
+    COMPRESS_GZIP_LEVEL = 6
+    COMPRESS_BROTLI_QUALITY = 4
+    
     # SQLAlchemy Configuration
     SQLALCHEMY_DATABASE_URI = get_database_url()
     SQLALCHEMY_TRACK_MODIFICATIONS = False
@@ -98,14 +197,24 @@ class Config:
 class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
+    QUERY_STATS_HEADERS = True  # X-DB-Queries / X-DB-Time-Ms / X-DB-N-Plus-One on every response
 
 class ProductionConfig(Config):
     """Production configuration"""
     DEBUG = False
+    QUERY_STATS_HEADERS = False
+
+class TestingConfig(Config):
+    """Testing configuration: in-memory SQLite, without the Postgres pool options"""
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    QUERY_STATS_HEADERS = True
 
 # Configuration dictionary
 config = {
     'development': DevelopmentConfig,
     'production': ProductionConfig,
+    'testing': TestingConfig,
     'default': DevelopmentConfig
 }
\ No newline at end of file
@@ -0,0 +1,47 @@
+import hashlib
+from datetime import timezone
+from flask import request, current_app
+
+# Bump when the shape of cached recipe payloads changes so old ETags stop matching
+PAYLOAD_VERSION = 2
+
+def make_etag(*parts):
+    """Build an opaque ETag value from the data version parts of a response"""
+    return hashlib.blake2b(repr((PAYLOAD_VERSION,) + parts).encode('utf-8'), digest_size=12).hexdigest()
+
+def _as_utc(value):
+    # Timestamps are stored as naive UTC; HTTP dates are compared at second precision
+    if value is None:
+        return None
+    return value.replace(tzinfo=timezone.utc, microsecond=0)
+
+def not_modified(etag, last_modified=None):
+    """
+    Return a 304 response if the client's cached copy is still current, else None.
+
+    Call this before loading relationships or serializing, so a cache hit costs
+    no serialization work at all. If-None-Match takes precedence over
+    If-Modified-Since, as required by RFC 9110.
+    """
+    if request.if_none_match:
+        is_current = request.if_none_match.contains_weak(etag)
+    elif last_modified is not None and request.if_modified_since:
+        is_current = _as_utc(last_modified) <= request.if_modified_since
+    else:
+        is_current = False
+
+    if not is_current:
+        return None
+
+    response = current_app.response_class(status=304)
+    return with_validators(response, etag, last_modified)
+
+def with_validators(response, etag, last_modified=None):
+    """Attach ETag/Last-Modified and private revalidation headers to a response"""
+    # Weak ETag: the same data may be sent gzip- or brotli-encoded
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = _as_utc(last_modified)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.vary.add('Authorization')
+    return response
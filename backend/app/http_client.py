@@ -0,0 +1,39 @@
+import random
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+class JitteredRetry(Retry):
+    """Retry policy whose exponential backoff uses full jitter, so workers don't retry in lockstep"""
+
+    def get_backoff_time(self):
+        backoff = super().get_backoff_time()
+        return random.uniform(0, backoff) if backoff > 0 else 0
+
+def build_session(pool_size=10, retries=3, backoff_factor=0.3,
+                  status_forcelist=(429, 500, 502, 503, 504), headers=None):
+    """
+    Create a pooled requests.Session for a long-lived API client.
+
+    Connections are kept alive and reused (one pool per host, at most pool_size
+    connections). Idempotent requests are retried on connection errors and on
+    the given status codes, honouring Retry-After.
+    """
+    retry = JitteredRetry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=status_forcelist,
+        allowed_methods=frozenset(['GET', 'HEAD', 'OPTIONS']),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
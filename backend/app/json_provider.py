@@ -0,0 +1,55 @@
+import json
+from datetime import date, datetime
+from flask.json.provider import DefaultJSONProvider
+
+# Optional fast JSON encoder; fall back to the standard library if not installed
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson.
+
+    Datetimes are encoded as ISO 8601 strings (orjson does this natively in C),
+    so model serializers can hand back raw datetime values instead of calling
+    isoformat() per attribute. Falls back to the stdlib encoder with the same
+    output format when orjson is not installed.
+    """
+
+    sort_keys = False
+
+    if ORJSON_AVAILABLE:
+        _option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, (datetime, date)):
+            return o.isoformat()
+        return DefaultJSONProvider.default(o)
+
+    def dumps(self, obj, **kwargs):
+        if ORJSON_AVAILABLE and not kwargs:
+            return orjson.dumps(obj, default=self.default, option=self._option).decode('utf-8')
+        kwargs.setdefault('default', self.default)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if ORJSON_AVAILABLE and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        if not ORJSON_AVAILABLE:
+            return super().response(*args, **kwargs)
+
+        # Encode straight to bytes; skips the str round trip of the default provider
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=self._option),
+            mimetype=self.mimetype
+        )
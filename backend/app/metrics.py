@@ -0,0 +1,135 @@
+import os
+import hmac
+import time
+from flask import Response, g, request
+
+# Optional Prometheus support; without it requests are not instrumented and /metrics is absent
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+    )
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+
+# Recipe generation and label detection take seconds, autocomplete milliseconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80)
+
+# Label for requests that matched no route (404s, scanners), so labels stay bounded
+UNMATCHED_ROUTE = '<unmatched>'
+
+if PROMETHEUS_AVAILABLE:
+    REQUEST_LATENCY = Histogram(
+        'http_request_duration_seconds', 'Request latency by route',
+        ['method', 'route'], buckets=LATENCY_BUCKETS
+    )
+    REQUESTS = Counter(
+        'http_requests_total', 'Requests by route and status',
+        ['method', 'route', 'status']
+    )
+    IN_FLIGHT = Gauge(
+        'http_requests_in_flight', 'Requests being handled, by route',
+        ['route'], multiprocess_mode='livesum'
+    )
+    OUTBOUND_LATENCY = Histogram(
+        'outbound_request_duration_seconds', 'Latency of calls to external providers (see app/tracing.py)',
+        ['provider', 'operation', 'outcome'], buckets=LATENCY_BUCKETS
+    )
+    DB_QUERIES = Histogram(
+        'db_queries_per_request', 'SQL statements executed per request (see app/query_stats.py)',
+        ['route'], buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+    )
+    DB_TIME = Histogram(
+        'db_time_per_request_seconds', 'Time spent executing SQL per request',
+        ['route'], buckets=LATENCY_BUCKETS
+    )
+    N_PLUS_ONE = Counter(
+        'db_suspected_n_plus_one_total', 'Statement shapes repeated often enough in one request to suggest N+1',
+        ['route']
+    )
+    WARMUP_DURATION = Gauge(
+        'app_warmup_duration_seconds', 'Time taken by the last warm-up of each worker',
+        multiprocess_mode='liveall'
+    )
+
+def multiprocess_enabled():
+    """True under gunicorn with PROMETHEUS_MULTIPROC_DIR set (see gunicorn.conf.py)"""
+    return bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+def observe_warmup(duration_seconds):
+    if PROMETHEUS_AVAILABLE:
+        WARMUP_DURATION.set(duration_seconds)
+
+def observe_outbound(provider, operation, outcome, duration_seconds):
+    if PROMETHEUS_AVAILABLE:
+        OUTBOUND_LATENCY.labels(provider, operation, outcome).observe(duration_seconds)
+
+def observe_queries(route, count, duration_seconds, suspected_n_plus_one):
+    if PROMETHEUS_AVAILABLE:
+        DB_QUERIES.labels(route).observe(count)
+        DB_TIME.labels(route).observe(duration_seconds)
+        if suspected_n_plus_one:
+            N_PLUS_ONE.labels(route).inc(suspected_n_plus_one)
+
+def _route():
+    rule = request.url_rule
+    return rule.rule if rule is not None else UNMATCHED_ROUTE
+
+def init_metrics(app):
+    """
+    Record per-route latency histograms, status counts and in-flight gauges,
+    and serve them in Prometheus text format on /metrics.
+
+    Register before other after_request hooks (e.g. compression) so the
+    recorded latency includes them. With PROMETHEUS_MULTIPROC_DIR set, every
+    gunicorn worker writes its samples there and /metrics aggregates them.
+    """
+    if not PROMETHEUS_AVAILABLE:
+        return
+
+    metrics_path = app.config.get('METRICS_PATH', '/metrics')
+    metrics_token = app.config.get('METRICS_TOKEN')
+
+    @app.before_request
+    def start_request_timer():
+        if request.path == metrics_path:
+            return
+        route = _route()
+        g._metrics = [time.perf_counter(), route, False]
+        IN_FLIGHT.labels(route).inc()
+
+    @app.after_request
+    def record_request(response):
+        state = g.get('_metrics')
+        if state is not None:
+            start, route, _ = state
+            REQUEST_LATENCY.labels(request.method, route).observe(time.perf_counter() - start)
+            REQUESTS.labels(request.method, route, str(response.status_code)).inc()
+            state[2] = True
+        return response
+
+    @app.teardown_request
+    def finish_request(error=None):
+        state = g.pop('_metrics', None)
+        if state is None:
+            return
+        start, route, recorded = state
+        if not recorded:
+            # after_request doesn't run when a view raises
+            REQUEST_LATENCY.labels(request.method, route).observe(time.perf_counter() - start)
+            REQUESTS.labels(request.method, route, '500').inc()
+        IN_FLIGHT.labels(route).dec()
+
+    @app.route(metrics_path, methods=['GET'])
+    def metrics():
+        if metrics_token:
+            supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+            if not hmac.compare_digest(supplied.encode('utf-8'), metrics_token.encode('utf-8')):
+                return {'error': 'Unauthorized'}, 401
+
+        if multiprocess_enabled():
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+        return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
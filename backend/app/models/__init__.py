@@ -3,5 +3,6 @@ from .user import User
 from .recipe import Recipe
 from .ingredient import Ingredient
 from .recipe_ingredient import RecipeIngredient
+from .recipe_blob import RecipeBlob
 
-__all__ = ['User', 'Recipe', 'Ingredient', 'RecipeIngredient']
\ No newline at end of file
+__all__ = ['User', 'Recipe', 'Ingredient', 'RecipeIngredient', 'RecipeBlob']
\ No newline at end of file
@@ -1,5 +1,6 @@
 from datetime import datetime
 from ..database import db
+from .serialization import row_serializer
 
 class Ingredient(db.Model):
     """Ingredient model for storing ingredient information"""
@@ -30,13 +31,9 @@ class Ingredient(db.Model):
     
     def to_dict(self):
         """Convert ingredient object to dictionary"""
-        return {
-            'id': self.id,
-            'name': self.name,
-            'category': self.category,
-            'nutrition_data': self.nutrition_data or {},
-            'common_units': self.common_units or [],
-            'alternative_names': self.alternative_names or [],
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
\ No newline at end of file
+        return _serialize(self)
+
+_serialize = row_serializer((
+    'id', 'name', 'category', 'nutrition_data', 'common_units', 'alternative_names',
+    'created_at', 'updated_at'
+), empty={'nutrition_data': dict, 'common_units': list, 'alternative_names': list})
@@ -1,5 +1,11 @@
 from datetime import datetime
+from ..cache import LRUCache
+from ..config import Config
 from ..database import db
+from .serialization import row_serializer
+
+# Decompressed recipe bodies keyed by blob id; blobs are immutable so entries never go stale
+recipe_body_cache = LRUCache('recipe_bodies', maxsize=Config.RECIPE_BODY_CACHE_SIZE)
 
 class Recipe(db.Model):
     """Recipe model for storing generated and saved recipes"""
@@ -11,7 +17,10 @@ class Recipe(db.Model):
     description = db.Column(db.Text)
     
     # Recipe content stored as JSON (from AI generation)
-    instructions = db.Column(db.JSON, nullable=False)  # List of instruction steps
+    instructions = db.Column(db.JSON, nullable=False)  # List of instruction steps (empty when stored in a blob)
+    
+    # Large markdown bodies live in a shared, compressed, content-addressed blob
+    instructions_blob_id = db.Column(db.Integer, db.ForeignKey('recipe_blobs.id'), index=True)
     
     # Recipe metadata
     prep_time = db.Column(db.Integer)  # minutes
@@ -43,40 +52,47 @@ class Recipe(db.Model):
     is_saved = db.Column(db.Boolean, default=False)  # True if user saved this recipe
     original_ingredients = db.Column(db.JSON)  # Store original ingredients used to generate recipe
     
+    # Precomputed nutrition: {'per_serving', 'totals', 'items', 'unresolved', 'servings', 'computed_at'}
+    nutrition = db.Column(db.JSON)
+    
     # Relationships
     recipe_ingredients = db.relationship('RecipeIngredient', back_populates='recipe', cascade='all, delete-orphan')
+    instructions_blob = db.relationship('RecipeBlob')
     
     def __repr__(self):
         return f'<Recipe {self.title}>'
     
-    def to_dict(self, include_ingredients=True):
+    @property
+    def body(self):
+        """Full recipe instructions, read from the shared blob when the body was moved out of the row"""
+        blob_id = self.instructions_blob_id
+        if blob_id is None:
+            return self.instructions
+        
+        body = recipe_body_cache.get(blob_id)
+        if body is None:
+            body = self.instructions_blob.text
+            recipe_body_cache.put(blob_id, body)
+        return body
+    
+    def to_dict(self, include_ingredients=True, include_nutrition=False):
         """Convert recipe object to dictionary"""
-        recipe_dict = {
-            'id': self.id,
-            'title': self.title,
-            'description': self.description,
-            'instructions': self.instructions or [],
-            'prep_time': self.prep_time,
-            'cook_time': self.cook_time,
-            'total_time': self.total_time,
-            'serving_size': self.serving_size,
-            'difficulty_level': self.difficulty_level,
-            'cuisine_type': self.cuisine_type,
-            'dietary_tags': self.dietary_tags or [],
-            'user_id': self.user_id,
-            'rating': self.rating,
-            'notes': self.notes,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'last_made': self.last_made.isoformat() if self.last_made else None,
-            'times_made': self.times_made,
-            'ai_model_used': self.ai_model_used,
-            'generation_prompt': self.generation_prompt,
-            'is_saved': self.is_saved,
-            'original_ingredients': self.original_ingredients or []
-        }
+        recipe_dict = _serialize(self)
+        if self.instructions_blob_id is not None:
+            recipe_dict['instructions'] = self.body
+        
+        # Only the recipe detail view needs the (large) precomputed nutrition
+        if include_nutrition:
+            recipe_dict['nutrition'] = self.nutrition
         
         if include_ingredients:
             recipe_dict['ingredients'] = [ri.to_dict() for ri in self.recipe_ingredients]
         
-        return recipe_dict
\ No newline at end of file
+        return recipe_dict
+
+_serialize = row_serializer((
+    'id', 'title', 'description', 'instructions', 'prep_time', 'cook_time', 'total_time',
+    'serving_size', 'difficulty_level', 'cuisine_type', 'dietary_tags', 'user_id', 'rating',
+    'notes', 'created_at', 'updated_at', 'last_made', 'times_made', 'ai_model_used',
+    'generation_prompt', 'is_saved', 'original_ingredients'
+), empty={'instructions': list, 'dietary_tags': list, 'original_ingredients': list})
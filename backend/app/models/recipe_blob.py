@@ -0,0 +1,53 @@
+import hashlib
+import zlib
+from datetime import datetime
+from ..database import db
+
+# Optional zstd support; zlib is always available
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+class RecipeBlob(db.Model):
+    """Content-addressed, compressed storage for large recipe bodies (markdown)"""
+
+    __tablename__ = 'recipe_blobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    content_hash = db.Column(db.String(64), unique=True, nullable=False, index=True)  # sha256 of normalized text
+    codec = db.Column(db.String(10), nullable=False)  # 'zstd' or 'zlib'
+    size = db.Column(db.Integer, nullable=False)  # Uncompressed size in bytes
+    data = db.Column(db.LargeBinary, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<RecipeBlob {self.content_hash[:12]} {self.codec} {self.size}B>'
+
+    @staticmethod
+    def normalize(text):
+        """Normalize text before hashing so identical generations share one blob"""
+        return text.replace('\r\n', '\n').strip()
+
+    @staticmethod
+    def hash_text(normalized_text):
+        """Content address of a normalized text"""
+        return hashlib.sha256(normalized_text.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def compress(normalized_text):
+        """Compress text with the best available codec, returning (codec, data)"""
+        raw = normalized_text.encode('utf-8')
+        if ZSTD_AVAILABLE:
+            return 'zstd', zstandard.ZstdCompressor(level=10).compress(raw)
+        return 'zlib', zlib.compress(raw, 9)
+
+    @property
+    def text(self):
+        """Decompressed text of this blob"""
+        if self.codec == 'zstd':
+            raw = zstandard.ZstdDecompressor().decompress(self.data)
+        else:
+            raw = zlib.decompress(self.data)
+        return raw.decode('utf-8')
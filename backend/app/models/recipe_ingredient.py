@@ -1,4 +1,5 @@
 from ..database import db
+from .serialization import row_serializer
 
 class RecipeIngredient(db.Model):
     """Association table for Recipe-Ingredient many-to-many relationship with quantity"""
@@ -23,7 +24,8 @@ class RecipeIngredient(db.Model):
     
     # Relationships
     recipe = db.relationship('Recipe', back_populates='recipe_ingredients')
-    ingredient = db.relationship('Ingredient', back_populates='recipe_ingredients')
+    # Joined so loading a recipe's ingredients (to_dict) also loads their names, not one query each
+    ingredient = db.relationship('Ingredient', back_populates='recipe_ingredients', lazy='joined')
     
     # Unique constraint to prevent duplicate ingredient entries in same recipe
     __table_args__ = (db.UniqueConstraint('recipe_id', 'ingredient_id', name='_recipe_ingredient_uc'),)
@@ -33,15 +35,11 @@ class RecipeIngredient(db.Model):
     
     def to_dict(self):
         """Convert recipe ingredient object to dictionary"""
-        return {
-            'id': self.id,
-            'recipe_id': self.recipe_id,
-            'ingredient_id': self.ingredient_id,
-            'ingredient_name': self.ingredient.name if self.ingredient else None,
-            'quantity': self.quantity,
-            'unit': self.unit,
-            'preparation': self.preparation,
-            'notes': self.notes,
-            'is_optional': self.is_optional,
-            'order_index': self.order_index
-        }
\ No newline at end of file
+        recipe_ingredient_dict = _serialize(self)
+        recipe_ingredient_dict['ingredient_name'] = self.ingredient.name if self.ingredient else None
+        return recipe_ingredient_dict
+
+_serialize = row_serializer((
+    'id', 'recipe_id', 'ingredient_id', 'quantity', 'unit', 'preparation', 'notes',
+    'is_optional', 'order_index'
+))
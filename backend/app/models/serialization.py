@@ -0,0 +1,26 @@
+from operator import attrgetter
+
+def row_serializer(fields, empty=None):
+    """
+    Build a function that converts a row into a dict with exactly `fields`.
+
+    Only the listed attributes are serialized, so a column added to a model
+    stays out of API responses until it is listed explicitly. The values are
+    read with one attrgetter call per row. Fields named in `empty` fall back
+    to a fresh value from that factory when NULL (e.g. {'dietary_tags': list}).
+    Datetime values are returned as-is; the app's JSON provider encodes them
+    as ISO 8601.
+    """
+    fields = tuple(fields)
+    empty = empty or {}
+    get_values = attrgetter(*fields)
+    if len(fields) == 1:
+        single = get_values
+        get_values = lambda obj: (single(obj),)
+
+    def serialize(obj):
+        return {
+            name: empty[name]() if value is None and name in empty else value
+            for name, value in zip(fields, get_values(obj))
+        }
+    return serialize
@@ -1,6 +1,7 @@
 from datetime import datetime
-import bcrypt
 from ..database import db
+from ..services.password_hasher import password_hasher
+from .serialization import row_serializer
 
 class User(db.Model):
     """User model for storing user information and preferences"""
@@ -22,40 +23,37 @@ class User(db.Model):
     # Relationships
     recipes = db.relationship('Recipe', backref='user', lazy=True, cascade='all, delete-orphan')
     
+    # Case-insensitive uniqueness and login lookups (lower(email) / lower(username))
+    __table_args__ = (
+        db.Index('ix_users_email_lower', db.func.lower(email), unique=True),
+        db.Index('ix_users_username_lower', db.func.lower(username), unique=True),
+    )
+    
     def __repr__(self):
         return f'<User {self.username}>'
     
     def set_password(self, password):
-        """Hash and set the user's password"""
-        salt = bcrypt.gensalt()
-        self.password_hash = bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+        """Hash and set the user's password (bcrypt, off the request thread)"""
+        self.password_hash = password_hasher.hash_password(password)
     
     def check_password(self, password):
         """Check if the provided password matches the stored hash"""
-        return bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
+        return password_hasher.verify_password(password, self.password_hash)
+    
+    def password_needs_rehash(self):
+        """True if the stored hash uses a different bcrypt cost than the current one"""
+        return password_hasher.needs_rehash(self.password_hash)
     
     def to_dict(self):
         """Convert user object to dictionary"""
-        return {
-            'id': self.id,
-            'username': self.username,
-            'email': self.email,
-            'dietary_preferences': self.dietary_preferences or [],
-            'allergies': self.allergies or [],
-            'favorite_cuisines': self.favorite_cuisines or [],
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+        return _serialize(self)
     
     def to_dict_safe(self):
         """Convert user object to dictionary without sensitive information"""
-        return {
-            'id': self.id,
-            'username': self.username,
-            'email': self.email,
-            'dietary_preferences': self.dietary_preferences or [],
-            'allergies': self.allergies or [],
-            'favorite_cuisines': self.favorite_cuisines or [],
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
\ No newline at end of file
+        return _serialize(self)
+
+# password_hash is never part of the serialized user
+_serialize = row_serializer((
+    'id', 'username', 'email', 'dietary_preferences', 'allergies', 'favorite_cuisines',
+    'created_at', 'updated_at'
+), empty={'dietary_preferences': list, 'allergies': list, 'favorite_cuisines': list})
@@ -0,0 +1,264 @@
+import os
+import sys
+import hmac
+import time
+import pstats
+import secrets
+import cProfile
+import threading
+import tracemalloc
+from collections import Counter
+from io import StringIO
+from flask import g, request
+from .config import Config
+
+# Per-request profiling header (with X-Profiling-Token): 'sample' or 'cprofile'
+PROFILE_HEADER = 'X-Profile'
+TOKEN_HEADER = 'X-Profiling-Token'
+
+# cProfile can only be active once per process (sys.monitoring on 3.12+)
+_cprofile_lock = threading.Lock()
+# One background sampling session per process
+_sampling_lock = threading.Lock()
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_baseline = None
+
+_code_labels = {}
+# Longest first, so site-packages wins over the stdlib directory that contains it
+_path_prefixes = sorted({os.path.abspath(p) + os.sep for p in sys.path if p}, key=len, reverse=True)
+
+def _frame_label(code):
+    """'function (path/file.py:line)' for a code object, cached"""
+    label = _code_labels.get(code)
+    if label is None:
+        filename = code.co_filename
+        for prefix in _path_prefixes:
+            if filename.startswith(prefix):
+                filename = filename[len(prefix):]
+                break
+        label = f'{code.co_name} ({filename}:{code.co_firstlineno})'.replace(';', ':')
+        _code_labels[code] = label
+    return label
+
+class StackSampler:
+    """
+    Wall-clock stack sampler. A daemon thread reads every thread's current
+    frame (sys._current_frames) each `interval` seconds and counts identical
+    stacks, so threads blocked on I/O (LLM calls, the database) show up as
+    well as CPU work. Costs one stack walk per thread per sample; at the
+    default 100 Hz that is well under a few percent of a worker.
+    """
+
+    def __init__(self, interval=None, thread_ids=None, thread_prefix=None):
+        self.interval = interval or Config.PROFILING_INTERVAL_MS / 1000
+        self.thread_ids = set(thread_ids) if thread_ids else None
+        self.thread_prefix = thread_prefix
+        self.stacks = Counter()
+        self.samples = 0
+        self.started_at = None
+        self.duration = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._starter_id = None
+
+    def start(self):
+        # When sampling every thread, leave out the one that started the sampler (it only waits)
+        self._starter_id = threading.get_ident()
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+        return self
+
+    def _run(self):
+        skip_ids = {threading.get_ident()}
+        if self.thread_ids is None:
+            skip_ids.add(self._starter_id)
+        names = {}
+        while not self._stop.wait(self.interval):
+            if self.samples % 100 == 0:
+                # Thread names change rarely; refresh once a second at 100 Hz
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id in skip_ids or (self.thread_ids is not None and thread_id not in self.thread_ids):
+                    continue
+                name = names.get(thread_id, str(thread_id))
+                if self.thread_prefix and not name.startswith(self.thread_prefix):
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                labels.append(name.replace(';', ':'))
+                self.stacks[';'.join(reversed(labels))] += 1
+            self.samples += 1
+
+    def collapsed(self):
+        """Brendan Gregg's collapsed-stack format (flamegraph.pl, speedscope, inferno)"""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+def _new_profile_id():
+    return f'{int(time.time())}-{os.getpid()}-{secrets.token_hex(4)}'
+
+def profile_path(profile_id, extension):
+    return os.path.join(Config.PROFILING_DIR, f'{profile_id}.{extension}')
+
+def _write_collapsed(profile_id, sampler):
+    os.makedirs(Config.PROFILING_DIR, exist_ok=True)
+    path = profile_path(profile_id, 'collapsed')
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        f.write(sampler.collapsed())
+    os.replace(path + '.tmp', path)
+
+def start_sampling(seconds, interval=None, thread_prefix=None):
+    """
+    Sample every thread of this worker for `seconds` in the background and
+    write the collapsed stacks to PROFILING_DIR. Returns the profile id, or
+    None if a sampling session is already running in this worker.
+
+    Runs in the background because a sync gunicorn worker can't serve other
+    requests while one request waits; any worker can serve the result later.
+    """
+    if not _sampling_lock.acquire(blocking=False):
+        return None
+    profile_id = _new_profile_id()
+    sampler = StackSampler(interval=interval, thread_prefix=thread_prefix)
+
+    def run():
+        try:
+            sampler.start()
+            time.sleep(seconds)
+            sampler.stop()
+            _write_collapsed(profile_id, sampler)
+            print(f"Profile {profile_id}: {sampler.samples} samples over {sampler.duration:.1f}s")
+        except Exception as e:
+            print(f"Sampling profile {profile_id} failed: {str(e)}")
+        finally:
+            _sampling_lock.release()
+
+    threading.Thread(target=run, name='profiling', daemon=True).start()
+    return profile_id
+
+def cprofile_text(profile_id, limit=60, sort='cumulative'):
+    """Top functions of a saved cProfile run, as pstats prints them"""
+    output = StringIO()
+    stats = pstats.Stats(profile_path(profile_id, 'prof'), stream=output)
+    stats.strip_dirs().sort_stats(sort).print_stats(limit)
+    return output.getvalue()
+
+def start_tracemalloc(frames=10):
+    """Start tracing allocations (roughly doubles allocation cost) and keep a baseline snapshot"""
+    global _tracemalloc_baseline
+    with _tracemalloc_lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        _tracemalloc_baseline = tracemalloc.take_snapshot()
+
+def stop_tracemalloc():
+    global _tracemalloc_baseline
+    with _tracemalloc_lock:
+        tracemalloc.stop()
+        _tracemalloc_baseline = None
+
+def tracemalloc_top(limit=25, group_by='lineno', compare=False):
+    """
+    Largest allocation sites still alive, or the largest growth since
+    start_tracemalloc() with `compare`. None if tracemalloc isn't running.
+    """
+    if not tracemalloc.is_tracing():
+        return None
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+        tracemalloc.Filter(False, '<unknown>'),
+    ))
+    compare = compare and _tracemalloc_baseline is not None
+    if compare:
+        stats = snapshot.compare_to(_tracemalloc_baseline, group_by)
+    else:
+        stats = snapshot.statistics(group_by)
+
+    current, peak = tracemalloc.get_traced_memory()
+    top = []
+    for stat in stats[:limit]:
+        entry = {
+            'location': [f'{frame.filename}:{frame.lineno}' for frame in stat.traceback],
+            'size_kb': round(stat.size / 1024, 1),
+            'count': stat.count,
+        }
+        if compare:
+            entry['size_diff_kb'] = round(stat.size_diff / 1024, 1)
+            entry['count_diff'] = stat.count_diff
+        top.append(entry)
+    return {
+        'pid': os.getpid(),
+        'traced_kb': round(current / 1024, 1),
+        'peak_kb': round(peak / 1024, 1),
+        'group_by': group_by,
+        'compared_to_baseline': compare,
+        'top': top
+    }
+
+def token_matches(supplied):
+    """True if profiling is enabled and `supplied` is the PROFILING_TOKEN"""
+    token = Config.PROFILING_TOKEN
+    return bool(token and supplied) and hmac.compare_digest(supplied.encode('utf-8'), token.encode('utf-8'))
+
+def init_profiling(app):
+    """
+    Profile single requests on demand: with `X-Profile: sample` (wall-clock
+    stack samples of the request thread, collapsed-stack output) or
+    `X-Profile: cprofile` (deterministic, pstats output) plus a valid
+    X-Profiling-Token, the profile is saved under PROFILING_DIR and its id
+    returned in the X-Profile-Id header. Fetch it from the admin blueprint.
+    Does nothing unless PROFILING_TOKEN is set.
+    """
+    if not app.config.get('PROFILING_TOKEN'):
+        return
+
+    @app.before_request
+    def start_request_profile():
+        mode = request.headers.get(PROFILE_HEADER)
+        if mode not in ('sample', 'cprofile') or not token_matches(request.headers.get(TOKEN_HEADER)):
+            return
+        if mode == 'cprofile':
+            if not _cprofile_lock.acquire(blocking=False):
+                return
+            profiler = cProfile.Profile()
+            profiler.enable()
+        else:
+            profiler = StackSampler(thread_ids=[threading.get_ident()]).start()
+        g._profile = (mode, profiler)
+
+    def finish_request_profile():
+        mode, profiler = g.pop('_profile')
+        profile_id = _new_profile_id()
+        if mode == 'cprofile':
+            try:
+                profiler.disable()
+                os.makedirs(Config.PROFILING_DIR, exist_ok=True)
+                profiler.dump_stats(profile_path(profile_id, 'prof'))
+            finally:
+                _cprofile_lock.release()
+        else:
+            _write_collapsed(profile_id, profiler.stop())
+        return profile_id
+
+    @app.after_request
+    def save_request_profile(response):
+        if g.get('_profile') is not None:
+            response.headers['X-Profile-Id'] = finish_request_profile()
+        return response
+
+    @app.teardown_request
+    def stop_request_profile(error=None):
+        # after_request doesn't run when a view raises
+        if g.get('_profile') is not None:
+            finish_request_profile()
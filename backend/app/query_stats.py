@@ -0,0 +1,135 @@
+import re
+import time
+import threading
+import contextvars
+from collections import Counter
+from contextlib import contextmanager
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from .metrics import UNMATCHED_ROUTE, observe_queries
+
+# Statement shapes repeated at least this many times in one request are reported as suspected N+1
+N_PLUS_ONE_THRESHOLD = 5
+
+# Stats of the innermost active scope (request or count_queries block); copied into pool threads
+_current_stats = contextvars.ContextVar('current_query_stats', default=None)
+
+# "IN (?, ?, ?)" / "VALUES (%s, %s)" -> "(…)" so expanding IN lists and literals share one shape
+_PARAM_LIST = re.compile(r"\(\s*(?:\?|%s|%\(\w+\)s|:\w+|\$\d+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+|\$\d+))*\s*\)")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+_WHITESPACE = re.compile(r'\s+')
+
+def statement_shape(statement):
+    """The statement with parameters, literals and IN lists collapsed"""
+    shape = _PARAM_LIST.sub('(…)', statement)
+    shape = _LITERAL.sub('?', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+class QueryStats:
+    """Statements executed in one scope, also counted in every enclosing scope"""
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.count = 0
+        self.duration_ms = 0.0
+        self.shapes = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, statement, duration_ms):
+        shape = statement_shape(statement)
+        stats = self
+        while stats is not None:
+            with stats._lock:
+                stats.count += 1
+                stats.duration_ms += duration_ms
+                stats.shapes[shape] += 1
+            stats = stats.parent
+
+    def suspected_n_plus_one(self, threshold=N_PLUS_ONE_THRESHOLD):
+        """[(shape, count)] of SELECTs run at least `threshold` times, most repeated first"""
+        return [
+            (shape, count) for shape, count in self.shapes.most_common()
+            if count >= threshold and shape[:6].upper() == 'SELECT'
+        ]
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    starts = conn.info.get('query_start_time')
+    if stats is None or not starts:
+        return
+    stats.record(statement, (time.perf_counter() - starts.pop()) * 1000)
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(exception_context):
+    # after_cursor_execute doesn't run for failed statements
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('query_start_time'):
+        connection.info['query_start_time'].pop()
+
+@contextmanager
+def count_queries():
+    """
+    Count the statements executed inside the block, including those of
+    requests handled in it (e.g. through the Flask test client):
+
+        with count_queries() as stats:
+            client.get('/api/recipes/my-recipes')
+        assert stats.count <= 3
+    """
+    stats = QueryStats(parent=_current_stats.get())
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+def init_query_stats(app):
+    """
+    Count SQL statements and database time per request. Totals go to the
+    Prometheus metrics; repeated SELECT shapes are logged as suspected N+1.
+    With QUERY_STATS_HEADERS (on in development) they are also returned as
+    X-DB-Queries, X-DB-Time-Ms and X-DB-N-Plus-One response headers.
+    """
+    if not app.config.get('QUERY_STATS_ENABLED', True):
+        return
+
+    add_headers = app.config.get('QUERY_STATS_HEADERS', False)
+    threshold = app.config.get('QUERY_N_PLUS_ONE_THRESHOLD', N_PLUS_ONE_THRESHOLD)
+
+    @app.before_request
+    def start_query_stats():
+        stats = QueryStats(parent=_current_stats.get())
+        g._query_stats_token = _current_stats.set(stats)
+        g._query_stats = stats
+
+    @app.after_request
+    def add_query_headers(response):
+        stats = g.get('_query_stats')
+        if stats is not None and add_headers:
+            response.headers['X-DB-Queries'] = str(stats.count)
+            response.headers['X-DB-Time-Ms'] = f'{stats.duration_ms:.1f}'
+            response.headers['X-DB-N-Plus-One'] = str(len(stats.suspected_n_plus_one(threshold)))
+        return response
+
+    @app.teardown_request
+    def finish_query_stats(error=None):
+        stats = g.pop('_query_stats', None)
+        token = g.pop('_query_stats_token', None)
+        if stats is None:
+            return
+        if token is not None:
+            _current_stats.reset(token)
+
+        rule = request.url_rule
+        route = rule.rule if rule is not None else UNMATCHED_ROUTE
+        suspects = stats.suspected_n_plus_one(threshold)
+        for shape, count in suspects:
+            print(f"Suspected N+1 on {request.method} {route}: {count}x {shape[:200]}")
+        observe_queries(route, stats.count, stats.duration_ms / 1000, len(suspects))
@@ -0,0 +1,118 @@
+import os
+import re
+import pstats
+from functools import wraps
+from flask import Blueprint, request, jsonify, send_file, Response
+from ..config import Config
+from ..profiling import (
+    TOKEN_HEADER, token_matches, start_sampling, profile_path, cprofile_text,
+    start_tracemalloc, stop_tracemalloc, tracemalloc_top
+)
+
+admin_bp = Blueprint('admin', __name__, url_prefix='/admin/profiling')
+
+_PROFILE_ID = re.compile(r'^\d+-\d+-[0-9a-f]{8}$')
+_SORT_KEYS = sorted({key.value for key in pstats.SortKey})
+
+def profiling_token_required(view):
+    """
+    Require X-Profiling-Token (not Authorization, so JWT-authenticated
+    requests can be profiled too). Answers 404 when PROFILING_TOKEN is unset.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not Config.PROFILING_TOKEN:
+            return jsonify({'error': 'Not found'}), 404
+        if not token_matches(request.headers.get(TOKEN_HEADER)):
+            return jsonify({'error': 'Unauthorized'}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+@admin_bp.route('/sample', methods=['POST'])
+@profiling_token_required
+def sample():
+    """
+    Sample all threads of the worker that receives this request for
+    `seconds` (query string), then fetch the collapsed stacks from
+    /profiles/<profile_id>. `thread` limits sampling to threads whose name
+    starts with it; `interval_ms` sets the sampling interval.
+    """
+    try:
+        seconds = float(request.args.get('seconds', 10))
+        interval_ms = float(request.args.get('interval_ms', Config.PROFILING_INTERVAL_MS))
+    except ValueError:
+        return jsonify({'error': 'seconds and interval_ms must be numbers'}), 400
+    if not 0 < seconds <= Config.PROFILING_MAX_SECONDS:
+        return jsonify({'error': f'seconds must be between 0 and {Config.PROFILING_MAX_SECONDS}'}), 400
+    if interval_ms < 1:
+        return jsonify({'error': 'interval_ms must be at least 1'}), 400
+
+    profile_id = start_sampling(seconds, interval=interval_ms / 1000, thread_prefix=request.args.get('thread'))
+    if profile_id is None:
+        return jsonify({'error': 'A sampling profile is already running in this worker', 'pid': os.getpid()}), 409
+
+    return jsonify({
+        'profile_id': profile_id,
+        'pid': os.getpid(),
+        'seconds': seconds,
+        'url': f'{admin_bp.url_prefix}/profiles/{profile_id}'
+    }), 202
+
+@admin_bp.route('/profiles/<profile_id>', methods=['GET'])
+@profiling_token_required
+def get_profile(profile_id):
+    """
+    A finished profile: collapsed stacks (text) from sampling, or a pstats
+    file from cProfile (?format=text for the top functions as text).
+    """
+    if not _PROFILE_ID.match(profile_id):
+        return jsonify({'error': 'Invalid profile id'}), 400
+
+    collapsed = profile_path(profile_id, 'collapsed')
+    if os.path.exists(collapsed):
+        return send_file(collapsed, mimetype='text/plain', as_attachment=True,
+                         download_name=f'{profile_id}.collapsed')
+
+    prof = profile_path(profile_id, 'prof')
+    if os.path.exists(prof):
+        if request.args.get('format') == 'text':
+            sort = request.args.get('sort', 'cumulative')
+            if sort not in _SORT_KEYS:
+                return jsonify({'error': f"sort must be one of {', '.join(_SORT_KEYS)}"}), 400
+            return Response(cprofile_text(profile_id, sort=sort), mimetype='text/plain')
+        return send_file(prof, mimetype='application/octet-stream', as_attachment=True,
+                         download_name=f'{profile_id}.prof')
+
+    return jsonify({'error': 'Profile not found (or still being recorded)'}), 404
+
+@admin_bp.route('/tracemalloc/start', methods=['POST'])
+@profiling_token_required
+def tracemalloc_start():
+    """Start allocation tracing in this worker; `frames` sets the traceback depth"""
+    frames = request.args.get('frames', 10, type=int)
+    start_tracemalloc(max(1, min(frames, 50)))
+    return jsonify({'message': 'tracemalloc started', 'pid': os.getpid()})
+
+@admin_bp.route('/tracemalloc', methods=['GET'])
+@profiling_token_required
+def tracemalloc_snapshot():
+    """Top allocation sites (?limit up to 200, ?group_by=lineno|filename|traceback, ?compare=1 for growth since start)"""
+    group_by = request.args.get('group_by', 'lineno')
+    if group_by not in ('lineno', 'filename', 'traceback'):
+        return jsonify({'error': 'group_by must be lineno, filename or traceback'}), 400
+
+    limit = request.args.get('limit', 25, type=int)
+    result = tracemalloc_top(
+        limit=max(1, min(limit, 200)),
+        group_by=group_by,
+        compare=request.args.get('compare') == '1'
+    )
+    if result is None:
+        return jsonify({'error': 'tracemalloc is not running in this worker', 'pid': os.getpid()}), 409
+    return jsonify(result)
+
+@admin_bp.route('/tracemalloc/stop', methods=['POST'])
+@profiling_token_required
+def tracemalloc_stop():
+    stop_tracemalloc()
+    return jsonify({'message': 'tracemalloc stopped', 'pid': os.getpid()})
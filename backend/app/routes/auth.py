@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity, create_access_token
 from ..services.auth_service import AuthService
+from ..services.password_hasher import PasswordHasherBusy
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 
@@ -39,6 +40,8 @@ def register():
         else:
             return jsonify({'error': message}), 400
             
+    except PasswordHasherBusy as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
     except Exception as e:
         return jsonify({'error': f'Registration failed: {str(e)}'}), 500
 
@@ -73,6 +76,8 @@ def login():
         else:
             return jsonify({'error': message}), 401
             
+    except PasswordHasherBusy as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
     except Exception as e:
         return jsonify({'error': f'Login failed: {str(e)}'}), 500
 
@@ -154,6 +159,8 @@ def update_profile():
         else:
             return jsonify({'error': message}), 400
             
+    except PasswordHasherBusy as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
     except Exception as e:
         return jsonify({'error': f'Profile update failed: {str(e)}'}), 500
 
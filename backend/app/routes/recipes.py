@@ -2,42 +2,82 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
 from werkzeug.utils import secure_filename
 import os
+import threading
 from datetime import datetime
 from ..services.vision_service import VisionService
+from ..services.image_preprocessing import ImagePreprocessingError
 from ..services.recipe_service import RecipeService
 from ..services.food_validation_service import FoodValidationService
+from ..services.nutrition_service import NutritionService, store_recipe_nutrition, batch_nutrition
+from ..services.ingredient_cache import get_or_create_ingredient_id
+from ..services.ingredient_parser import parse_ingredient
+from ..services.recipe_storage import store_recipe_body, delete_recipe
+from ..services.pantry_search_service import pantry_index, search_pantry
 from ..models.recipe import Recipe
 from ..models.ingredient import Ingredient
 from ..models.recipe_ingredient import RecipeIngredient
 from ..models.user import User
 from ..database import db
+from ..config import Config
+from ..cache import cache_stats
+from ..background import submit_background
+from ..warmup import warmup_status
+from ..http_cache import make_etag, not_modified, with_validators
+from sqlalchemy import func
+from sqlalchemy.orm import selectinload
 
 recipes_bp = Blueprint('recipes', __name__)
 
 # Initialize services
-recipe_service = RecipeService()
 food_validation_service = FoodValidationService()
 
-# Lazy initialization of vision service to avoid startup failures
+# Lazy recipe service: it builds the Groq client and probes Gemini models, which
+# the warm-up thread (app.warmup) does after boot instead of at import time
+_recipe_service = None
+_recipe_service_lock = threading.Lock()
+def get_recipe_service():
+    global _recipe_service
+    if _recipe_service is None:
+        with _recipe_service_lock:
+            if _recipe_service is None:
+                _recipe_service = RecipeService()
+    return _recipe_service
+
+# Lazy initialization of vision service to avoid startup failures. A failed
+# construction is remembered and reported instead of returning made-up ingredients.
 _vision_service = None
+_vision_service_error = None
+_vision_service_lock = threading.Lock()
 def get_vision_service():
-    global _vision_service
-    if _vision_service is None:
-        try:
-            _vision_service = VisionService()
-        except Exception as e:
-            print(f"Warning: Vision service not available: {e}")
-            return None
+    global _vision_service, _vision_service_error
+    if _vision_service is not None or _vision_service_error is not None:
+        return _vision_service
+    with _vision_service_lock:
+        if _vision_service is None and _vision_service_error is None:
+            try:
+                _vision_service = VisionService()
+            except Exception as e:
+                print(f"Warning: Vision service not available: {e}")
+                _vision_service_error = e
     return _vision_service
 
-# Lazy initialization of nutrition service to avoid startup failures
+# Lazy, process-wide nutrition service (its HTTP session keeps connections alive
+# across requests). A failed construction is remembered so it isn't retried per call.
+_nutrition_service = None
+_nutrition_service_error = None
+_nutrition_service_lock = threading.Lock()
 def get_nutrition_service():
-    try:
-        from ..services.nutrition_service import NutritionService
-        return NutritionService()
-    except Exception as e:
-        print(f"Warning: Nutrition service not available: {e}")
-        return None
+    global _nutrition_service, _nutrition_service_error
+    if _nutrition_service is not None or _nutrition_service_error is not None:
+        return _nutrition_service
+    with _nutrition_service_lock:
+        if _nutrition_service is None and _nutrition_service_error is None:
+            try:
+                _nutrition_service = NutritionService()
+            except Exception as e:
+                print(f"Warning: Nutrition service not available: {e}")
+                _nutrition_service_error = e
+    return _nutrition_service
 
 @recipes_bp.route('/health', methods=['GET'])
 def health_check():
@@ -53,26 +93,32 @@ def health_check():
         'message': 'API is working correctly',
         'services': {
             'vision': vision_service_available,
+            'vision_backend': Config.VISION_BACKEND,
             'recipe': True,
             'food_validation': True,
             'nutrition': nutrition_service_available
         },
+        'caches': cache_stats(),
+        'warmup': warmup_status(),
         'endpoints': [
             '/api/recipes/health',
             '/api/recipes/detect-ingredients',
+            '/api/recipes/detect-ingredients/batch',
             '/api/recipes/get-recipes',
+            '/api/recipes/pantry-search',
             '/api/recipes/validate-ingredient',
             '/api/recipes/validate-ingredients',
             '/api/recipes/autocomplete',
             '/api/recipes/search-ingredients',
-            '/api/recipes/nutrition-facts'
+            '/api/recipes/nutrition-facts',
+            '/api/recipes/nutrition-facts/batch'
         ]
     })
 
 @recipes_bp.route('/detect-ingredients', methods=['POST'])
 def detect_ingredients():
     """
-    Detect ingredients from uploaded image using Google Vision API
+    Detect ingredients from uploaded image with the configured vision backend
     """
     try:
         if 'image' not in request.files:
@@ -85,37 +131,74 @@ def detect_ingredients():
         # Get vision service (lazy initialization)
         vision_service = get_vision_service()
         if not vision_service:
-            return jsonify({
-                'ingredients': ['tomato', 'onion', 'garlic'],
-                'message': 'Vision service not available. Using fallback ingredients.'
-            }), 200
+            return jsonify({'error': 'Vision service not available'}), 503
         
         # Detect ingredients using Google Vision API
-        detected_ingredients = vision_service.detect_ingredients_from_image(image_file)
+        detection = vision_service.detect_ingredients(image_file)
+        detected_ingredients = detection['ingredients']
         
         return jsonify({
             'ingredients': detected_ingredients,
+            'unverified': detection['unverified'],
+            'cached': detection['cached'],
             'message': f'Detected {len(detected_ingredients)} ingredients'
         })
         
+    except ImagePreprocessingError as e:
+        return jsonify({'error': str(e)}), e.status_code
     except Exception as e:
         print(f"Error in detect_ingredients: {str(e)}")
+        return jsonify({'error': 'Failed to detect ingredients'}), 502
+
+@recipes_bp.route('/detect-ingredients/batch', methods=['POST'])
+def detect_ingredients_batch():
+    """
+    Detect ingredients from several uploaded images (form field 'images') with
+    one Vision batch request; returns per-image and merged ingredients
+    """
+    try:
+        image_files = [f for f in request.files.getlist('images') if f.filename]
+        if not image_files:
+            return jsonify({'error': 'No image files provided'}), 400
+        if len(image_files) > Config.VISION_BATCH_MAX_IMAGES:
+            return jsonify({'error': f'At most {Config.VISION_BATCH_MAX_IMAGES} images per request'}), 400
+        
+        vision_service = get_vision_service()
+        if not vision_service:
+            return jsonify({'error': 'Vision service not available'}), 503
+        
+        detection = vision_service.detect_ingredients_batch(image_files)
+        for image_file, image in zip(image_files, detection['images']):
+            image['filename'] = image_file.filename
+        
         return jsonify({
-            'ingredients': ['tomato', 'onion', 'garlic'],
-            'message': 'Using fallback ingredients due to API error'
+            'images': detection['images'],
+            'ingredients': detection['ingredients'],
+            'unverified': detection['unverified'],
+            'message': f"Detected {len(detection['ingredients'])} ingredients in {len(image_files)} images"
         })
+        
+    except Exception as e:
+        print(f"Error in detect_ingredients_batch: {str(e)}")
+        return jsonify({'error': 'Failed to detect ingredients'}), 500
 
-def _get_or_create_ingredient(ingredient_name):
-    """Get existing ingredient or create a new one"""
-    ingredient_name = ingredient_name.strip().lower()
-    ingredient = Ingredient.query.filter_by(name=ingredient_name).first()
+def _recipe_list_etag(user_id, favourites_only=False):
+    """
+    ETag for a user's recipe list, from one aggregate query. Lists get no
+    Last-Modified: deleting or unfavouriting a recipe doesn't move the newest
+    updated_at, so If-Modified-Since would answer 304 with a stale list.
+    """
+    query = db.session.query(
+        func.count(Recipe.id),
+        func.max(Recipe.updated_at),
+        func.max(Recipe.id)
+    ).filter(Recipe.user_id == user_id)
     
-    if not ingredient:
-        ingredient = Ingredient(name=ingredient_name)
-        db.session.add(ingredient)
-        db.session.flush()  # Flush to get the ID
+    if favourites_only:
+        query = query.filter(Recipe.is_saved.is_(True))
     
-    return ingredient
+    count, last_updated, max_id = query.one()
+    return make_etag('recipes', user_id, favourites_only, count, max_id, last_updated)
 
 def _extract_title_from_markdown(markdown_content):
     """Extract recipe title from markdown content"""
@@ -171,11 +254,15 @@ def _save_recipe_to_db(recipe_data, user_id, original_ingredients, dietary_prefe
         elif isinstance(instructions, list):
             instructions = '\n'.join(str(step) for step in instructions if step)
         
+        # Large bodies go to a shared compressed blob; identical generations reuse it
+        instructions_blob = store_recipe_body(instructions)
+        
         # Create recipe
         recipe = Recipe(
             title=title,
             description=recipe_data.get('description', ''),
-            instructions=instructions,  # Store as string (JSON field can handle it)
+            instructions='' if instructions_blob else instructions,  # Store as string (JSON field can handle it)
+            instructions_blob=instructions_blob,
             user_id=user_id,
             is_saved=False,  # Not explicitly saved, just requested
             original_ingredients=original_ingredients,
@@ -197,11 +284,12 @@ def _save_recipe_to_db(recipe_data, user_id, original_ingredients, dietary_prefe
             print(f"Warning: No ingredients in recipe data, using original ingredients: {original_ingredients}")
             recipe_ingredients_list = original_ingredients if isinstance(original_ingredients, list) else []
         
+        # Track which ingredients have already been added to avoid duplicates
+        added_ingredient_ids = set()
+        added_ingredient_names = []
+        
         # If ingredients is a list of strings, process them
         if recipe_ingredients_list:
-            # Track which ingredients have already been added to avoid duplicates
-            added_ingredient_ids = set()
-            
             for idx, ing in enumerate(recipe_ingredients_list):
                 if not ing or (isinstance(ing, str) and not ing.strip()):
                     continue
@@ -214,54 +302,42 @@ def _save_recipe_to_db(recipe_data, user_id, original_ingredients, dietary_prefe
                     if not ingredient_name:
                         continue
                     
-                    # Try to extract quantity and unit if present
-                    quantity = None
-                    unit = None
+                    # Split "2 1/2 cups tomatoes, diced" into quantity, unit, name and preparation
+                    parsed = parse_ingredient(ingredient_name)
+                    if parsed.name:
+                        ingredient_name = parsed.name
                     
-                    # Simple parsing: look for numbers at the start
-                    parts = ingredient_name.split(' ', 2)
-                    if len(parts) >= 2:
-                        try:
-                            quantity = float(parts[0])
-                            unit = parts[1]
-                            ingredient_name = parts[2] if len(parts) > 2 else parts[1]
-                        except ValueError:
-                            # First part is not a number, use full string as ingredient name
-                            pass
-                    
-                    # Get or create ingredient
-                    ingredient = _get_or_create_ingredient(ingredient_name)
+                    # Get or create ingredient (cached name -> id lookup)
+                    ingredient_id = get_or_create_ingredient_id(ingredient_name)
                     
                     # Skip if this ingredient has already been added to this recipe
-                    if ingredient.id in added_ingredient_ids:
-                        print(f"Warning: Skipping duplicate ingredient '{ingredient_name}' (id={ingredient.id}) for recipe {recipe.id}")
+                    if ingredient_id in added_ingredient_ids:
+                        print(f"Warning: Skipping duplicate ingredient '{ingredient_name}' (id={ingredient_id}) for recipe {recipe.id}")
                         continue
                     
-                    # Check if recipe_ingredient already exists in database (in case of partial save)
-                    existing = RecipeIngredient.query.filter_by(
-                        recipe_id=recipe.id,
-                        ingredient_id=ingredient.id
-                    ).first()
-                    
-                    if existing:
-                        print(f"Warning: Recipe-ingredient relationship already exists for recipe {recipe.id}, ingredient {ingredient.id}")
-                        added_ingredient_ids.add(ingredient.id)
-                        continue
+                    # The recipe was created above, so added_ingredient_ids is the only
+                    # possible source of duplicates; no per-ingredient existence query
                     
                     # Create recipe-ingredient relationship
                     recipe_ingredient = RecipeIngredient(
                         recipe_id=recipe.id,
-                        ingredient_id=ingredient.id,
-                        quantity=quantity,
-                        unit=unit,
+                        ingredient_id=ingredient_id,
+                        quantity=parsed.quantity,
+                        unit=parsed.unit,
+                        preparation=parsed.preparation[:100] if parsed.preparation else None,
+                        notes=parsed.notes[:200] if parsed.notes else None,
                         order_index=idx
                     )
                     db.session.add(recipe_ingredient)
-                    added_ingredient_ids.add(ingredient.id)
+                    added_ingredient_ids.add(ingredient_id)
+                    added_ingredient_names.append(ingredient_name)
         else:
             print(f"Warning: No ingredients to process for recipe {recipe.id}")
         
         db.session.commit()
+        
+        # Keep the pantry search index current without a rebuild
+        pantry_index.add_recipe(recipe.id, user_id, added_ingredient_names)
         return recipe
         
     except Exception as e:
@@ -325,7 +401,7 @@ def get_recipes():
             print(f"ℹ️ Using default (Groq - FREE) - use_gemini: {use_gemini}, logged_in: {user_id is not None}", flush=True)
         
         # Generate recipes
-        recipes = recipe_service.get_recipes_from_ingredients(
+        recipes = get_recipe_service().get_recipes_from_ingredients(
             ingredients, 
             dietary_preferences=dietary_preferences, 
             serving_size=serving_size,
@@ -340,35 +416,27 @@ def get_recipes():
             # Limit recipes to 10 per user - delete oldest if needed
             MAX_RECIPES_PER_USER = 10
             
+            # Count once and keep the count current below, instead of a COUNT per recipe
+            current_count = Recipe.query.filter_by(user_id=user_id).count()
+            
             for idx, recipe_data in enumerate(recipes):
                 try:
-                    # Check current recipe count BEFORE saving
-                    current_count = Recipe.query.filter_by(user_id=user_id).count()
-                    
                     # If we're at or over the limit, delete the oldest unfavourited recipe
                     # If all recipes are favourited, delete the oldest one (even if favourited)
                     if current_count >= MAX_RECIPES_PER_USER:
-                        # First, try to find the oldest unfavourited recipe
-                        oldest_unfavourited = Recipe.query.filter_by(
-                            user_id=user_id,
-                            is_saved=False  # Not favourited
-                        ).order_by(Recipe.created_at.asc()).first()
+                        # Unfavourited recipes sort first (False < True), then oldest first
+                        oldest_recipe = Recipe.query.filter_by(
+                            user_id=user_id
+                        ).order_by(Recipe.is_saved.asc(), Recipe.created_at.asc()).first()
                         
-                        if oldest_unfavourited:
-                            # Delete the oldest unfavourited recipe
-                            print(f"At recipe limit ({current_count}). Deleting oldest unfavourited recipe (id={oldest_unfavourited.id}, title={oldest_unfavourited.title})")
-                            db.session.delete(oldest_unfavourited)
-                            db.session.commit()
-                        else:
-                            # All recipes are favourited, delete the oldest one (even if favourited)
-                            oldest_recipe = Recipe.query.filter_by(
-                                user_id=user_id
-                            ).order_by(Recipe.created_at.asc()).first()
-                            
-                            if oldest_recipe:
+                        if oldest_recipe:
+                            if oldest_recipe.is_saved:
                                 print(f"At recipe limit ({current_count}). All recipes are favourited. Deleting oldest recipe (id={oldest_recipe.id}, title={oldest_recipe.title})")
-                                db.session.delete(oldest_recipe)
-                                db.session.commit()
+                            else:
+                                print(f"At recipe limit ({current_count}). Deleting oldest unfavourited recipe (id={oldest_recipe.id}, title={oldest_recipe.title})")
+                            delete_recipe(oldest_recipe)
+                            db.session.commit()
+                            current_count -= 1
                     
                     print(f"Saving recipe {idx+1}/{len(recipes)}: {recipe_data.get('title', 'Unknown')}")
                     saved_recipe = _save_recipe_to_db(
@@ -379,6 +447,7 @@ def get_recipes():
                         serving_size
                     )
                     recipe_id = saved_recipe.id
+                    current_count += 1
                     saved_recipe_ids.append(recipe_id)
                     # Add recipe ID to response immediately
                     recipe_data['id'] = recipe_id
@@ -398,6 +467,13 @@ def get_recipes():
             if not recipes:
                 print("No recipes to save")
         
+        # Precompute nutrition after the response so viewing a saved recipe needs no API call
+        if any(saved_recipe_ids):
+            nutrition_service = get_nutrition_service()
+            for recipe_id in saved_recipe_ids:
+                if recipe_id:
+                    submit_background(store_recipe_nutrition, recipe_id, nutrition_service)
+        
         # Ensure all saved recipes have IDs in the response
         for idx, recipe_data in enumerate(recipes):
             if idx < len(saved_recipe_ids) and saved_recipe_ids[idx]:
@@ -427,6 +503,44 @@ def get_recipes():
             'message': 'Using fallback recipes due to API error'
         })
 
+@recipes_bp.route('/pantry-search', methods=['POST'])
+@jwt_required()
+def pantry_search():
+    """
+    Rank the logged-in user's stored recipes by how well a pantry list covers their
+    ingredients. Lets the client offer existing recipes before spending an LLM call
+    on /get-recipes. Recipes are private, so only the caller's own are searched.
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        
+        data = request.get_json()
+        if not data or 'ingredients' not in data:
+            return jsonify({'error': 'No ingredients provided'}), 400
+        
+        ingredients = data.get('ingredients', [])
+        if not ingredients:
+            return jsonify({'error': 'Empty ingredients list'}), 400
+        
+        limit = max(1, min(int(data.get('limit', 10)), 50))
+        min_coverage = float(data.get('min_coverage', 0.0))
+        
+        search_result = search_pantry(ingredients, user_id, limit=limit, min_coverage=min_coverage)
+        
+        return jsonify({
+            'results': search_result['results'],
+            'unknown_ingredients': search_result['unknown_ingredients'],
+            'count': len(search_result['results']),
+            'indexed_recipes': len(pantry_index)
+        })
+        
+    except Exception as e:
+        print(f"Error in pantry_search: {str(e)}")
+        return jsonify({
+            'error': 'Pantry search error',
+            'message': str(e)
+        }), 500
+
 @recipes_bp.route('/validate-ingredient', methods=['POST'])
 def validate_ingredient():
     """
@@ -601,6 +715,91 @@ def get_nutrition_facts():
             'message': str(e)
         }), 500
 
+# Upper bounds for one /nutrition-facts/batch request
+MAX_BATCH_RECIPES = 100
+MAX_PLAN_ENTRIES = 500
+
+@recipes_bp.route('/nutrition-facts/batch', methods=['POST'])
+def get_batch_nutrition_facts():
+    """
+    Nutrition for many recipes in one request, with optional daily/weekly meal-plan sums.
+    
+    Body: {"recipes": [{"recipe_id": 12} or {"ingredients": [...], "serving_size": 2}, ...],
+           "plan": [{"day": "2026-10-19", "recipe": 0, "servings": 1}, ...]}
+    Stored recipes (recipe_id) require login and must belong to the user; plan
+    entries refer to recipes by their index in the list.
+    """
+    try:
+        data = request.get_json()
+        if not data or not data.get('recipes'):
+            return jsonify({'error': 'No recipes provided'}), 400
+        
+        requested = data['recipes']
+        plan_data = data.get('plan') or []
+        if len(requested) > MAX_BATCH_RECIPES or len(plan_data) > MAX_PLAN_ENTRIES:
+            return jsonify({
+                'error': f'Batch too large (max {MAX_BATCH_RECIPES} recipes, {MAX_PLAN_ENTRIES} plan entries)'
+            }), 400
+        
+        # Load every referenced stored recipe in one query
+        recipe_ids = {int(entry['recipe_id']) for entry in requested if isinstance(entry, dict) and entry.get('recipe_id')}
+        stored = {}
+        if recipe_ids:
+            verify_jwt_in_request(optional=True)
+            identity = get_jwt_identity()
+            if not identity:
+                return jsonify({'error': 'Login required for recipe_id entries'}), 401
+            stored = {
+                recipe.id: recipe
+                for recipe in Recipe.query.filter(
+                    Recipe.id.in_(recipe_ids),
+                    Recipe.user_id == int(identity)
+                ).options(selectinload(Recipe.recipe_ingredients).selectinload(RecipeIngredient.ingredient))
+            }
+        
+        recipes = []
+        for entry in requested:
+            if not isinstance(entry, dict):
+                return jsonify({'error': 'Each recipe must be an object'}), 400
+            if entry.get('recipe_id'):
+                recipe = stored.get(int(entry['recipe_id']))
+                if recipe is None:
+                    return jsonify({'error': f"Recipe {entry['recipe_id']} not found"}), 404
+                recipes.append({
+                    'recipe_id': recipe.id,
+                    'title': recipe.title,
+                    'servings': recipe.serving_size or 1,
+                    'ingredients': [
+                        (ri.ingredient.name, ri.quantity, ri.unit)
+                        for ri in recipe.recipe_ingredients if ri.ingredient
+                    ]
+                })
+            else:
+                parsed = [parse_ingredient(text) for text in entry.get('ingredients', []) if text and text.strip()]
+                recipes.append({
+                    'servings': entry.get('serving_size', 1) or 1,
+                    'ingredients': [(p.name, p.quantity, p.unit) for p in parsed]
+                })
+        
+        plan = []
+        for item in plan_data:
+            index = int(item.get('recipe', -1))
+            if not 0 <= index < len(recipes) or 'day' not in item:
+                return jsonify({'error': 'Plan entries need a day and a valid recipe index'}), 400
+            plan.append((item['day'], index, float(item.get('servings', 1))))
+        
+        result = batch_nutrition(recipes, plan=plan, nutrition_service=get_nutrition_service())
+        return jsonify(result)
+        
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': f'Invalid batch request: {str(e)}'}), 400
+    except Exception as e:
+        print(f"Error in get_batch_nutrition_facts: {str(e)}")
+        return jsonify({
+            'error': 'Nutrition service error',
+            'message': str(e)
+        }), 500
+
 @recipes_bp.route('/my-recipes', methods=['GET'])
 @jwt_required()
 def get_my_recipes():
@@ -618,9 +817,18 @@ def get_my_recipes():
         
         print(f"Fetching all recipes for user_id={user_id}")
         
+        # Answer revalidation requests without loading or serializing recipes
+        etag = _recipe_list_etag(user_id)
+        cached_response = not_modified(etag)
+        if cached_response:
+            return cached_response
+        
         # Get all recipes for the user (both saved and requested)
         recipes = Recipe.query.filter_by(
             user_id=user_id
+        ).options(
+            selectinload(Recipe.instructions_blob),
+            selectinload(Recipe.recipe_ingredients)
         ).order_by(Recipe.created_at.desc()).all()
         
         # Log recipe details
@@ -628,10 +836,11 @@ def get_my_recipes():
         requested_count = len(recipes) - saved_count
         print(f"Found {len(recipes)} total recipes: {saved_count} saved, {requested_count} requested")
         
-        return jsonify({
+        response = jsonify({
             'recipes': [recipe.to_dict() for recipe in recipes],
             'count': len(recipes)
-        }), 200
+        })
+        return with_validators(response, etag), 200
         
     except Exception as e:
         import traceback
@@ -716,16 +925,26 @@ def get_favourite_recipes():
         # Convert to int if needed
         user_id = int(user_id) if user_id else None
         
+        # Answer revalidation requests without loading or serializing recipes
+        etag = _recipe_list_etag(user_id, favourites_only=True)
+        cached_response = not_modified(etag)
+        if cached_response:
+            return cached_response
+        
         # Get favourite recipes for the user
         recipes = Recipe.query.filter_by(
             user_id=user_id,
             is_saved=True
+        ).options(
+            selectinload(Recipe.instructions_blob),
+            selectinload(Recipe.recipe_ingredients)
         ).order_by(Recipe.created_at.desc()).all()
         
-        return jsonify({
+        response = jsonify({
             'recipes': [recipe.to_dict() for recipe in recipes],
             'count': len(recipes)
-        }), 200
+        })
+        return with_validators(response, etag), 200
         
     except Exception as e:
         return jsonify({'error': f'Failed to retrieve favourite recipes: {str(e)}'}), 500
@@ -752,9 +971,22 @@ def get_saved_recipe(recipe_id):
         if not recipe:
             return jsonify({'error': 'Recipe not found'}), 404
         
-        return jsonify({
-            'recipe': recipe.to_dict()
-        }), 200
+        # Check validators before to_dict() lazy-loads the ingredients
+        etag = make_etag('recipe', recipe.id, recipe.updated_at)
+        cached_response = not_modified(etag, recipe.updated_at)
+        if cached_response:
+            return cached_response
+        
+        recipe_dict = recipe.to_dict(include_nutrition=True)
+        if recipe_dict['nutrition'] is None:
+            # Not precomputed yet (or the last attempt failed): compute from local data only, store it later
+            recipe_dict['nutrition'] = NutritionService.get_recipe_nutrition(recipe)
+            submit_background(store_recipe_nutrition, recipe.id, get_nutrition_service())
+        
+        response = jsonify({
+            'recipe': recipe_dict
+        })
+        return with_validators(response, etag, recipe.updated_at), 200
         
     except Exception as e:
         return jsonify({'error': f'Failed to retrieve recipe: {str(e)}'}), 500
@@ -780,7 +1012,7 @@ def delete_saved_recipe(recipe_id):
         if not recipe:
             return jsonify({'error': 'Recipe not found'}), 404
         
-        db.session.delete(recipe)
+        delete_recipe(recipe)
         db.session.commit()
         
         return jsonify({
@@ -2,8 +2,13 @@ import re
 from datetime import datetime, timedelta
 from flask import current_app
 from flask_jwt_extended import create_access_token, create_refresh_token
+from sqlalchemy import func, literal, select, union_all
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
 from ..database import db
 from ..models.user import User
+from .user_cache import load_user
+from .password_hasher import PasswordHasherBusy
 
 class AuthService:
     """Service class for handling user authentication operations"""
@@ -45,6 +50,39 @@ class AuthService:
         
         return True, "Username is valid"
     
+    @staticmethod
+    def normalize_email(email):
+        """Emails are stored and compared lowercased"""
+        return email.strip().lower()
+    
+    @staticmethod
+    def _duplicate_message(error):
+        """User-facing message for a unique violation on users (index/column name is in the DB error)"""
+        detail = str(getattr(error, 'orig', error)).lower()
+        if 'email' in detail:
+            return "Email already registered"
+        if 'username' in detail:
+            return "Username already taken"
+        return "Email or username already registered"
+    
+    @staticmethod
+    def find_login_user(email_or_username):
+        """
+        Find a user by email or username, case-insensitively, in one statement.
+        
+        A UNION ALL of two lookups lets each branch use its own lower() index
+        (an OR across both columns often can't); an email match wins.
+        """
+        lookup = email_or_username.strip().lower()
+        matches = union_all(
+            select(User, literal(0).label('priority')).where(func.lower(User.email) == lookup),
+            select(User, literal(1).label('priority')).where(func.lower(User.username) == lookup)
+        ).subquery()
+        matched_user = aliased(User, matches)
+        return db.session.execute(
+            select(matched_user).order_by(matches.c.priority).limit(1)
+        ).scalars().first()
+    
     @staticmethod
     def register_user(email, username, password):
         """Register a new user"""
@@ -61,25 +99,30 @@ class AuthService:
             if not is_valid:
                 return False, message, None
             
-            # Check if user already exists
-            if User.query.filter_by(email=email).first():
-                return False, "Email already registered", None
-            
-            if User.query.filter_by(username=username).first():
-                return False, "Username already taken", None
-            
-            # Create new user
+            # Create new user; the unique lower(email)/lower(username) indexes
+            # reject duplicates, so there is no separate existence check
             user = User(
-                email=email,
+                email=AuthService.normalize_email(email),
                 username=username
             )
             user.set_password(password)
             
             db.session.add(user)
-            db.session.commit()
+            try:
+                db.session.flush()
+                # Detached before commit so the commit doesn't expire it: building
+                # the tokens and response then needs no SELECT to reload the row
+                db.session.expunge(user)
+                db.session.commit()
+            except IntegrityError as e:
+                db.session.rollback()
+                return False, AuthService._duplicate_message(e), None
             
             return True, "User registered successfully", user
             
+        except PasswordHasherBusy:
+            db.session.rollback()
+            raise
         except Exception as e:
             db.session.rollback()
             return False, f"Registration failed: {str(e)}", None
@@ -88,10 +131,7 @@ class AuthService:
     def authenticate_user(email_or_username, password):
         """Authenticate user with email/username and password"""
         try:
-            # Find user by email or username
-            user = User.query.filter(
-                (User.email == email_or_username) | (User.username == email_or_username)
-            ).first()
+            user = AuthService.find_login_user(email_or_username)
             
             if not user:
                 return False, "Invalid credentials", None
@@ -99,8 +139,21 @@ class AuthService:
             if not user.check_password(password):
                 return False, "Invalid credentials", None
             
+            # Upgrade hashes made with an older bcrypt cost while we have the password
+            if user.password_needs_rehash():
+                try:
+                    user.set_password(password)
+                    db.session.commit()
+                except PasswordHasherBusy:
+                    db.session.rollback()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Password rehash failed for user {user.id}: {str(e)}")
+            
             return True, "Authentication successful", user
             
+        except PasswordHasherBusy:
+            raise
         except Exception as e:
             return False, f"Authentication failed: {str(e)}", None
     
@@ -128,9 +181,9 @@ class AuthService:
     
     @staticmethod
     def get_user_by_id(user_id):
-        """Get user by ID"""
+        """Get user by ID (served from the user cache when fresh)"""
         try:
-            user = User.query.get(user_id)
+            user = load_user(user_id)
             if not user:
                 return False, "User not found", None
             
@@ -141,9 +194,9 @@ class AuthService:
     
     @staticmethod
     def update_user_profile(user_id, **kwargs):
-        """Update user profile information"""
+        """Update user profile information (the user cache is invalidated on commit)"""
         try:
-            user = User.query.get(user_id)
+            user = load_user(user_id)
             if not user:
                 return False, "User not found", None
             
@@ -152,20 +205,20 @@ class AuthService:
             
             for field, value in kwargs.items():
                 if field in allowed_fields and hasattr(user, field):
-                    # Check for username/email uniqueness
-                    if field == 'username' and value != user.username:
-                        if User.query.filter_by(username=value).first():
-                            return False, "Username already taken", None
-                    elif field == 'email' and value != user.email:
+                    if field == 'email':
                         if not AuthService.validate_email(value):
                             return False, "Invalid email format", None
-                        if User.query.filter_by(email=value).first():
-                            return False, "Email already registered", None
+                        value = AuthService.normalize_email(value)
                     
                     setattr(user, field, value)
             
             user.updated_at = datetime.utcnow()
-            db.session.commit()
+            # Username/email uniqueness is enforced by the unique indexes
+            try:
+                db.session.commit()
+            except IntegrityError as e:
+                db.session.rollback()
+                return False, AuthService._duplicate_message(e), None
             
             return True, "Profile updated successfully", user
             
@@ -177,7 +230,8 @@ class AuthService:
     def change_password(user_id, current_password, new_password):
         """Change user password"""
         try:
-            user = User.query.get(user_id)
+            # Always verify against the stored hash, not a cached copy
+            user = db.session.get(User, user_id, populate_existing=True)
             if not user:
                 return False, "User not found", None
             
@@ -197,6 +251,9 @@ class AuthService:
             
             return True, "Password changed successfully", user
             
+        except PasswordHasherBusy:
+            db.session.rollback()
+            raise
         except Exception as e:
             db.session.rollback()
             return False, f"Password change failed: {str(e)}", None
@@ -2,12 +2,24 @@ import openfoodfacts
 from fuzzywuzzy import fuzz, process
 from typing import List, Dict, Tuple, Optional
 import re
+from ..config import Config
+from ..http_client import build_session
+from ..tracing import outbound_span
 
 class FoodValidationService:
-    def __init__(self):
+    def __init__(self, session=None):
         # Initialize Open Food Facts API with a user agent
         self.api = openfoodfacts.API(user_agent="AI-Cooking-App/1.0")
         
+        # Searches go through our own session so each call can take its own
+        # timeout (the client's is fixed); no retries, callers run on a deadline
+        self.session = session or build_session(
+            pool_size=Config.VISION_VALIDATION_WORKERS,
+            retries=0,
+            headers={'User-Agent': self.api.api_config.user_agent}
+        )
+        self.timeout = self.api.api_config.timeout
+        
         # Common food categories and ingredients for validation
         self.food_categories = {
             'vegetables': [
@@ -127,14 +139,17 @@ class FoodValidationService:
         self.all_food_items = []
         for category_items in self.food_categories.values():
             self.all_food_items.extend(category_items)
+        self.food_item_set = set(self.all_food_items)
 
-    def validate_ingredient(self, ingredient: str, prioritize_api: bool = False) -> Dict:
+    def validate_ingredient(self, ingredient: str, prioritize_api: bool = False,
+                            timeout: Optional[float] = None) -> Dict:
         """
         Validate if an ingredient is actually a food item and suggest corrections
         
         Args:
             ingredient: The ingredient to validate
             prioritize_api: If True, prioritize Open Food Facts API over local database
+            timeout: Seconds allowed for the Open Food Facts call (default: the client's)
         """
         ingredient = ingredient.lower().strip()
         
@@ -163,7 +178,7 @@ class FoodValidationService:
         if prioritize_api:
             # Prioritize Open Food Facts API over local database
             # Try Open Food Facts API search first
-            of_result = self._search_openfoodfacts(ingredient)
+            of_result = self._search_openfoodfacts(ingredient, timeout=timeout)
             if of_result['is_valid']:
                 return of_result
             
@@ -201,7 +216,7 @@ class FoodValidationService:
                 return fuzzy_result
             
             # Try Open Food Facts API search (with stricter validation)
-            of_result = self._search_openfoodfacts(ingredient)
+            of_result = self._search_openfoodfacts(ingredient, timeout=timeout)
             if of_result['is_valid']:
                 return of_result
         
@@ -228,13 +243,59 @@ class FoodValidationService:
             results.append(result)
         return results
 
+    def resolve_locally(self, ingredient: str) -> Optional[Dict]:
+        """
+        Validate an ingredient without any API call: common typos and plurals,
+        then exact catalog matches. Returns None if it needs the API.
+        """
+        ingredient = ingredient.lower().strip()
+        
+        is_typo, correction = self.is_common_typo(ingredient)
+        if is_typo:
+            return {
+                'is_valid': True,
+                'original': ingredient,
+                'corrected': correction,
+                'confidence': 0.95,
+                'suggestions': [],
+                'source': 'typo_correction'
+            }
+        
+        if self._is_exact_food_match(ingredient):
+            return {
+                'is_valid': True,
+                'original': ingredient,
+                'corrected': ingredient,
+                'confidence': 1.0,
+                'suggestions': [],
+                'source': 'local_database'
+            }
+        
+        return None
+
     def _is_exact_food_match(self, ingredient: str) -> bool:
         """
         Check if ingredient exactly matches any known food item
         """
-        return ingredient in self.all_food_items
+        return ingredient in self.food_item_set
 
-    def _search_openfoodfacts(self, ingredient: str) -> Dict:
+    def _text_search(self, query: str, page_size: int, timeout: Optional[float] = None) -> Dict:
+        """
+        Open Food Facts product search, traced as an outbound call. `timeout`
+        bounds the connect and each read (default: the client's timeout).
+        """
+        with outbound_span('openfoodfacts', 'product.text_search', request_bytes=len(query.encode('utf-8'))) as span:
+            response = self.session.get(
+                f"{self.api.product.base_url}/cgi/search.pl",
+                params={'search_terms': query, 'page': 1, 'page_size': page_size, 'json': '1'},
+                timeout=timeout or self.timeout
+            )
+            response.raise_for_status()
+            search_results = response.json()
+            span.set(items=len((search_results or {}).get('products') or []))
+            return search_results
+    
+    def _search_openfoodfacts(self, ingredient: str, timeout: Optional[float] = None) -> Dict:
         """
         Search Open Food Facts API for the ingredient with stricter validation
         """
@@ -250,7 +311,7 @@ class FoodValidationService:
                 }
             
             # Search for products containing this ingredient
-            search_results = self.api.product.text_search(ingredient, page_size=10)
+            search_results = self._text_search(ingredient, page_size=10, timeout=timeout)
             
             if search_results and 'products' in search_results:
                 products = search_results['products']
@@ -468,7 +529,7 @@ class FoodValidationService:
             
             # Otherwise, search Open Food Facts for more suggestions
             try:
-                search_results = self.api.product.text_search(query, page_size=20)
+                search_results = self._text_search(query, page_size=20)
                 
                 if search_results and 'products' in search_results:
                     products = search_results['products']
@@ -566,7 +627,7 @@ class FoodValidationService:
             
             # Search Open Food Facts for additional results
             try:
-                search_results = self.api.product.text_search(query, page_size=30)
+                search_results = self._text_search(query, page_size=30)
                 
                 if search_results and 'products' in search_results:
                     products = search_results['products']
@@ -0,0 +1,115 @@
+from ..cache import LRUCache
+from ..config import Config
+
+def hamming_distance(a, b):
+    """Number of differing bits between two integer hashes"""
+    return bin(a ^ b).count('1')
+
+class BKTree:
+    """
+    Burkhard-Keller tree over integer hashes under Hamming distance.
+
+    Each child edge is labelled with its distance to the parent, so a search
+    only descends into edges within `max_distance` of the query's distance to
+    the node (triangle inequality) instead of comparing against every hash.
+    """
+
+    def __init__(self):
+        self._root = None  # [hash, {distance: child node}]
+        self.size = 0
+
+    def add(self, value):
+        if self._root is None:
+            self._root = [value, {}]
+            self.size = 1
+            return
+        node = self._root
+        while True:
+            distance = hamming_distance(value, node[0])
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = [value, {}]
+                self.size += 1
+                return
+            node = child
+
+    def search(self, value, max_distance):
+        """All (distance, hash) pairs within max_distance of value"""
+        if self._root is None:
+            return []
+        results = []
+        stack = [self._root]
+        while stack:
+            node_value, children = stack.pop()
+            distance = hamming_distance(value, node_value)
+            if distance <= max_distance:
+                results.append((distance, node_value))
+            for edge, child in children.items():
+                if distance - max_distance <= edge <= distance + max_distance:
+                    stack.append(child)
+        return results
+
+class ImageHashCache(LRUCache):
+    """
+    Bounded cache of detected ingredients keyed by perceptual image hash.
+
+    Exact hashes hit the LRU directly; near-duplicates (re-encoded, slightly
+    cropped or re-taken photos) are found through a BK-tree within
+    IMAGE_HASH_MAX_DISTANCE bits. Evicted hashes stay in the tree until it is
+    rebuilt, and are skipped on lookup.
+    """
+
+    def __init__(self, name, maxsize, max_distance):
+        super().__init__(name, maxsize)
+        self.max_distance = max_distance
+        self.near_hits = 0
+        self._tree = BKTree()
+
+    def lookup(self, image_hash):
+        """Ingredients cached for this image or its nearest near-duplicate, else None"""
+        value = self.get(image_hash)
+        if value is not None or self.max_distance <= 0:
+            return value
+
+        with self._lock:
+            candidates = sorted(self._tree.search(image_hash, self.max_distance))
+            for distance, candidate in candidates:
+                value = self._data.get(candidate)
+                if value is not None:
+                    self._data.move_to_end(candidate)
+                    # get() counted a miss for the exact key; this lookup was a hit
+                    self.misses -= 1
+                    self.hits += 1
+                    self.near_hits += 1
+                    return value
+        return None
+
+    def put(self, image_hash, value):
+        super().put(image_hash, value)
+        with self._lock:
+            self._tree.add(image_hash)
+            # Drop evicted hashes once they make up half the tree
+            if self._tree.size > 2 * max(len(self._data), 1):
+                self._tree = BKTree()
+                for key in self._data:
+                    self._tree.add(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._tree = BKTree()
+
+    def stats(self):
+        stats = super().stats()
+        stats['near_hits'] = self.near_hits
+        stats['max_distance'] = self.max_distance
+        return stats
+
+# Process-wide detection cache (image dHash -> validated ingredient list)
+image_hash_cache = ImageHashCache(
+    'image_ingredients',
+    maxsize=Config.IMAGE_HASH_CACHE_SIZE,
+    max_distance=Config.IMAGE_HASH_MAX_DISTANCE
+)
@@ -0,0 +1,185 @@
+import io
+import os
+import mmap
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from ..config import Config
+
+# Optional OpenCV support; without it uploads are size-checked and sent unchanged
+try:
+    import cv2
+    import numpy as np
+    OPENCV_AVAILABLE = True
+except ImportError:
+    OPENCV_AVAILABLE = False
+
+PreparedImage = namedtuple('PreparedImage', ['content', 'mime_type', 'width', 'height', 'stats', 'dhash'])
+
+class ImagePreprocessingError(ValueError):
+    """An upload that can't be sent to label detection; status_code is the HTTP status to return"""
+    status_code = 400
+
+class ImageTooLargeError(ImagePreprocessingError):
+    status_code = 413
+
+@contextmanager
+def upload_buffer(image_file, max_bytes=None):
+    """
+    Yield the uploaded file's bytes as a read-only buffer without copying them.
+
+    Werkzeug keeps small uploads in a BytesIO (its buffer is used directly)
+    and spools larger ones to a temporary file (memory-mapped here), so the
+    upload is never read into a second in-memory copy. Rejects uploads over
+    `max_bytes` before touching their contents.
+    """
+    max_bytes = max_bytes or Config.MAX_IMAGE_UPLOAD_BYTES
+    stream = getattr(image_file, 'stream', image_file)
+
+    mapped = None
+    if hasattr(stream, 'getbuffer'):
+        buffer = stream.getbuffer()
+    else:
+        try:
+            fileno = stream.fileno()
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            fileno = None
+        if fileno is None:
+            # Not a real file (e.g. a raw request stream): read it with the limit enforced
+            data = stream.read(max_bytes + 1)
+            buffer = memoryview(data)
+        else:
+            stream.flush()
+            size = os.fstat(fileno).st_size
+            if size > max_bytes:
+                raise ImageTooLargeError(f'Image is larger than {max_bytes // (1024 * 1024)} MB')
+            if size == 0:
+                raise ImagePreprocessingError('Uploaded image is empty')
+            mapped = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+            buffer = memoryview(mapped)
+
+    try:
+        if len(buffer) > max_bytes:
+            raise ImageTooLargeError(f'Image is larger than {max_bytes // (1024 * 1024)} MB')
+        if len(buffer) == 0:
+            raise ImagePreprocessingError('Uploaded image is empty')
+        yield buffer
+    finally:
+        buffer.release()
+        if mapped is not None:
+            mapped.close()
+
+def _jpeg_dimensions(data):
+    """(width, height) from a JPEG's SOF header without decoding it, or None"""
+    if data[:2] != b'\xff\xd8':
+        return None
+    i, end = 2, len(data)
+    while i + 9 < end:
+        if data[i] != 0xFF:
+            i += 1
+            continue
+        marker = data[i + 1]
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7 or marker == 0xFF:
+            i += 1 if marker == 0xFF else 2
+            continue
+        length = (data[i + 2] << 8) | data[i + 3]
+        # SOF0-SOF15, excluding DHT (C4), JPG (C8) and DAC (CC)
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height = (data[i + 5] << 8) | data[i + 6]
+            width = (data[i + 7] << 8) | data[i + 8]
+            return width, height
+        i += 2 + length
+    return None
+
+def _png_dimensions(data):
+    """(width, height) from a PNG's IHDR chunk, or None"""
+    if data[:8] != b'\x89PNG\r\n\x1a\n' or len(data) < 24:
+        return None
+    return int.from_bytes(data[16:20], 'big'), int.from_bytes(data[20:24], 'big')
+
+def _reduced_read_flag(data, max_side):
+    """
+    Pick an IMREAD_REDUCED_* flag so JPEGs decode at 1/2, 1/4 or 1/8 scale
+    directly in the DCT (much faster, far less memory), never below max_side.
+    """
+    dimensions = _jpeg_dimensions(data)
+    if not dimensions:
+        return cv2.IMREAD_COLOR
+    longest = max(dimensions)
+    for factor, flag in ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4),
+                         (2, cv2.IMREAD_REDUCED_COLOR_2)):
+        if longest // factor >= max_side:
+            return flag
+    return cv2.IMREAD_COLOR
+
+def _encode(pixels):
+    if Config.VISION_IMAGE_FORMAT == 'webp':
+        ok, encoded = cv2.imencode('.webp', pixels, [cv2.IMWRITE_WEBP_QUALITY, Config.VISION_IMAGE_QUALITY])
+        mime_type = 'image/webp'
+    else:
+        ok, encoded = cv2.imencode('.jpg', pixels, [
+            cv2.IMWRITE_JPEG_QUALITY, Config.VISION_IMAGE_QUALITY,
+            cv2.IMWRITE_JPEG_OPTIMIZE, 1
+        ])
+        mime_type = 'image/jpeg'
+    if not ok:
+        raise ImagePreprocessingError('Could not re-encode image')
+    return encoded.tobytes(), mime_type
+
+def dhash(pixels, hash_size=8):
+    """
+    64-bit difference hash of an image: shrink to (hash_size+1) x hash_size
+    grayscale and record whether each pixel is brighter than its right
+    neighbour. Re-encoding, rescaling and small edits flip only a few bits.
+    """
+    gray = cv2.cvtColor(pixels, cv2.COLOR_BGR2GRAY) if pixels.ndim == 3 else pixels
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+def prepare_image_bytes(data, max_side=None):
+    """
+    Decode image bytes, downscale to at most `max_side` pixels on the longest
+    side and re-encode them. Re-encoding drops all metadata (EXIF, GPS); the
+    EXIF orientation is applied to the pixels first.
+    """
+    max_side = max_side or Config.VISION_MAX_IMAGE_SIDE
+    start = time.perf_counter()
+
+    if not OPENCV_AVAILABLE:
+        return PreparedImage(bytes(data), None, None, None, {
+            'input_bytes': len(data), 'output_bytes': len(data), 'resized': False, 'elapsed_ms': 0.0
+        }, None)
+
+    # Reject decompression bombs before allocating the pixels
+    dimensions = _jpeg_dimensions(data) or _png_dimensions(data)
+    if dimensions and dimensions[0] * dimensions[1] > Config.MAX_IMAGE_PIXELS:
+        raise ImageTooLargeError('Image dimensions are too large')
+
+    pixels = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), _reduced_read_flag(data, max_side))
+    if pixels is None:
+        raise ImagePreprocessingError('Unsupported or corrupt image')
+
+    height, width = pixels.shape[:2]
+
+    resized = max(width, height) > max_side
+    if resized:
+        scale = max_side / float(max(width, height))
+        width, height = max(1, round(width * scale)), max(1, round(height * scale))
+        pixels = cv2.resize(pixels, (width, height), interpolation=cv2.INTER_AREA)
+
+    content, mime_type = _encode(pixels)
+    return PreparedImage(content, mime_type, width, height, {
+        'input_bytes': len(data),
+        'output_bytes': len(content),
+        'resized': resized,
+        'elapsed_ms': round((time.perf_counter() - start) * 1000, 2)
+    }, dhash(pixels))
+
+def prepare_image(image_file, max_side=None):
+    """
+    Prepare an uploaded image for label detection with prepare_image_bytes(),
+    decoding straight from the upload's buffer (enforcing MAX_IMAGE_UPLOAD_BYTES)
+    """
+    with upload_buffer(image_file) as buffer:
+        return prepare_image_bytes(buffer, max_side)
@@ -0,0 +1,68 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from ..cache import LRUCache
+from ..config import Config
+from ..database import db
+from ..models.ingredient import Ingredient
+from .ingredient_parser import portion_classifier
+
+# Session.info key holding ingredients inserted by the current transaction
+_PENDING_KEY = 'pending_ingredient_ids'
+
+# Process-local name -> id cache; only ever holds ids of committed rows
+ingredient_id_cache = LRUCache('ingredient_ids', maxsize=Config.INGREDIENT_CACHE_SIZE)
+
+def normalize_ingredient_name(name):
+    """Normalize an ingredient name the same way it is stored in the ingredients table"""
+    return name.strip().lower()
+
+def _pending_ids(session):
+    return session.info.setdefault(_PENDING_KEY, {})
+
+def lookup_ingredient_id(ingredient_name):
+    """Return the id of an existing ingredient, or None if it is not in the database"""
+    ingredient_name = normalize_ingredient_name(ingredient_name)
+
+    ingredient_id = ingredient_id_cache.get(ingredient_name)
+    if ingredient_id is not None:
+        return ingredient_id
+
+    # Inserted earlier in this transaction but not committed yet
+    ingredient_id = _pending_ids(db.session()).get(ingredient_name)
+    if ingredient_id is not None:
+        return ingredient_id
+
+    row = db.session.query(Ingredient.id).filter_by(name=ingredient_name).first()
+    if row is None:
+        return None
+
+    ingredient_id_cache.put(ingredient_name, row[0])
+    return row[0]
+
+def get_or_create_ingredient_id(ingredient_name):
+    """Get the id of an existing ingredient or create a new one"""
+    ingredient_name = normalize_ingredient_name(ingredient_name)
+
+    ingredient_id = lookup_ingredient_id(ingredient_name)
+    if ingredient_id is not None:
+        return ingredient_id
+
+    ingredient = Ingredient(name=ingredient_name, category=portion_classifier.classify(ingredient_name))
+    db.session.add(ingredient)
+    db.session.flush()  # Flush to get the ID
+
+    # Only publish the id to the shared cache once the insert is committed
+    _pending_ids(db.session())[ingredient_name] = ingredient.id
+    return ingredient.id
+
+@event.listens_for(Session, 'after_commit')
+def _publish_pending_ingredients(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        for ingredient_name, ingredient_id in pending.items():
+            ingredient_id_cache.put(ingredient_name, ingredient_id)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending_ingredients(session):
+    # Rolled-back inserts never existed; make sure their ids are never cached
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,320 @@
+import re
+from collections import namedtuple
+
+ParsedIngredient = namedtuple('ParsedIngredient', ['quantity', 'unit', 'name', 'preparation', 'notes'])
+
+# Mass units and their size in grams
+MASS_UNITS_G = {
+    'mg': 0.001,
+    'g': 1.0,
+    'kg': 1000.0,
+    'oz': 28.3495,
+    'lb': 453.592,
+}
+
+# Spelling variants -> canonical unit
+UNIT_ALIASES = {
+    'mg': 'mg', 'milligram': 'mg', 'milligrams': 'mg',
+    'g': 'g', 'gr': 'g', 'gram': 'g', 'grams': 'g',
+    'kg': 'kg', 'kilo': 'kg', 'kilos': 'kg', 'kilogram': 'kg', 'kilograms': 'kg',
+    'oz': 'oz', 'ounce': 'oz', 'ounces': 'oz',
+    'lb': 'lb', 'lbs': 'lb', 'pound': 'lb', 'pounds': 'lb',
+    'ml': 'ml', 'milliliter': 'ml', 'milliliters': 'ml', 'millilitre': 'ml', 'millilitres': 'ml',
+    'l': 'l', 'liter': 'l', 'liters': 'l', 'litre': 'l', 'litres': 'l',
+    'fl oz': 'fl oz', 'fluid ounce': 'fl oz', 'fluid ounces': 'fl oz',
+    'cup': 'cup', 'cups': 'cup', 'c': 'cup',
+    'tbsp': 'tbsp', 'tbs': 'tbsp', 'tablespoon': 'tbsp', 'tablespoons': 'tbsp',
+    'tsp': 'tsp', 'teaspoon': 'tsp', 'teaspoons': 'tsp',
+    'pinch': 'pinch', 'pinches': 'pinch',
+    'dash': 'dash', 'dashes': 'dash',
+    'clove': 'clove', 'cloves': 'clove',
+    'piece': 'piece', 'pieces': 'piece', 'pc': 'piece', 'pcs': 'piece',
+    'slice': 'slice', 'slices': 'slice',
+    'can': 'can', 'cans': 'can', 'tin': 'can', 'tins': 'can',
+    'stick': 'stick', 'sticks': 'stick',
+    'handful': 'handful', 'handfuls': 'handful',
+    'bunch': 'bunch', 'bunches': 'bunch',
+    'sprig': 'sprig', 'sprigs': 'sprig',
+}
+
+# Words describing how an ingredient is prepared rather than what it is
+PREPARATION_WORDS = {
+    'chopped', 'diced', 'minced', 'sliced', 'grated', 'shredded', 'crushed', 'peeled',
+    'cubed', 'julienned', 'mashed', 'melted', 'softened', 'beaten', 'cooked', 'boiled',
+    'finely', 'roughly', 'thinly', 'freshly', 'fresh', 'ground', 'halved', 'quartered',
+    'trimmed', 'rinsed', 'drained', 'toasted', 'roasted',
+}
+
+# Spelled-out quantities ("a"/"an" count as one: "an onion", "a pinch of salt")
+NUMBER_WORDS = {
+    'a': 1.0, 'an': 1.0, 'one': 1.0, 'two': 2.0, 'three': 3.0, 'four': 4.0, 'five': 5.0,
+    'six': 6.0, 'seven': 7.0, 'eight': 8.0, 'nine': 9.0, 'ten': 10.0, 'eleven': 11.0,
+    'twelve': 12.0, 'dozen': 12.0, 'half': 0.5,
+}
+
+# Words after "a"/"an" that make it a vague amount rather than one of something ("a little oil")
+VAGUE_AMOUNT_WORDS = {'little', 'few', 'bit', 'touch', 'splash', 'drizzle', 'sprinkle', 'squeeze', 'couple'}
+
+UNICODE_FRACTIONS = {
+    '½': 0.5, '⅓': 1 / 3, '⅔': 2 / 3, '¼': 0.25, '¾': 0.75,
+    '⅛': 0.125, '⅜': 0.375, '⅝': 0.625, '⅞': 0.875,
+}
+
+_FRACTION_CHARS = ''.join(UNICODE_FRACTIONS)
+_NUMBER = rf'(?:\d+\s+\d+/\d+|\d+/\d+|\d+(?:\.\d+)?\s*[{_FRACTION_CHARS}]?|[{_FRACTION_CHARS}])'
+_UNITS = '|'.join(re.escape(unit) for unit in sorted(UNIT_ALIASES, key=len, reverse=True))
+
+_QUANTITY_RE = re.compile(
+    rf'^(?P<quantity>{_NUMBER})(?:\s*(?:-|–|to)\s*(?P<upper>{_NUMBER}))?\s*'
+    rf'(?:(?P<unit>{_UNITS})\.?)?(?![a-z])\s*(?:of\s+)?',
+    re.IGNORECASE
+)
+_UNIT_RE = re.compile(rf'^(?P<unit>{_UNITS})\.?(?![a-z])\s*(?:of\s+)?', re.IGNORECASE)
+# An amount stated after the name ("chicken breast 200g"); needs a unit, since a
+# bare number there is usually part of the name ("7up") or a note
+_INLINE_AMOUNT_RE = re.compile(
+    rf'(?<![\w.])(?P<quantity>{_NUMBER})\s*(?P<unit>{_UNITS})\.?(?![a-z])',
+    re.IGNORECASE
+)
+_PARENTHETICAL_RE = re.compile(r'\(([^)]*)\)')
+_BULLET_RE = re.compile(r'^\s*(?:[-*•]|\d+\.)\s+')
+
+def normalize_name(name):
+    """Lowercase and collapse whitespace in an ingredient name"""
+    return ' '.join(name.lower().split())
+
+def singularize(name):
+    """Naive singular form of the last word ("tomatoes" -> "tomato")"""
+    if name.endswith('oes') or name.endswith('ches') or name.endswith('shes'):
+        return name[:-2]
+    if name.endswith('ies') and len(name) > 4:
+        return name[:-3] + 'y'
+    if name.endswith('s') and not name.endswith(('ss', 'us')) and len(name) > 3:
+        return name[:-1]
+    return name
+
+def name_candidates(name):
+    """Names to try when looking an ingredient up (as given, then singular)"""
+    singular = singularize(name)
+    return [name] if singular == name else [name, singular]
+
+def _parse_number(text):
+    text = text.strip()
+    if ' ' in text and '/' in text:
+        whole, fraction = text.split(None, 1)
+        return float(whole) + _parse_number(fraction)
+    if '/' in text:
+        numerator, denominator = text.split('/', 1)
+        return float(numerator) / float(denominator) if float(denominator) else None
+    if text[-1] in UNICODE_FRACTIONS:
+        whole = text[:-1].strip()
+        return (float(whole) if whole else 0.0) + UNICODE_FRACTIONS[text[-1]]
+    return float(text)
+
+def _leading_amount(text):
+    """(quantity, unit, rest of text) for an amount at the start of `text`"""
+    match = _QUANTITY_RE.match(text)
+    if match:
+        quantity = _parse_number(match.group('quantity'))
+        if match.group('upper') and quantity is not None:
+            upper = _parse_number(match.group('upper'))
+            if upper is not None:
+                quantity = (quantity + upper) / 2
+        unit = UNIT_ALIASES[match.group('unit').lower()] if match.group('unit') else None
+        return quantity, unit, text[match.end():]
+
+    word, _, rest = text.partition(' ')
+    word = word.lower()
+    rest = rest.lstrip()
+    if word not in NUMBER_WORDS or not rest:
+        return None, None, text
+    unit_match = _UNIT_RE.match(rest)
+    if unit_match:
+        return NUMBER_WORDS[word], UNIT_ALIASES[unit_match.group('unit').lower()], rest[unit_match.end():]
+    if word in ('a', 'an') and rest.split(None, 1)[0].lower() in VAGUE_AMOUNT_WORDS:
+        return None, None, text
+    return NUMBER_WORDS[word], None, rest
+
+def _inline_amount(text):
+    """(quantity, unit, text without it) for a number and unit anywhere in `text`"""
+    match = _INLINE_AMOUNT_RE.search(text)
+    if not match:
+        return None, None, text
+    unit = UNIT_ALIASES[match.group('unit').lower()]
+    return _parse_number(match.group('quantity')), unit, text[:match.start()] + ' ' + text[match.end():]
+
+def parse_ingredient(text):
+    """
+    Split an ingredient line into quantity, unit, name, preparation and notes.
+
+    "2 1/2 cups tomatoes, diced (about 3)" ->
+        ParsedIngredient(2.5, 'cup', 'tomatoes', 'diced', 'about 3')
+
+    The amount may lead ("200g chicken", "an onion"), follow the name
+    ("chicken breast 200g") or only appear in a note ("salmon (150 g)").
+    Quantity and unit are None when absent; ranges ("2-3 cloves") use the midpoint.
+    """
+    text = _BULLET_RE.sub('', text.strip())
+
+    notes = [note.strip() for note in _PARENTHETICAL_RE.findall(text) if note.strip()]
+    text = _PARENTHETICAL_RE.sub(' ', text)
+
+    quantity, unit, text = _leading_amount(text)
+    if quantity is None:
+        quantity, unit, text = _inline_amount(text)
+    if quantity is None:
+        # "salmon fillet (150 g)": the amount is only given in a note
+        quantity, unit = next(
+            ((q, u) for q, u, _ in map(_inline_amount, notes) if q is not None), (None, None)
+        )
+
+    preparation = []
+    if ',' in text:
+        text, trailing = text.split(',', 1)
+        preparation.append(trailing.strip())
+
+    words = normalize_name(text).split()
+    while len(words) > 1 and words[0] in PREPARATION_WORDS:
+        preparation.insert(0, words.pop(0))
+
+    return ParsedIngredient(
+        quantity=quantity,
+        unit=unit,
+        name=' '.join(words),
+        preparation=' '.join(p for p in preparation if p) or None,
+        notes='; '.join(notes) or None
+    )
+
+def has_quantity(text):
+    """
+    True if parse_ingredient finds an amount ("2 eggs", "a pinch of salt",
+    "chicken 200g"), using the same grammar without building the result
+    """
+    text = _BULLET_RE.sub('', text.strip())
+    if _leading_amount(_PARENTHETICAL_RE.sub(' ', text))[0] is not None:
+        return True
+    # Inline amounts in the name or in a note
+    return _INLINE_AMOUNT_RE.search(text) is not None
+
+def _surface_forms(keyword):
+    """Keyword plus its plural spellings (berry -> berries, tomato -> tomatoes)"""
+    forms = {keyword, keyword + 's', keyword + 'es'}
+    if keyword.endswith('y') and not keyword.endswith('ey'):
+        forms.add(keyword[:-1] + 'ies')
+    return forms
+
+def _trie_regex(words):
+    """
+    Regex source matching any of `words`, factored into a character trie.
+
+    Shared prefixes are matched once, so scanning text costs about one branch
+    per character instead of one attempt per word; longer continuations are
+    tried before shorter ones.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = None
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    return build(trie)
+
+class KeywordMatcher:
+    """
+    Map free-text ingredient names to values via a keyword table.
+
+    All keywords (and their plurals) are compiled into one trie-shaped regex of
+    whole words, so a lookup is a single scan of the text. When several
+    keywords occur, the longest wins ("peanut butter" beats "butter"), and on
+    ties the rightmost one, since the head noun of an ingredient name usually
+    comes last ("butter chicken" is chicken).
+    """
+
+    def __init__(self, table):
+        self.table = dict(table)
+        self._keyword_by_form = {}
+        for keyword in sorted(self.table, key=len):
+            for form in _surface_forms(keyword):
+                self._keyword_by_form.setdefault(form, keyword)
+        self._pattern = (
+            re.compile(r'\b' + _trie_regex(self._keyword_by_form) + r'\b') if self._keyword_by_form else None
+        )
+
+    def match_keyword(self, text):
+        """Best matching keyword in `text`, or None"""
+        if self._pattern is None:
+            return None
+        best = None
+        for match in self._pattern.finditer(text.lower()):
+            keyword = self._keyword_by_form[match.group()]
+            if best is None or len(keyword) >= len(best):
+                best = keyword
+        return best
+
+    def match(self, text, default=None):
+        """Value of the best matching keyword in `text`"""
+        keyword = self.match_keyword(text)
+        return self.table[keyword] if keyword is not None else default
+
+# Default per-serving portion (grams) by food category, for ingredients listed
+# without an amount, and the keywords that put an ingredient in each category
+PORTION_CATEGORIES = {
+    'proteins': (150, (
+        'chicken', 'beef', 'meat', 'pork', 'lamb', 'turkey', 'steak', 'mince', 'fish', 'salmon',
+        'tuna', 'cod', 'shrimp', 'prawn', 'tofu', 'tempeh', 'sausage', 'bacon', 'ham',
+    )),
+    'grains': (80, (
+        'rice', 'pasta', 'potato', 'sweet potato', 'bread', 'noodles', 'spaghetti', 'macaroni',
+        'quinoa', 'couscous', 'oats', 'tortilla', 'flour',
+    )),
+    'vegetables': (50, (
+        'vegetable', 'tomato', 'onion', 'carrot', 'broccoli', 'spinach', 'bell pepper', 'garlic',
+        'zucchini', 'eggplant', 'mushroom', 'cabbage', 'lettuce', 'cucumber', 'celery', 'kale',
+        'cauliflower', 'peas', 'corn', 'green beans', 'asparagus', 'leek',
+    )),
+    'fats': (15, ('oil', 'olive oil', 'coconut oil', 'butter', 'ghee', 'margarine', 'lard')),
+    'eggs': (60, ('egg',)),
+    'dairy': (120, ('milk', 'cheese', 'yogurt', 'yoghurt', 'cream', 'cream cheese', 'coconut milk')),
+    'spreads': (30, (
+        'peanut butter', 'almond butter', 'nut butter', 'apple butter', 'jam', 'honey', 'hummus',
+        'mayonnaise', 'ketchup', 'mustard',
+    )),
+    'seasonings': (2, (
+        'salt', 'black pepper', 'cumin', 'paprika', 'oregano', 'basil', 'thyme', 'rosemary',
+        'cinnamon', 'turmeric', 'chili powder', 'garlic powder', 'onion powder', 'spice', 'seasoning',
+    )),
+    'liquids': (120, (
+        'water', 'broth', 'stock', 'wine', 'vinegar', 'soy sauce', 'chicken stock', 'chicken broth',
+        'beef stock', 'beef broth', 'vegetable stock', 'vegetable broth',
+    )),
+}
+DEFAULT_PORTION_G = 100
+
+class PortionClassifier:
+    """Assign an ingredient name to a food category and its default per-serving portion"""
+
+    def __init__(self, categories, default_grams=DEFAULT_PORTION_G):
+        self.portions = {category: grams for category, (grams, _) in categories.items()}
+        self.default_grams = default_grams
+        self._matcher = KeywordMatcher(
+            {keyword: category for category, (_, keywords) in categories.items() for keyword in keywords}
+        )
+
+    def classify(self, name):
+        """Category of an ingredient name, or None if no keyword matches"""
+        return self._matcher.match(name)
+
+    def portion_grams(self, name, servings=1):
+        """Default portion in grams for `servings` servings of an ingredient"""
+        category = self.classify(name)
+        return servings * self.portions.get(category, self.default_grams)
+
+portion_classifier = PortionClassifier(PORTION_CATEGORIES)
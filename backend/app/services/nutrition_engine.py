@@ -0,0 +1,268 @@
+from datetime import date
+import numpy as np
+from .ingredient_parser import MASS_UNITS_G, UNIT_ALIASES, KeywordMatcher, normalize_name, portion_classifier
+
+# Nutrient fields stored per 100g in Ingredient.nutrition_data
+NUTRIENT_FIELDS = (
+    'calories', 'protein_g', 'carbohydrates_total_g', 'fat_total_g', 'fat_saturated_g',
+    'fiber_g', 'sugar_g', 'sodium_mg', 'potassium_mg', 'cholesterol_mg'
+)
+
+# Fields that must be present for per-100g data to be usable
+REQUIRED_FIELDS = NUTRIENT_FIELDS[:4]
+
+# Volume units in millilitres (US customary)
+VOLUME_UNITS_ML = {
+    'ml': 1.0,
+    'l': 1000.0,
+    'tsp': 4.93,
+    'tbsp': 14.79,
+    'fl oz': 29.57,
+    'cup': 240.0,
+    'pinch': 0.31,
+    'dash': 0.62,
+}
+
+# Density in g/ml, matched by the longest keyword found in the ingredient name
+DENSITY_G_PER_ML = {
+    'water': 1.0, 'stock': 1.0, 'broth': 1.0, 'juice': 1.04, 'vinegar': 1.01, 'soy sauce': 1.2,
+    'milk': 1.03, 'cream': 1.0, 'yogurt': 1.03, 'sour cream': 0.96,
+    'oil': 0.92, 'butter': 0.96, 'honey': 1.42, 'syrup': 1.33, 'maple syrup': 1.32,
+    'flour': 0.53, 'sugar': 0.85, 'brown sugar': 0.93, 'powdered sugar': 0.5, 'salt': 1.2,
+    'baking soda': 0.9, 'baking powder': 0.9, 'cocoa': 0.42, 'cornstarch': 0.54,
+    'rice': 0.85, 'oats': 0.41, 'quinoa': 0.72, 'lentils': 0.8, 'beans': 0.75, 'chickpeas': 0.68,
+    'pasta': 0.42, 'breadcrumbs': 0.45, 'nuts': 0.6, 'almonds': 0.6, 'peanut butter': 1.08,
+    'cheese': 0.45, 'parmesan': 0.42, 'cream cheese': 0.97,
+    'spinach': 0.13, 'lettuce': 0.2, 'kale': 0.28, 'basil': 0.1, 'parsley': 0.25, 'cilantro': 0.17,
+    'onion': 0.67, 'tomato': 0.75, 'carrot': 0.55, 'broccoli': 0.37, 'peas': 0.6, 'corn': 0.6,
+    'mushroom': 0.3, 'bell pepper': 0.5, 'berries': 0.6, 'spice': 0.5, 'cumin': 0.5, 'paprika': 0.46,
+}
+DEFAULT_DENSITY_G_PER_ML = 0.8
+
+# Typical weight in grams of one whole item, matched like DENSITY_G_PER_ML
+PIECE_WEIGHTS_G = {
+    'egg': 50, 'onion': 110, 'red onion': 110, 'green onion': 15, 'shallot': 40, 'garlic': 5,
+    'tomato': 120, 'cherry tomato': 17, 'potato': 170, 'sweet potato': 130, 'carrot': 60,
+    'celery': 40, 'cucumber': 300, 'zucchini': 200, 'eggplant': 450, 'bell pepper': 150,
+    'chili': 15, 'jalapeno': 14, 'avocado': 150, 'lemon': 100, 'lime': 65, 'orange': 130,
+    'apple': 180, 'banana': 120, 'pear': 180, 'mushroom': 18, 'chicken breast': 175,
+    'chicken thigh': 110, 'sausage': 75, 'tortilla': 45, 'bread': 30, 'bun': 60, 'bagel': 100,
+    'cabbage': 900, 'cauliflower': 600, 'broccoli': 350, 'lettuce': 600,
+}
+DEFAULT_PIECE_G = 100.0
+
+# Units that name a fixed amount regardless of the ingredient
+UNIT_WEIGHTS_G = {
+    'clove': 5.0,
+    'slice': 30.0,
+    'can': 400.0,
+    'stick': 113.0,
+    'handful': 30.0,
+    'bunch': 100.0,
+    'sprig': 1.0,
+}
+
+SIZE_FACTORS = {'small': 0.75, 'medium': 1.0, 'large': 1.3, 'extra large': 1.5, 'jumbo': 1.6}
+
+_density = KeywordMatcher(DENSITY_G_PER_ML)
+_piece_weight = KeywordMatcher(PIECE_WEIGHTS_G)
+_size_factor = KeywordMatcher(SIZE_FACTORS)
+
+def default_portion_grams(name, servings=1):
+    """Portion in grams assumed for an ingredient given without a quantity"""
+    return portion_classifier.portion_grams(name, servings)
+
+def to_grams(quantity, unit, name):
+    """
+    Convert a quantity of an ingredient to grams.
+
+    Mass units convert directly, volume units go through the density table,
+    fixed units (clove, can, ...) use their typical weight, and bare counts
+    ("2 eggs") use the per-piece table. Returns None if quantity is missing.
+    """
+    if quantity is None or quantity <= 0:
+        return None
+
+    name = normalize_name(name or '')
+    canonical = UNIT_ALIASES.get(unit.lower().rstrip('.')) if unit else None
+
+    if canonical in MASS_UNITS_G:
+        return quantity * MASS_UNITS_G[canonical]
+    if canonical in VOLUME_UNITS_ML:
+        density = _density.match(name, DEFAULT_DENSITY_G_PER_ML)
+        return quantity * VOLUME_UNITS_ML[canonical] * density
+    if canonical in UNIT_WEIGHTS_G:
+        return quantity * UNIT_WEIGHTS_G[canonical]
+
+    # A count of whole items ("2 eggs", "1 piece ginger", legacy rows with the name as unit)
+    size = _size_factor.match(name, 1.0)
+    piece = _piece_weight.match(name, DEFAULT_PIECE_G)
+    return quantity * piece * size
+
+def per_100g_vector(per_100g):
+    """Per-100g dict -> float vector in NUTRIENT_FIELDS order (missing fields are 0)"""
+    return [float(per_100g.get(field) or 0.0) for field in NUTRIENT_FIELDS]
+
+def aggregate(grams, per_100g_rows, servings=1):
+    """
+    Scale per-100g nutrition by ingredient weights and sum it.
+
+    Args:
+        grams: sequence of ingredient weights in grams
+        per_100g_rows: per-100g dicts (or vectors from per_100g_vector), same order
+        servings: number of servings the amounts make
+
+    Returns:
+        tuple: (per-ingredient matrix, totals vector, per-serving vector), columns
+        in NUTRIENT_FIELDS order
+    """
+    grams = np.asarray(grams, dtype=np.float64)
+    matrix = np.array(
+        [row if not isinstance(row, dict) else per_100g_vector(row) for row in per_100g_rows],
+        dtype=np.float64
+    ).reshape(len(grams), len(NUTRIENT_FIELDS))
+
+    per_item = matrix * (grams / 100.0)[:, None]
+    totals = per_item.sum(axis=0)
+    per_serving = totals / max(servings or 1, 1)
+    return per_item, totals, per_serving
+
+def as_nutrient_dict(vector, digits=1):
+    """Nutrient vector -> {field: rounded value}"""
+    return {field: round(float(value), digits) for field, value in zip(NUTRIENT_FIELDS, vector)}
+
+def _scaled_items(names, grams, per_item, **extra):
+    items = []
+    for name, weight, vector in zip(names, grams, per_item.round(1).tolist()):
+        item = dict(zip(NUTRIENT_FIELDS, vector))
+        item['name'] = name
+        item['serving_size_g'] = round(weight, 1)
+        item.update(extra)
+        items.append(item)
+    return items
+
+def build_items(names, grams, per_100g_rows, source='cache'):
+    """CalorieNinjas-shaped items for `grams` of each named ingredient"""
+    if not names:
+        return []
+    per_item, _, _ = aggregate(grams, per_100g_rows)
+    return _scaled_items(names, grams, per_item, source=source)
+
+def sum_items(items, servings=1):
+    """Totals and per-serving values over already-scaled items"""
+    if not items:
+        zero = as_nutrient_dict(np.zeros(len(NUTRIENT_FIELDS)))
+        return {'totals': zero, 'per_serving': dict(zero)}
+    matrix = np.array(
+        [[float(item.get(field) or 0.0) for field in NUTRIENT_FIELDS] for item in items],
+        dtype=np.float64
+    )
+    totals = matrix.sum(axis=0)
+    return {
+        'totals': as_nutrient_dict(totals),
+        'per_serving': as_nutrient_dict(totals / max(servings or 1, 1))
+    }
+
+def compute_recipe(rows, servings=1):
+    """
+    Compute nutrition for a recipe from structured ingredient rows.
+
+    Args:
+        rows: iterable of (name, quantity, unit, per_100g) where per_100g is a
+            dict (or None when the ingredient has no nutrition data yet)
+        servings: number of servings the recipe makes
+
+    Returns:
+        dict: per_serving and totals dicts, per-ingredient items, and the names
+        of ingredients that could not be included (`unresolved`)
+    """
+    names, weights, vectors, unresolved = [], [], [], []
+    for name, quantity, unit, per_100g in rows:
+        if not per_100g:
+            unresolved.append(name)
+            continue
+        grams = to_grams(quantity, unit, name)
+        if grams is None:
+            grams = default_portion_grams(name, servings)
+        names.append(name)
+        weights.append(grams)
+        vectors.append(per_100g_vector(per_100g))
+
+    if not names:
+        zero = as_nutrient_dict(np.zeros(len(NUTRIENT_FIELDS)))
+        return {'per_serving': zero, 'totals': dict(zero), 'items': [], 'unresolved': unresolved,
+                'servings': servings}
+
+    per_item, totals, per_serving = aggregate(weights, vectors, servings)
+    return {
+        'per_serving': as_nutrient_dict(per_serving),
+        'totals': as_nutrient_dict(totals),
+        'items': _scaled_items(names, weights, per_item),
+        'unresolved': unresolved,
+        'servings': servings
+    }
+
+def items_matrix(items):
+    """Scaled items -> items × nutrients matrix (rows of zeros for None items)"""
+    return np.array(
+        [[float(item.get(field) or 0.0) for field in NUTRIENT_FIELDS] if item else [0.0] * len(NUTRIENT_FIELDS)
+         for item in items],
+        dtype=np.float64
+    ).reshape(len(items), len(NUTRIENT_FIELDS))
+
+def week_key(day):
+    """Week a meal-plan day belongs to: ISO week for dates, day // 7 for day numbers"""
+    if isinstance(day, int):
+        return f"week-{day // 7 + 1}"
+    try:
+        year, week, _ = date.fromisoformat(str(day)[:10]).isocalendar()
+        return f"{year}-W{week:02d}"
+    except ValueError:
+        return 'week-1'
+
+def batch_rollup(recipe_pairs, pair_matrix, servings, plan=None):
+    """
+    Roll unique portion nutrients up to recipes, and optionally to days and weeks.
+
+    Args:
+        recipe_pairs: (recipe_row, portion_index) for every ingredient occurrence
+        pair_matrix: unique portions × nutrients (amounts for that portion)
+        servings: servings made by each recipe row
+        plan: optional (day, recipe_row, servings_eaten) entries of a meal plan
+
+    Returns:
+        dict of matrices: 'totals' and 'per_serving' (recipes × nutrients) and,
+        with a plan, 'days'/'daily' (days × nutrients) and 'weeks'/'weekly'
+    """
+    servings = np.maximum(np.asarray(servings, dtype=np.float64), 1.0)
+    num_recipes = len(servings)
+
+    # Recipes × portions occurrence counts; a portion shared by many recipes is resolved once
+    assignment = np.zeros((num_recipes, len(pair_matrix)), dtype=np.float64)
+    if recipe_pairs:
+        rows, cols = zip(*recipe_pairs)
+        np.add.at(assignment, (np.asarray(rows), np.asarray(cols)), 1.0)
+
+    totals = assignment @ pair_matrix
+    per_serving = totals / servings[:, None]
+    result = {'totals': totals, 'per_serving': per_serving}
+
+    if plan:
+        days = list(dict.fromkeys(day for day, _, _ in plan))
+        day_index = {day: i for i, day in enumerate(days)}
+        eaten = np.zeros((len(days), num_recipes), dtype=np.float64)
+        np.add.at(
+            eaten,
+            (np.array([day_index[day] for day, _, _ in plan]), np.array([row for _, row, _ in plan])),
+            np.array([amount for _, _, amount in plan], dtype=np.float64)
+        )
+        daily = eaten @ per_serving
+
+        weeks = list(dict.fromkeys(week_key(day) for day in days))
+        week_index = {week: i for i, week in enumerate(weeks)}
+        membership = np.zeros((len(weeks), len(days)), dtype=np.float64)
+        membership[[week_index[week_key(day)] for day in days], np.arange(len(days))] = 1.0
+
+        result.update({'days': days, 'daily': daily, 'weeks': weeks, 'weekly': membership @ daily})
+
+    return result
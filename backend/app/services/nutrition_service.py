@@ -1,102 +1,293 @@
 import requests
 import os
+from datetime import datetime
+from sqlalchemy.orm import selectinload
+from ..cache import LRUCache
 from ..config import Config
+from ..database import db
+from ..http_client import build_session
+from ..tracing import outbound_span
+from ..models.ingredient import Ingredient
+from ..models.recipe import Recipe
+from ..models.recipe_ingredient import RecipeIngredient
+from .ingredient_cache import get_or_create_ingredient_id
+from .ingredient_parser import parse_ingredient, has_quantity, normalize_name, name_candidates, portion_classifier
+from . import nutrition_engine
+from .nutrition_engine import NUTRIENT_FIELDS, REQUIRED_FIELDS
+
+# In-process LRU in front of Ingredient.nutrition_data (ingredient name -> per-100g dict)
+nutrition_cache = LRUCache('nutrition_per_100g', maxsize=Config.NUTRITION_CACHE_SIZE)
 
 class NutritionService:
     """Service for fetching nutrition information from CalorieNinjas API"""
     
-    def __init__(self):
-        self.api_key = Config.CALORIE_NINJAS_API_KEY
-        self.base_url = Config.CALORIE_NINJAS_BASE_URL
+    def __init__(self, api_key=None, base_url=None, session=None):
+        self.api_key = api_key or Config.CALORIE_NINJAS_API_KEY
+        self.base_url = base_url or Config.CALORIE_NINJAS_BASE_URL
         
         if not self.api_key:
             raise ValueError("CALORIE_NINJAS_API_KEY environment variable is required")
+        
+        # One pooled keep-alive session per service; the service is shared process-wide
+        self.session = session or build_session(
+            pool_size=Config.NUTRITION_HTTP_POOL_SIZE,
+            retries=Config.NUTRITION_HTTP_RETRIES,
+            backoff_factor=Config.NUTRITION_HTTP_BACKOFF
+        )
+        self.timeout = (Config.NUTRITION_HTTP_CONNECT_TIMEOUT, Config.NUTRITION_HTTP_READ_TIMEOUT)
     
     def get_nutrition_facts(self, ingredients, serving_size=1):
         """
         Get nutrition facts for a list of ingredients
         
+        Each ingredient is resolved on its own: its quantity is converted to grams
+        locally (mass, volume via density, or per-piece weights) and scaled from
+        cached per-100g values (memory, then Ingredient.nutrition_data). Only
+        ingredients with no cached data are fetched from CalorieNinjas, in one
+        combined query.
+        
         Args:
             ingredients (list): List of ingredient names
             serving_size (int): Number of servings
             
         Returns:
-            dict: Nutrition data from CalorieNinjas API
+            dict: Nutrition items (CalorieNinjas format) plus totals and per-serving sums
         """
         try:
-            # Format ingredients for the API query - use more realistic portions
-            query = self._format_ingredients_query(ingredients, serving_size)
+            # Format each ingredient with a realistic portion
+            portions = []
+            for ingredient in ingredients:
+                if not ingredient or not ingredient.strip():
+                    continue
+                query_part = self._format_ingredient(ingredient, serving_size)
+                parsed = parse_ingredient(query_part)
+                grams = nutrition_engine.to_grams(parsed.quantity, parsed.unit, parsed.name)
+                portions.append((query_part, parsed.name, grams))
             
+            query = " and ".join(query_part for query_part, _, _ in portions)
             print(f"Nutrition API Query: {query}")
             
-            # Make API request
-            response = requests.get(
-                f"{self.base_url}?query={query}",
-                headers={'X-Api-Key': self.api_key}
-            )
-            
-            if not response.ok:
-                print(f"Nutrition API Error: {response.status_code} - {response.text}")
-                raise Exception(f"API error: {response.status_code} - {response.text}")
-            
-            data = response.json()
-            print(f"Nutrition API Response: {data}")
+            items, misses = self._resolve_local(portions)
             
-            if not data.get('items') or len(data['items']) == 0:
-                raise Exception('No nutrition data found for the ingredients')
+            extra_items = []
+            if misses:
+                extra_items = self._fetch_misses(portions, misses, items)
             
             # Validate that we have the required nutrition fields
-            valid_items = self._validate_nutrition_data(data['items'])
+            valid_items = self._validate_nutrition_data([item for item in items if item] + extra_items)
             
             if len(valid_items) == 0:
                 raise Exception('Nutrition data is incomplete or invalid')
             
-            return {
+            result = {
                 'items': valid_items,
                 'query': query,
                 'serving_size': serving_size
             }
+            result.update(nutrition_engine.sum_items(valid_items, serving_size))
+            return result
             
         except Exception as e:
             print(f"Nutrition service error: {str(e)}")
             raise e
     
-    def _format_ingredients_query(self, ingredients, serving_size):
-        """Format ingredients into a query string with realistic portions"""
-        formatted_ingredients = []
+    @staticmethod
+    def _resolve_local(portions):
+        """
+        Scale (query_part, name, grams) portions from locally known per-100g data.
+        
+        Returns the items aligned with `portions` (None where unknown) and the
+        indexes of the portions that still need the API.
+        """
+        per_100g_by_name = NutritionService._lookup_per_100g(
+            {candidate for _, name, grams in portions if grams for candidate in name_candidates(name)}
+        )
+        
+        items = [None] * len(portions)
+        resolved = []
+        misses = []
+        for idx, (query_part, name, grams) in enumerate(portions):
+            per_100g = None
+            if grams:
+                per_100g = next(
+                    (per_100g_by_name[c] for c in name_candidates(name) if c in per_100g_by_name), None
+                )
+            if per_100g:
+                resolved.append((idx, name, grams, per_100g))
+            else:
+                misses.append(idx)
         
-        for ingredient in ingredients:
-            if not ingredient or not ingredient.strip():
+        # Scale every locally known ingredient in one vectorized pass
+        if resolved:
+            local_items = nutrition_engine.build_items(
+                [name for _, name, _, _ in resolved],
+                [grams for _, _, grams, _ in resolved],
+                [per_100g for _, _, _, per_100g in resolved]
+            )
+            for (idx, _, _, _), item in zip(resolved, local_items):
+                items[idx] = item
+        
+        return items, misses
+    
+    @staticmethod
+    def get_recipe_nutrition(recipe):
+        """
+        Compute nutrition for a saved recipe from its structured ingredient rows.
+        
+        Uses only per-100g data already known locally (Ingredient.nutrition_data or
+        the in-process cache) and never calls the API; ingredients without data are
+        listed as `unresolved`. Needs no API key, so it can be called on the class.
+        """
+        rows = []
+        missing = []
+        for recipe_ingredient in recipe.recipe_ingredients:
+            ingredient = recipe_ingredient.ingredient
+            if ingredient is None:
                 continue
-                
-            # For AI-generated recipe ingredients, use more natural portion formatting
-            # Let CalorieNinjas API handle the portion calculations more intelligently
-            ingredient_lower = ingredient.lower()
+            per_100g = ingredient.nutrition_data
+            if not per_100g or not all(field in per_100g for field in REQUIRED_FIELDS):
+                per_100g = None
+                missing.append(ingredient.name)
+            rows.append([ingredient.name, recipe_ingredient.quantity, recipe_ingredient.unit, per_100g])
+        
+        if missing:
+            cached = NutritionService._lookup_per_100g(
+                {candidate for name in missing for candidate in name_candidates(name)}
+            )
+            for row in rows:
+                if row[3] is None:
+                    row[3] = next((cached[c] for c in name_candidates(row[0]) if c in cached), None)
+        
+        return nutrition_engine.compute_recipe(rows, recipe.serving_size or 1)
+    
+    def _request_nutrition(self, query):
+        """Call CalorieNinjas for a combined query and return its items"""
+        with outbound_span('calorieninjas', 'nutrition', request_bytes=len(query.encode('utf-8'))) as span:
+            try:
+                response = self.session.get(
+                    self.base_url,
+                    params={'query': query},
+                    headers={'X-Api-Key': self.api_key},
+                    timeout=self.timeout
+                )
+            except requests.RequestException as e:
+                print(f"Nutrition API request failed: {str(e)}")
+                raise Exception(f"Nutrition API unavailable: {str(e)}")
             
-            # Check if ingredient already has a quantity specified
-            if any(char.isdigit() for char in ingredient):
-                # Ingredient already has quantity, use as-is
-                formatted_ingredients.append(ingredient.strip())
+            span.set(status=response.status_code, response_bytes=len(response.content))
+            if not response.ok:
+                print(f"Nutrition API Error: {response.status_code} - {response.text}")
+                raise Exception(f"API error: {response.status_code} - {response.text}")
+        
+        data = response.json()
+        print(f"Nutrition API Response: {data}")
+        return data.get('items') or []
+    
+    def _fetch_misses(self, portions, misses, items):
+        """
+        Fetch uncached portions in one API call and fill them into `items`.
+        Only items matched to a portion by name are cached; returns the API
+        items that matched no portion (counted in totals, never cached).
+        """
+        api_items = self._request_nutrition(" and ".join(portions[idx][0] for idx in misses))
+        
+        if not api_items and not any(items):
+            raise Exception('No nutrition data found for the ingredients')
+        
+        # CalorieNinjas silently drops foods it doesn't know, so result order says
+        # nothing about which portion an item belongs to. Match whole names only
+        # (singular or plural): a substring match would file "egg" under "eggplant"
+        unmatched = list(misses)
+        extra_items = []
+        for item in api_items:
+            item_names = set(name_candidates(normalize_name(item.get('name', ''))))
+            match = next(
+                (idx for idx in unmatched
+                 if portions[idx][1] and item_names.intersection(name_candidates(portions[idx][1]))),
+                None
+            )
+            if match is None:
+                extra_items.append(item)
+                continue
+            unmatched.remove(match)
+            items[match] = item
+            self._store_per_100g(item, portions[match][1])
+        
+        if unmatched:
+            print(f"Nutrition API returned no item for: {[portions[idx][1] for idx in unmatched]}")
+        
+        self._commit_nutrition_cache()
+        return extra_items
+    
+    @staticmethod
+    def _lookup_per_100g(names):
+        """Return cached per-100g nutrition for ingredient names (memory first, then DB)"""
+        found = {}
+        db_names = []
+        for name in names:
+            per_100g = nutrition_cache.get(name)
+            if per_100g:
+                found[name] = per_100g
             else:
-                # Use serving-size adjusted portions for common ingredients
-                if any(word in ingredient_lower for word in ['chicken', 'beef', 'meat', 'pork', 'lamb', 'turkey']):
-                    portion = f"{round(serving_size * 150)}g"
-                elif any(word in ingredient_lower for word in ['rice', 'pasta', 'potato', 'bread', 'noodles']):
-                    portion = f"{round(serving_size * 80)}g"
-                elif any(word in ingredient_lower for word in ['vegetable', 'tomato', 'onion', 'carrot', 'broccoli', 'spinach']):
-                    portion = f"{round(serving_size * 50)}g"
-                elif any(word in ingredient_lower for word in ['oil', 'butter', 'olive oil', 'coconut oil']):
-                    portion = f"{round(serving_size * 15)}g"
-                elif any(word in ingredient_lower for word in ['egg', 'eggs']):
-                    portion = f"{round(serving_size * 60)}g"
-                elif any(word in ingredient_lower for word in ['milk', 'cheese', 'yogurt']):
-                    portion = f"{round(serving_size * 120)}g"
-                else:
-                    portion = f"{round(serving_size * 100)}g"
-                
-                formatted_ingredients.append(f"{portion} {ingredient.strip()}")
-        
-        return " and ".join(formatted_ingredients)
+                db_names.append(name)
+        
+        if db_names:
+            try:
+                rows = db.session.query(Ingredient.name, Ingredient.nutrition_data).filter(
+                    Ingredient.name.in_(db_names)
+                ).all()
+            except Exception as e:
+                print(f"Nutrition cache lookup failed: {str(e)}")
+                rows = []
+            
+            for name, nutrition_data in rows:
+                if nutrition_data and all(field in nutrition_data for field in REQUIRED_FIELDS):
+                    nutrition_cache.put(name, nutrition_data)
+                    found[name] = nutrition_data
+        
+        return found
+    
+    def _store_per_100g(self, item, portion_name):
+        """Cache a name-matched API item's nutrition per 100g under the portion's ingredient name"""
+        serving_g = item.get('serving_size_g')
+        if not serving_g or not portion_name or len(portion_name) > 100:
+            return
+        
+        per_100g = {
+            field: round(float(item[field]) * 100.0 / serving_g, 4)
+            for field in NUTRIENT_FIELDS
+            if item.get(field) is not None
+        }
+        if not all(field in per_100g for field in REQUIRED_FIELDS):
+            return
+        per_100g['source'] = 'calorieninjas'
+        
+        nutrition_cache.put(portion_name, per_100g)
+        try:
+            ingredient_id = get_or_create_ingredient_id(portion_name)
+            Ingredient.query.filter_by(id=ingredient_id).update(
+                {'nutrition_data': per_100g, 'updated_at': datetime.utcnow()},
+                synchronize_session=False
+            )
+        except Exception as e:
+            print(f"Failed to persist nutrition for '{portion_name}': {str(e)}")
+    
+    def _commit_nutrition_cache(self):
+        try:
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Failed to commit nutrition cache: {str(e)}")
+    
+    def _format_ingredient(self, ingredient, serving_size):
+        """Format a single ingredient with a realistic portion"""
+        # Ingredient already states an amount ("2 eggs", "a pinch of salt"), use as-is
+        if has_quantity(ingredient):
+            return ingredient.strip()
+        
+        # Serving-size adjusted portion for the ingredient's food category
+        portion = f"{round(portion_classifier.portion_grams(ingredient, serving_size))}g"
+        return f"{portion} {ingredient.strip()}"
     
     def _validate_nutrition_data(self, items):
         """Validate that nutrition items have required fields"""
@@ -108,3 +299,123 @@ class NutritionService:
                 valid_items.append(item)
         
         return valid_items
+
+def store_recipe_nutrition(recipe_id, nutrition_service=None):
+    """
+    Compute a saved recipe's nutrition and store it on Recipe.nutrition.
+    
+    Meant to run in the background after the recipe is saved. Ingredients with no
+    local per-100g data are fetched once through `nutrition_service` (when given),
+    which caches them for every later recipe, so viewing the recipe never needs
+    an outbound call. Nothing is stored if that fetch fails. Returns the stored
+    nutrition, or None.
+    """
+    recipe = Recipe.query.options(
+        selectinload(Recipe.recipe_ingredients).selectinload(RecipeIngredient.ingredient)
+    ).filter_by(id=recipe_id).first()
+    if recipe is None:
+        return None
+    
+    nutrition = NutritionService.get_recipe_nutrition(recipe)
+    if nutrition['unresolved'] and nutrition_service is not None:
+        try:
+            nutrition_service.get_nutrition_facts(nutrition['unresolved'], 1)
+            nutrition = NutritionService.get_recipe_nutrition(recipe)
+        except Exception as e:
+            # Not stored: a partial result would stick, since views only recompute
+            # recipes without nutrition; the next view queues another attempt
+            print(f"Could not fetch nutrition for {nutrition['unresolved']}, not storing it: {str(e)}")
+            return None
+    
+    nutrition['computed_at'] = datetime.utcnow().isoformat()
+    recipe.nutrition = nutrition  # Also bumps updated_at, so cached copies revalidate
+    try:
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Failed to store nutrition for recipe {recipe_id}: {str(e)}")
+        return None
+    return nutrition
+
+def batch_nutrition(recipes, plan=None, nutrition_service=None):
+    """
+    Nutrition for many recipes at once, with optional meal-plan rollups.
+    
+    Identical (ingredient, grams) portions across the whole batch are resolved
+    once: locally known ones in one lookup pass, the rest in a single API call
+    (only when `nutrition_service` is given). Per-recipe, daily and weekly sums
+    are matrix products over the unique portions.
+    
+    Args:
+        recipes (list): dicts with 'servings' and 'ingredients', a list of
+            (name, quantity, unit) tuples (quantity/unit may be None); any other
+            keys (e.g. recipe_id) are echoed back
+        plan (list): optional (day, recipe_index, servings_eaten) tuples
+        nutrition_service (NutritionService): used for ingredients with no local data
+        
+    Returns:
+        dict: per-recipe totals/per_serving, daily and weekly sums, batch stats
+    """
+    portion_index = {}
+    portions = []
+    recipe_pairs = []
+    for row, recipe in enumerate(recipes):
+        servings = recipe.get('servings') or 1
+        for name, quantity, unit in recipe['ingredients']:
+            name = normalize_name(name or '')
+            if not name:
+                continue
+            grams = nutrition_engine.to_grams(quantity, unit, name) or nutrition_engine.default_portion_grams(name, servings)
+            key = (name, round(grams, 1))
+            idx = portion_index.get(key)
+            if idx is None:
+                idx = portion_index[key] = len(portions)
+                portions.append((f"{key[1]:g}g {name}", name, key[1]))
+            recipe_pairs.append((row, idx))
+    
+    items, misses = NutritionService._resolve_local(portions)
+    api_lookups = 0
+    if misses and nutrition_service is not None:
+        api_lookups = len(misses)
+        try:
+            nutrition_service._fetch_misses(portions, misses, items)
+        except Exception as e:
+            print(f"Batch nutrition API lookup failed: {str(e)}")
+    
+    rollup = nutrition_engine.batch_rollup(
+        recipe_pairs,
+        nutrition_engine.items_matrix(items),
+        [recipe.get('servings') or 1 for recipe in recipes],
+        plan
+    )
+    
+    unresolved = [set() for _ in recipes]
+    for row, idx in recipe_pairs:
+        if items[idx] is None:
+            unresolved[row].add(portions[idx][1])
+    
+    results = []
+    for row, recipe in enumerate(recipes):
+        entry = {key: value for key, value in recipe.items() if key != 'ingredients'}
+        entry.update({
+            'totals': nutrition_engine.as_nutrient_dict(rollup['totals'][row]),
+            'per_serving': nutrition_engine.as_nutrient_dict(rollup['per_serving'][row]),
+            'unresolved': sorted(unresolved[row])
+        })
+        results.append(entry)
+    
+    response = {
+        'recipes': results,
+        'unique_portions': len(portions),
+        'api_lookups': api_lookups
+    }
+    if plan:
+        response['daily'] = [
+            dict(nutrition_engine.as_nutrient_dict(vector), day=day)
+            for day, vector in zip(rollup['days'], rollup['daily'])
+        ]
+        response['weekly'] = [
+            dict(nutrition_engine.as_nutrient_dict(vector), week=week)
+            for week, vector in zip(rollup['weeks'], rollup['weekly'])
+        ]
+    return response
@@ -0,0 +1,317 @@
+import threading
+import time
+from array import array
+import numpy as np
+from sqlalchemy.orm import selectinload
+from ..config import Config
+from ..database import db
+from ..models.ingredient import Ingredient
+from ..models.recipe import Recipe
+from ..models.recipe_ingredient import RecipeIngredient
+from .ingredient_parser import normalize_name, singularize
+
+# Catch-up scans re-read this many ids below the watermark, since ids are not
+# always committed in order across workers (already-indexed ids are skipped)
+_CATCH_UP_OVERLAP = 50
+
+def pantry_term(name):
+    """Index key for an ingredient name, used for stored recipes and pantry lists alike ("Tomatoes" -> "tomato")"""
+    return singularize(normalize_name(name))
+
+def _concat_uint32(arrays):
+    """One uint32 array from a list of array('I') (copied, so no buffer export outlives the call)"""
+    if not arrays:
+        return np.zeros(0, dtype=np.uint32)
+    return np.concatenate([np.frombuffer(a, dtype=np.uint32) for a in arrays])
+
+class PantrySearchIndex:
+    """
+    In-memory inverted index over stored recipes for "cook from what I have" search.
+
+    Ingredients are indexed by term: the normalized, singular name (see
+    pantry_term), so "tomatoes" in a recipe and "tomato" in a pantry match.
+    Postings map term id -> compact uint32 arrays of dense recipe slots, and
+    a forward index keeps each recipe's term ids for the "missing" list.
+    Scoring a pantry is one numpy bincount over the postings of its ingredients,
+    so cost scales with the number of matching postings, not the number of recipes.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built = False
+        self._last_refresh = 0.0
+        self._db_watermark = 0  # Highest recipe id seen by a database scan
+
+        self._slot_by_recipe = {}  # recipe_id -> dense slot
+        self._recipe_ids = array('I')  # slot -> recipe_id
+        self._owner_ids = array('I')  # slot -> user_id (0 for anonymous)
+        self._ingredient_counts = array('H')  # slot -> number of distinct ingredients
+        self._alive = bytearray()  # slot -> 1 while the recipe exists
+        self._postings = {}  # term id -> array('I') of slots
+        self._forward = []  # slot -> array('I') of term ids
+        self._terms = []  # term id -> term
+        self._term_ids = {}  # term -> term id
+
+    def __len__(self):
+        return len(self._slot_by_recipe)
+
+    def _term_id(self, term):
+        term_id = self._term_ids.get(term)
+        if term_id is None:
+            term_id = self._term_ids[term] = len(self._terms)
+            self._terms.append(term)
+        return term_id
+
+    def _add(self, recipe_id, user_id, ingredient_names):
+        if recipe_id in self._slot_by_recipe:
+            return
+
+        term_ids = sorted({self._term_id(pantry_term(name)) for name in ingredient_names})
+        slot = len(self._recipe_ids)
+        self._slot_by_recipe[recipe_id] = slot
+        self._recipe_ids.append(recipe_id)
+        self._owner_ids.append(user_id or 0)
+        self._ingredient_counts.append(min(len(term_ids), 65535))
+        self._alive.append(1)
+        self._forward.append(array('I', term_ids))
+
+        for term_id in term_ids:
+            postings = self._postings.get(term_id)
+            if postings is None:
+                postings = self._postings[term_id] = array('I')
+            postings.append(slot)
+
+    def _load_from_db(self, min_recipe_id=0):
+        """Index every recipe with id > min_recipe_id"""
+        owners = dict(
+            db.session.query(Recipe.id, Recipe.user_id)
+            .filter(Recipe.id > min_recipe_id)
+            .all()
+        )
+        links = (
+            db.session.query(RecipeIngredient.recipe_id, Ingredient.name)
+            .join(Ingredient, Ingredient.id == RecipeIngredient.ingredient_id)
+            .filter(RecipeIngredient.recipe_id > min_recipe_id)
+            .order_by(RecipeIngredient.recipe_id)
+            .all()
+        )
+
+        ingredients_by_recipe = {recipe_id: [] for recipe_id in owners}
+        for recipe_id, ingredient_name in links:
+            if recipe_id in ingredients_by_recipe:
+                ingredients_by_recipe[recipe_id].append(ingredient_name)
+
+        for recipe_id in sorted(ingredients_by_recipe):
+            self._add(recipe_id, owners[recipe_id], ingredients_by_recipe[recipe_id])
+            self._db_watermark = max(self._db_watermark, recipe_id)
+
+    def ensure_fresh(self):
+        """
+        Build the index on first use, then pick up recipes saved by other workers.
+
+        Local saves are indexed immediately via add_recipe(); catching up on other
+        workers' saves is a cheap primary-key range query, throttled to once per
+        PANTRY_INDEX_REFRESH_SECONDS.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if not self._built:
+                self._load_from_db()
+                self._built = True
+                self._last_refresh = now
+            elif now - self._last_refresh >= Config.PANTRY_INDEX_REFRESH_SECONDS:
+                self._load_from_db(min_recipe_id=max(self._db_watermark - _CATCH_UP_OVERLAP, 0))
+                self._last_refresh = now
+
+    def add_recipe(self, recipe_id, user_id, ingredient_names):
+        """Index a newly committed recipe (no-op until the index has been built)"""
+        with self._lock:
+            if self._built:
+                self._add(recipe_id, user_id, ingredient_names)
+
+    def has_term(self, term):
+        """True if some indexed recipe uses this term"""
+        with self._lock:
+            return term in self._term_ids
+
+    def remove_recipe(self, recipe_id):
+        """Tombstone a deleted recipe so it is never returned again"""
+        with self._lock:
+            slot = self._slot_by_recipe.get(recipe_id)
+            if slot is not None:
+                self._alive[slot] = 0
+
+    def export_arrays(self):
+        """
+        The built index as flat numpy arrays (postings and forward lists in CSR
+        form: sorted keys, offsets, values) for app.snapshot, or None if unbuilt
+        """
+        with self._lock:
+            if not self._built:
+                return None
+            posting_keys = sorted(self._postings)
+            posting_lists = [self._postings[k] for k in posting_keys]
+            return {
+                'watermark': np.array([self._db_watermark], dtype=np.int64),
+                'recipe_ids': np.frombuffer(self._recipe_ids, dtype=np.uint32).copy(),
+                'owner_ids': np.frombuffer(self._owner_ids, dtype=np.uint32).copy(),
+                'ingredient_counts': np.frombuffer(self._ingredient_counts, dtype=np.uint16).copy(),
+                'alive': np.frombuffer(self._alive, dtype=np.uint8).copy(),
+                'posting_keys': np.array(posting_keys, dtype=np.uint32),
+                'posting_offsets': np.cumsum([0] + [len(p) for p in posting_lists], dtype=np.int64),
+                'posting_slots': _concat_uint32(posting_lists),
+                'forward_offsets': np.cumsum([0] + [len(f) for f in self._forward], dtype=np.int64),
+                'forward_ids': _concat_uint32(self._forward),
+                'terms': np.array(self._terms, dtype=np.str_),
+            }
+
+    def restore_arrays(self, arrays):
+        """
+        Replace the index with one exported by export_arrays(). The next
+        ensure_fresh() catches up on recipes saved since the export; recipes
+        deleted since then are dropped when a search returns them.
+        """
+        with self._lock:
+            recipe_ids = array('I', arrays['recipe_ids'].astype(np.uint32).tobytes())
+            # Slicing array('I') is much cheaper than slicing numpy arrays per recipe
+            posting_slots = array('I', arrays['posting_slots'].astype(np.uint32).tobytes())
+            posting_offsets = arrays['posting_offsets'].tolist()
+            forward_ids = array('I', arrays['forward_ids'].astype(np.uint32).tobytes())
+            forward_offsets = arrays['forward_offsets'].tolist()
+
+            self._recipe_ids = recipe_ids
+            self._owner_ids = array('I', arrays['owner_ids'].astype(np.uint32).tobytes())
+            self._ingredient_counts = array('H', arrays['ingredient_counts'].astype(np.uint16).tobytes())
+            self._alive = bytearray(arrays['alive'].astype(np.uint8).tobytes())
+            self._slot_by_recipe = {recipe_id: slot for slot, recipe_id in enumerate(recipe_ids)}
+            self._postings = {
+                key: posting_slots[posting_offsets[i]:posting_offsets[i + 1]]
+                for i, key in enumerate(arrays['posting_keys'].tolist())
+            }
+            self._forward = [
+                forward_ids[forward_offsets[i]:forward_offsets[i + 1]]
+                for i in range(len(recipe_ids))
+            ]
+            self._terms = arrays['terms'].tolist()
+            self._term_ids = {term: term_id for term_id, term in enumerate(self._terms)}
+            self._db_watermark = int(arrays['watermark'][0])
+            self._built = True
+            self._last_refresh = 0.0  # Catch up on the next ensure_fresh()
+
+    def search(self, terms, limit=10, min_coverage=0.0, user_id=None):
+        """
+        Rank indexed recipes by how much of each recipe the pantry `terms` cover.
+
+        Returns a list of dicts with recipe_id, matched/missing terms, coverage
+        (matched / recipe ingredients) and Jaccard similarity
+        (matched / |pantry ∪ recipe|), best coverage first.
+        """
+        terms = set(terms)
+        if not terms:
+            return []
+
+        with self._lock:
+            pantry = sorted(self._term_ids[term] for term in terms if term in self._term_ids)
+            num_slots = len(self._recipe_ids)
+            postings = [self._postings[i] for i in pantry if i in self._postings]
+            if not postings or num_slots == 0:
+                return []
+
+            # Zero-copy views of the arrays are only used to build new arrays, so no
+            # buffer export outlives this block (array.append would fail otherwise)
+            slots = np.concatenate([np.frombuffer(p, dtype=np.uint32) for p in postings])
+            matched = np.bincount(slots, minlength=num_slots)
+            recipe_sizes = np.frombuffer(self._ingredient_counts, dtype=np.uint16).astype(np.float32)
+
+            candidates = (matched > 0) & np.frombuffer(self._alive, dtype=np.uint8).astype(bool)
+            if user_id is not None:
+                candidates &= np.frombuffer(self._owner_ids, dtype=np.uint32) == user_id
+
+            candidate_slots = np.flatnonzero(candidates)
+            if candidate_slots.size == 0:
+                return []
+
+            hits = matched[candidate_slots].astype(np.float32)
+            sizes = np.maximum(recipe_sizes[candidate_slots], 1.0)
+            coverage = hits / sizes
+            jaccard = hits / (len(terms) + sizes - hits)
+
+            keep = coverage >= min_coverage
+            candidate_slots, coverage, jaccard = candidate_slots[keep], coverage[keep], jaccard[keep]
+            if candidate_slots.size == 0:
+                return []
+
+            # Cheap top-k cut on coverage (keeping ties) before the full sort
+            if candidate_slots.size > limit * 4:
+                threshold = np.partition(coverage, -limit)[-limit]
+                keep = coverage >= threshold
+                candidate_slots, coverage, jaccard = candidate_slots[keep], coverage[keep], jaccard[keep]
+
+            # Rank by coverage, ties broken by Jaccard
+            order = np.lexsort((-jaccard, -coverage))[:limit]
+
+            pantry_set = set(pantry)
+            results = []
+            for i in order:
+                slot = int(candidate_slots[i])
+                recipe_term_ids = self._forward[slot]
+                results.append({
+                    'recipe_id': int(self._recipe_ids[slot]),
+                    'matched': [self._terms[ing] for ing in recipe_term_ids if ing in pantry_set],
+                    'missing': [self._terms[ing] for ing in recipe_term_ids if ing not in pantry_set],
+                    'coverage': round(float(coverage[i]), 4),
+                    'jaccard': round(float(jaccard[i]), 4)
+                })
+            return results
+
+# Process-wide index, built lazily on the first search
+pantry_index = PantrySearchIndex()
+
+def search_pantry(pantry_ingredients, user_id, limit=10, min_coverage=0.0):
+    """
+    Rank one user's stored recipes against a pantry list of ingredient names.
+
+    Names are matched by pantry_term, so singular and plural forms match.
+    Names no indexed recipe uses are reported back as `unknown_ingredients`.
+    Only the top results are loaded from the database (titles and bodies),
+    in two queries.
+    """
+    pantry_index.ensure_fresh()
+
+    terms = []
+    for name in pantry_ingredients:
+        if name and name.strip():
+            terms.append(pantry_term(name))
+    unknown = sorted({term for term in terms if not pantry_index.has_term(term)})
+
+    # Over-fetch a little so recipes deleted by other workers can be dropped
+    ranked = pantry_index.search(terms, limit=limit + 5, min_coverage=min_coverage, user_id=user_id)
+    if not ranked:
+        return {'results': [], 'unknown_ingredients': unknown}
+
+    recipe_ids = [r['recipe_id'] for r in ranked]
+    recipes = {
+        recipe.id: recipe
+        for recipe in Recipe.query.filter(
+            Recipe.id.in_(recipe_ids),
+            Recipe.user_id == user_id  # Also enforced here, not just by the index
+        ).options(selectinload(Recipe.instructions_blob))
+    }
+
+    results = []
+    for r in ranked:
+        recipe = recipes.get(r['recipe_id'])
+        if recipe is None:
+            pantry_index.remove_recipe(r['recipe_id'])
+            continue
+        results.append({
+            'recipe_id': recipe.id,
+            'title': recipe.title,
+            'instructions': recipe.body,
+            'coverage': r['coverage'],
+            'jaccard': r['jaccard'],
+            'matched': r['matched'],
+            'missing': r['missing']
+        })
+
+    return {'results': results[:limit], 'unknown_ingredients': unknown}
@@ -0,0 +1,130 @@
+import os
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from bcrypt_worker import hashpw, checkpw, noop
+from ..config import Config
+
+# bcrypt only uses the first 72 bytes; older releases truncated silently and
+# bcrypt>=5 raises instead, so truncate explicitly to keep existing hashes valid
+_BCRYPT_MAX_BYTES = 72
+
+class PasswordHasherBusy(RuntimeError):
+    """Too many hashing jobs queued in this worker; the request should be retried later"""
+
+def _encode(password):
+    return password.encode('utf-8')[:_BCRYPT_MAX_BYTES]
+
+def calibrate_rounds(target_ms=None, min_rounds=None, max_rounds=None):
+    """
+    Highest bcrypt cost whose hash takes at most `target_ms` on this machine,
+    clamped to [min_rounds, max_rounds]. Times one hash at min_rounds and
+    extrapolates (each extra round doubles the work).
+
+    Run offline (benchmarks/bench_password_hashing.py) to choose BCRYPT_ROUNDS;
+    workers never calibrate, so they can't disagree on the cost.
+    """
+    target_ms = target_ms or Config.BCRYPT_TARGET_MS
+    min_rounds = min_rounds or Config.BCRYPT_MIN_ROUNDS
+    max_rounds = max_rounds or Config.BCRYPT_MAX_ROUNDS
+
+    start = time.perf_counter()
+    hashpw(b'calibration password', min_rounds)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    rounds = min_rounds
+    while rounds < max_rounds and elapsed_ms * 2 <= target_ms:
+        rounds += 1
+        elapsed_ms *= 2
+    return rounds
+
+class PasswordHasher:
+    """
+    bcrypt hashing and verification on a small, bounded process pool.
+
+    Hashing is deliberately CPU-heavy; running it in PASSWORD_HASH_WORKERS
+    separate processes caps how much CPU a login burst can take from the rest
+    of the worker, and PASSWORD_HASH_MAX_PENDING caps how many requests can
+    wait on it (PasswordHasherBusy beyond that). With 0 workers (the
+    default), hashing runs inline on the calling thread. Pool processes only
+    import bcrypt_worker, never the app.
+    """
+
+    def __init__(self, rounds=None, workers=None, max_pending=None):
+        self.rounds = rounds or Config.BCRYPT_ROUNDS
+        self.workers = Config.PASSWORD_HASH_WORKERS if workers is None else workers
+        max_pending = max_pending or Config.PASSWORD_HASH_MAX_PENDING
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pool_pid = None
+
+    def _get_pool(self):
+        # One pool per process: a pool inherited across fork is unusable
+        if self._pool is None or self._pool_pid != os.getpid():
+            with self._lock:
+                if self._pool is None or self._pool_pid != os.getpid():
+                    # forkserver children don't inherit this process's threads and locks
+                    methods = multiprocessing.get_all_start_methods()
+                    context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+                    if context.get_start_method() == 'forkserver':
+                        # Preload only the worker functions, not __main__ (which may build the app)
+                        context.set_forkserver_preload(['bcrypt_worker'])
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+                    self._pool_pid = os.getpid()
+        return self._pool
+
+    def _reset_pool(self, pool):
+        """Drop a broken pool (a child died) so the next call starts a new one"""
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False)
+
+    def _run(self, fn, *args):
+        if self.workers <= 0:
+            return fn(*args)
+        if not self._slots.acquire(timeout=Config.PASSWORD_HASH_QUEUE_TIMEOUT):
+            raise PasswordHasherBusy('Password hashing is busy, please retry')
+        try:
+            pool = self._get_pool()
+            try:
+                return pool.submit(fn, *args).result()
+            except BrokenProcessPool:
+                print("Password hashing pool broke; starting a new one")
+                self._reset_pool(pool)
+                return self._get_pool().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def start(self):
+        """Start the pool processes ahead of the first login (used by warm-up)"""
+        if self.workers > 0:
+            pool = self._get_pool()
+            for future in [pool.submit(noop) for _ in range(self.workers)]:
+                future.result()
+
+    def hash_password(self, password):
+        return self._run(hashpw, _encode(password), self.rounds).decode('utf-8')
+
+    def verify_password(self, password, password_hash):
+        if not password_hash:
+            return False
+        try:
+            return self._run(checkpw, _encode(password), password_hash.encode('utf-8'))
+        except ValueError:
+            # Malformed stored hash
+            return False
+
+    def needs_rehash(self, password_hash):
+        """True if the hash was made with a lower cost than the current one (never downgrades)"""
+        try:
+            # $2b$<cost>$<salt+hash>
+            return int(password_hash.split('$')[2]) < self.rounds
+        except (AttributeError, IndexError, ValueError):
+            return True
+
+# Process-wide hasher used by the User model
+password_hasher = PasswordHasher()
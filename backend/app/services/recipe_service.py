@@ -3,6 +3,7 @@ import json
 import sys
 from typing import List
 from openai import OpenAI
+from ..tracing import outbound_span
 
 # Optional import for Gemini AI
 try:
@@ -13,6 +14,9 @@ except ImportError:
     print("Warning: google-generativeai package not installed. Gemini AI will not be available.", flush=True)
 
 class RecipeService:
+    # Gemini model that initialized last time, restored from a snapshot at boot
+    known_gemini_model = None
+
     def __init__(self):
         # Get Gemini API key from environment variable
         self.gemini_api_key = os.getenv('GEMINI_API_KEY')
@@ -28,10 +32,14 @@ class RecipeService:
                 genai.configure(api_key=self.gemini_api_key)
                 # Try to list available models first to see what's available
                 try:
-                    models = genai.list_models()
-                    available_models = [m.name for m in models if 'generateContent' in m.supported_generation_methods]
-                    # Extract just the model name part (remove 'models/' prefix if present)
-                    available_models_clean = [m.split('/')[-1] if '/' in m else m for m in available_models[:10]]
+                    if RecipeService.known_gemini_model:
+                        # Restored from a snapshot (app.snapshot): skip the list_models() round trip
+                        available_models_clean = [RecipeService.known_gemini_model]
+                    else:
+                        models = genai.list_models()
+                        available_models = [m.name for m in models if 'generateContent' in m.supported_generation_methods]
+                        # Extract just the model name part (remove 'models/' prefix if present)
+                        available_models_clean = [m.split('/')[-1] if '/' in m else m for m in available_models[:10]]
                 except Exception:
                     available_models_clean = []
                 
@@ -174,19 +182,26 @@ Make sure the recipe is:
 - **Formatted in proper Markdown with headers, lists, and clear structure**"""
 
         # Generate content with Gemini
-        response = self.gemini_model.generate_content(
-            prompt,
-            generation_config={
-                'temperature': 0.7,
-                'max_output_tokens': 3000,
-            }
-        )
-        
-        # Extract the generated recipe text
-        generated_text = response.text
+        model_name = self.gemini_model_name or 'gemini-1.5-flash'
+        with outbound_span('gemini', 'generate_content', model=model_name, request_bytes=len(prompt.encode('utf-8'))) as span:
+            response = self.gemini_model.generate_content(
+                prompt,
+                generation_config={
+                    'temperature': 0.7,
+                    'max_output_tokens': 3000,
+                }
+            )
+            
+            # Extract the generated recipe text
+            generated_text = response.text
+            usage = getattr(response, 'usage_metadata', None)
+            span.set(
+                response_bytes=len(generated_text.encode('utf-8')),
+                input_tokens=getattr(usage, 'prompt_token_count', None),
+                output_tokens=getattr(usage, 'candidates_token_count', None)
+            )
         
         # Parse the generated recipe
-        model_name = self.gemini_model_name or 'gemini-1.5-flash'
         parsed_result = self._parse_recipe(generated_text, ingredients, model_name)
         return parsed_result
 
@@ -248,19 +263,26 @@ Make sure the recipe is:
         # Try each model until one works
         for model_name in groq_models:
             try:
-                completion = self.groq_client.chat.completions.create(
-                    model=model_name,
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ],
-                    max_tokens=3000,
-                    temperature=0.7
-                )
-                
-                generated_text = completion.choices[0].message.content
+                with outbound_span('groq', 'chat.completions.create', model=model_name, request_bytes=len(prompt.encode('utf-8'))) as span:
+                    completion = self.groq_client.chat.completions.create(
+                        model=model_name,
+                        messages=[
+                            {
+                                "role": "user",
+                                "content": prompt
+                            }
+                        ],
+                        max_tokens=3000,
+                        temperature=0.7
+                    )
+                    
+                    generated_text = completion.choices[0].message.content
+                    usage = completion.usage
+                    span.set(
+                        response_bytes=len((generated_text or '').encode('utf-8')),
+                        input_tokens=getattr(usage, 'prompt_tokens', None),
+                        output_tokens=getattr(usage, 'completion_tokens', None)
+                    )
                 model_used = model_name
                 break  # Success! Exit the loop
                 
@@ -0,0 +1,57 @@
+from sqlalchemy.exc import IntegrityError
+from ..config import Config
+from ..database import db
+from ..models.recipe import Recipe, recipe_body_cache
+from ..models.recipe_blob import RecipeBlob
+from .pantry_search_service import pantry_index
+
+def store_recipe_body(text):
+    """
+    Return the blob holding `text`, creating it if this content was never stored.
+
+    Returns None for bodies smaller than RECIPE_BLOB_MIN_SIZE, which stay inline
+    in Recipe.instructions.
+    """
+    if not isinstance(text, str) or len(text) < Config.RECIPE_BLOB_MIN_SIZE:
+        return None
+
+    normalized = RecipeBlob.normalize(text)
+    content_hash = RecipeBlob.hash_text(normalized)
+
+    # Share-lock a reused blob until the recipe referencing it commits, so
+    # delete_recipe (which locks it for update) can't drop it in between
+    blob = RecipeBlob.query.filter_by(content_hash=content_hash).with_for_update(read=True).first()
+    if blob:
+        return blob
+
+    codec, data = RecipeBlob.compress(normalized)
+    blob = RecipeBlob(content_hash=content_hash, codec=codec, size=len(normalized.encode('utf-8')), data=data)
+    try:
+        # Savepoint so a concurrent insert of the same content doesn't abort the recipe save
+        with db.session.begin_nested():
+            db.session.add(blob)
+    except IntegrityError:
+        blob = RecipeBlob.query.filter_by(content_hash=content_hash).with_for_update(read=True).one()
+
+    return blob
+
+def delete_recipe(recipe):
+    """Delete a recipe, drop it from the pantry index and drop its blob if no other recipe shares it (caller commits)"""
+    blob_id = recipe.instructions_blob_id
+    pantry_index.remove_recipe(recipe.id)
+    db.session.delete(recipe)
+
+    if blob_id is None:
+        return
+
+    db.session.flush()
+    # Lock the blob before checking for references: a concurrent store_recipe_body
+    # reusing it holds a share lock until its recipe commits, so this waits and then
+    # sees that recipe; one that starts later waits for this delete and makes a new blob
+    locked = db.session.query(RecipeBlob.id).filter_by(id=blob_id).with_for_update().first()
+    if locked is None:
+        return
+    still_referenced = db.session.query(Recipe.id).filter_by(instructions_blob_id=blob_id).first()
+    if not still_referenced:
+        RecipeBlob.query.filter_by(id=blob_id).delete()
+        recipe_body_cache.pop(blob_id)
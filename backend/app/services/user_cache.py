@@ -0,0 +1,79 @@
+import copy
+import time
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached
+from ..cache import LRUCache
+from ..config import Config
+from ..database import db
+from ..models.user import User
+
+# Session.info key holding ids of users updated or deleted by the current transaction
+_CHANGED_KEY = 'changed_user_ids'
+
+# Process-local id -> (expires_at, column values) for JWT-authenticated requests.
+# Entries expire after USER_CACHE_TTL_SECONDS, and updates made by this worker
+# invalidate them on commit; other workers' caches may lag by up to the TTL.
+# Never snapshotted to disk (see app.snapshot), since rows include password hashes.
+user_cache = LRUCache('users', maxsize=Config.USER_CACHE_SIZE)
+
+_COLUMNS = [column.key for column in User.__table__.columns]
+
+def _column_values(user):
+    return {name: getattr(user, name) for name in _COLUMNS}
+
+def load_user(user_id):
+    """
+    Return the User with this id attached to the current session, or None.
+
+    A cached row is re-attached with merge(load=False), which issues no query;
+    otherwise the user is loaded (one primary-key SELECT) and cached.
+    """
+    try:
+        user_id = int(user_id)
+    except (ValueError, TypeError):
+        return None
+
+    session = db.session()
+    # Already loaded by this request (e.g. by the JWT user loader)
+    existing = session.identity_map.get(session.identity_key(User, user_id))
+    if existing is not None:
+        return existing
+
+    now = time.monotonic()
+    entry = user_cache.get(user_id)
+    if entry is not None and entry[0] > now:
+        # Copy JSON columns so requests can't mutate the cached lists
+        user = User(**copy.deepcopy(entry[1]))
+        make_transient_to_detached(user)
+        return session.merge(user, load=False)
+
+    user = session.get(User, user_id)
+    if user is None:
+        user_cache.pop(user_id)
+        return None
+
+    user_cache.put(user_id, (now + Config.USER_CACHE_TTL_SECONDS, _column_values(user)))
+    return user
+
+def invalidate_user(user_id):
+    """Drop a cached user (the next lookup reads the database)"""
+    user_cache.pop(int(user_id))
+
+def _changed_ids(session):
+    return session.info.setdefault(_CHANGED_KEY, set())
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _record_changed_user(mapper, connection, target):
+    session = Session.object_session(target)
+    if session is not None:
+        _changed_ids(session).add(target.id)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_changed_users(session):
+    for user_id in session.info.pop(_CHANGED_KEY, ()):
+        user_cache.pop(user_id)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changed_users(session):
+    session.info.pop(_CHANGED_KEY, None)
@@ -0,0 +1,208 @@
+import os
+import hashlib
+from collections import namedtuple
+from ..config import Config
+from ..tracing import outbound_span
+
+# Optional OpenCV / onnxruntime support for the local backend
+try:
+    import cv2
+    import numpy as np
+    OPENCV_AVAILABLE = True
+except ImportError:
+    OPENCV_AVAILABLE = False
+
+try:
+    import onnxruntime
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
+# Backend-neutral label; topicality is 0.0 when a backend doesn't report it
+Label = namedtuple('Label', ['description', 'score', 'topicality'])
+
+# One entry per image of a batch: labels, or an error message for that image
+LabelResult = namedtuple('LabelResult', ['labels', 'error'])
+
+class VisionBackendError(RuntimeError):
+    """A vision backend that can't be constructed or called"""
+
+class VisionBackend:
+    """
+    Turns encoded image bytes (as produced by image_preprocessing) into labels.
+
+    Subclasses implement detect_labels(); detect_labels_batch() defaults to
+    one call per image and is overridden where the backend can do better.
+    """
+
+    name = None
+
+    def detect_labels(self, content):
+        raise NotImplementedError
+
+    def detect_labels_batch(self, contents):
+        results = []
+        for content in contents:
+            try:
+                results.append(LabelResult(self.detect_labels(content), None))
+            except Exception as e:
+                results.append(LabelResult([], str(e)))
+        return results
+
+class GoogleVisionBackend(VisionBackend):
+    """Google Cloud Vision label detection"""
+
+    name = 'google'
+
+    def __init__(self, credentials_path=None):
+        from google.cloud import vision
+        self._vision = vision
+
+        # Set the Google Cloud credentials
+        credentials_path = credentials_path or Config.GOOGLE_APPLICATION_CREDENTIALS or os.path.join(
+            os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+            'capstone-ai-cooking-app-5692391a2963.json'
+        )
+        os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = credentials_path
+        self.client = vision.ImageAnnotatorClient()
+
+    @staticmethod
+    def _labels(annotations):
+        return [Label(a.description, a.score, a.topicality) for a in annotations]
+
+    def detect_labels(self, content):
+        with outbound_span('google_vision', 'label_detection', request_bytes=len(content)) as span:
+            response = self.client.label_detection(image=self._vision.Image(content=content))
+            if response.error.message:
+                raise VisionBackendError(response.error.message)
+            span.set(items=len(response.label_annotations))
+        return self._labels(response.label_annotations)
+
+    def detect_labels_batch(self, contents):
+        """All images in one batch_annotate_images request"""
+        vision = self._vision
+        feature = vision.Feature(type_=vision.Feature.Type.LABEL_DETECTION)
+        with outbound_span('google_vision', 'batch_annotate_images',
+                           request_bytes=sum(len(content) for content in contents), images=len(contents)) as span:
+            response = self.client.batch_annotate_images(requests=[
+                vision.AnnotateImageRequest(image=vision.Image(content=content), features=[feature])
+                for content in contents
+            ])
+            errors = sum(1 for r in response.responses if r.error.message)
+            span.set(items=sum(len(r.label_annotations) for r in response.responses), failed_images=errors)
+            if contents and errors == len(contents):
+                span.fail(response.responses[0].error.message)
+        return [
+            LabelResult([], r.error.message) if r.error.message else LabelResult(self._labels(r.label_annotations), None)
+            for r in response.responses
+        ]
+
+class OnnxVisionBackend(VisionBackend):
+    """
+    Local CPU food classifier: any single-input ONNX image classification
+    model (NCHW float input, one logit per class) plus a labels file with one
+    class name per line. Runs without network access or credentials.
+    """
+
+    name = 'onnx'
+
+    # ImageNet normalization, which most exported classifiers expect
+    MEAN = (0.485, 0.456, 0.406)
+    STD = (0.229, 0.224, 0.225)
+
+    def __init__(self, model_path=None, labels_path=None, top_k=10):
+        if not ONNXRUNTIME_AVAILABLE or not OPENCV_AVAILABLE:
+            raise VisionBackendError('onnxruntime and opencv-python are required for the onnx vision backend')
+        model_path = model_path or Config.VISION_ONNX_MODEL
+        labels_path = labels_path or Config.VISION_ONNX_LABELS
+        if not model_path or not labels_path:
+            raise VisionBackendError('VISION_ONNX_MODEL and VISION_ONNX_LABELS must be set for the onnx vision backend')
+
+        self.session = onnxruntime.InferenceSession(model_path, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+        shape = self.session.get_inputs()[0].shape
+        # Dynamic dimensions come back as strings or None
+        self.input_size = shape[2] if isinstance(shape[2], int) else 224
+        with open(labels_path, encoding='utf-8') as f:
+            self.class_names = [line.strip() for line in f if line.strip()]
+        self.top_k = top_k
+        self._mean = np.array(self.MEAN, dtype=np.float32)
+        self._std = np.array(self.STD, dtype=np.float32)
+
+    def _tensor(self, content):
+        pixels = cv2.imdecode(np.frombuffer(content, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if pixels is None:
+            raise VisionBackendError('Unsupported or corrupt image')
+        pixels = cv2.resize(pixels, (self.input_size, self.input_size), interpolation=cv2.INTER_AREA)
+        pixels = cv2.cvtColor(pixels, cv2.COLOR_BGR2RGB).astype(np.float32) / 255.0
+        return ((pixels - self._mean) / self._std).transpose(2, 0, 1)
+
+    def _top_labels(self, logits):
+        # Numerically stable softmax
+        exp = np.exp(logits - logits.max())
+        probabilities = exp / exp.sum()
+        top = np.argsort(probabilities)[::-1][:self.top_k]
+        return [
+            Label(self.class_names[i].replace('_', ' '), float(probabilities[i]), 0.0)
+            for i in top if i < len(self.class_names)
+        ]
+
+    def detect_labels(self, content):
+        return self.detect_labels_batch([content])[0].labels
+
+    def detect_labels_batch(self, contents):
+        """Decodable images run through the model as one batch"""
+        results = [None] * len(contents)
+        tensors, indices = [], []
+        for index, content in enumerate(contents):
+            try:
+                tensors.append(self._tensor(content))
+                indices.append(index)
+            except VisionBackendError as e:
+                results[index] = LabelResult([], str(e))
+        if tensors:
+            logits = self.session.run(None, {self.input_name: np.stack(tensors)})[0]
+            for index, row in zip(indices, logits):
+                results[index] = LabelResult(self._top_labels(row), None)
+        return results
+
+class StubVisionBackend(VisionBackend):
+    """
+    Deterministic stand-in for tests, load tests and benchmarks: the same
+    image bytes always give the same few labels, with no model or network.
+    """
+
+    name = 'stub'
+
+    VOCABULARY = (
+        'tomato', 'onion', 'garlic', 'carrot', 'potato', 'bell pepper', 'broccoli', 'spinach',
+        'mushroom', 'lemon', 'apple', 'banana', 'egg', 'cheese', 'milk', 'butter',
+        'chicken', 'beef', 'salmon', 'rice', 'pasta', 'bread', 'cucumber', 'avocado',
+    )
+
+    def __init__(self, labels_per_image=4):
+        self.labels_per_image = labels_per_image
+
+    def detect_labels(self, content):
+        digest = hashlib.blake2b(content, digest_size=16).digest()
+        labels = []
+        for i, byte in enumerate(digest[:self.labels_per_image]):
+            score = 0.95 - 0.05 * i
+            labels.append(Label(self.VOCABULARY[byte % len(self.VOCABULARY)], score, score))
+        # Generic labels like Vision's, which the pipeline is expected to drop
+        labels.append(Label('Food', 0.97, 0.97))
+        return labels
+
+BACKENDS = {
+    GoogleVisionBackend.name: GoogleVisionBackend,
+    OnnxVisionBackend.name: OnnxVisionBackend,
+    StubVisionBackend.name: StubVisionBackend,
+}
+
+def create_backend(name=None):
+    """Construct the vision backend named by VISION_BACKEND ('google', 'onnx' or 'stub')"""
+    name = (name or Config.VISION_BACKEND).lower()
+    backend_class = BACKENDS.get(name)
+    if backend_class is None:
+        raise VisionBackendError(f"Unknown vision backend '{name}' (expected one of {', '.join(BACKENDS)})")
+    return backend_class()
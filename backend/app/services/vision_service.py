@@ -1,69 +1,241 @@
-import os
-from google.cloud import vision
-import io
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait
+from ..config import Config
+from .vision_backends import create_backend
 from .food_validation_service import FoodValidationService
+from .ingredient_parser import normalize_name
+from .image_preprocessing import prepare_image, ImagePreprocessingError
+from .image_hash_cache import image_hash_cache
+
+# Labels too generic to be an ingredient
+GENERIC_LABELS = {
+    'food', 'vegetable', 'fruit', 'ingredient', 'produce', 'natural foods', 'whole food',
+    'local food', 'superfood', 'cuisine', 'dish', 'recipe', 'tableware', 'plant',
+    'staple food', 'vegan nutrition', 'food group', 'still life photography',
+}
+
+# Shared by all requests in this worker; bounded so OFF lookups can't pile up
+_validation_pool = ThreadPoolExecutor(
+    max_workers=Config.VISION_VALIDATION_WORKERS,
+    thread_name_prefix='label-validation'
+)
+
+def _validate_before(validator, label, deadline):
+    """
+    Validate a label on the pool with whatever is left of the deadline as the
+    Open Food Facts timeout. A task that only starts once the deadline has
+    passed gives up without calling out.
+    """
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError("validation deadline passed before the lookup started")
+    return validator.validate_ingredient(label, True, timeout=remaining)
 
 class VisionService:
-    def __init__(self):
-        # Set the Google Cloud credentials
-        credentials_path = os.path.join(
-            os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
-            'capstone-ai-cooking-app-5692391a2963.json'
-        )
-        os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = credentials_path
-        self.client = vision.ImageAnnotatorClient()
+    def __init__(self, backend=None):
+        # Label detection backend (Google Vision, local ONNX model or stub), chosen by VISION_BACKEND
+        self.backend = backend or create_backend()
         
         # Initialize food validation service
         self.food_validator = FoodValidationService()
 
     def detect_ingredients_from_image(self, image_file):
         """
-        Detect ingredients from an uploaded image using Google Vision API
+        Detect ingredients from an uploaded image with the configured vision backend
+        
+        Returns the ingredient list only; see detect_ingredients() for the full result.
         """
-        try:
-            # Read the image file
-            content = image_file.read()
-            image = vision.Image(content=content)
+        return self.detect_ingredients(image_file)['ingredients']
 
-            # Perform label detection
-            response = self.client.label_detection(image=image)
-            labels = response.label_annotations
+    def detect_ingredients(self, image_file):
+        """
+        Detect ingredients from an uploaded image with the configured vision backend
+        
+        The upload is downscaled and re-encoded first (see image_preprocessing);
+        ImagePreprocessingError is raised for uploads that are too large or not
+        images; backend failures propagate to the caller rather than being
+        replaced with made-up ingredients.
+        
+        Returns:
+            dict: 'ingredients' (validated), 'unverified' (labels whose validation
+            missed the deadline) and 'cached' (answered from the image hash cache)
+        """
+        # Spool, downscale and re-encode the upload; Vision doesn't need full-resolution photos
+        prepared = prepare_image(image_file)
+        print(f"Vision image: {prepared.stats['input_bytes']} -> {prepared.stats['output_bytes']} bytes "
+              f"({prepared.width}x{prepared.height}, {prepared.stats['elapsed_ms']} ms)")
+        
+        # Same or nearly the same photo as before: answer without calling Vision or OFF
+        if prepared.dhash is not None:
+            cached = image_hash_cache.lookup(prepared.dhash)
+            if cached is not None:
+                print(f"Vision cache hit for image hash {prepared.dhash:016x}")
+                return {'ingredients': list(cached), 'unverified': [], 'cached': True}
+        
+        # Perform label detection
+        labels = self._candidate_labels(self.backend.detect_labels(prepared.content))
+
+        validated_ingredients, unverified = self._validate_labels(labels)
+        
+        # Only complete results are cached; a timed-out validation shouldn't stick
+        if prepared.dhash is not None and validated_ingredients and not unverified:
+            image_hash_cache.put(prepared.dhash, tuple(validated_ingredients))
 
-            # Extract all detected labels without hardcoded filtering
-            detected_ingredients = []
-            for label in labels:
-                label_text = label.description.lower().strip()
-                # Only filter out very short or non-descriptive labels
-                if len(label_text) > 2 and label_text not in ['food', 'vegetable', 'fruit', 'ingredient']:
-                    detected_ingredients.append(label_text)
+        return {'ingredients': validated_ingredients, 'unverified': unverified, 'cached': False}
 
-            # Remove duplicates and return unique ingredients
-            unique_ingredients = list(set(detected_ingredients))
-            
-            # Validate and correct ingredients using food validation service (which uses Open Food Facts API)
-            validated_ingredients = []
-            validation_results = []
+    def _candidate_labels(self, annotations):
+        """
+        Confident, food-specific labels, normalized and deduplicated, most
+        confident first, at most VISION_MAX_LABELS of them
+        """
+        labels = []
+        seen = set()
+        for label in sorted(annotations, key=lambda a: a.score, reverse=True):
+            # Topicality is 0 when the API doesn't report it
+            if label.score < Config.VISION_MIN_LABEL_SCORE:
+                continue
+            if label.topicality and label.topicality < Config.VISION_MIN_LABEL_TOPICALITY:
+                continue
             
-            for ingredient in unique_ingredients[:15]:  # Increased limit to get more candidates
-                validation_result = self.food_validator.validate_ingredient(ingredient, prioritize_api=True)
-                validation_results.append(validation_result)
-                
-                if validation_result['is_valid']:
-                    validated_ingredients.append(validation_result['corrected'])
-                else:
-                    # If not valid, try to use the best suggestion
-                    if validation_result['suggestions']:
-                        validated_ingredients.append(validation_result['suggestions'][0])
-                    else:
-                        # Keep the original if no suggestions available
-                        validated_ingredients.append(ingredient)
+            label_text = normalize_name(label.description)
+            # Only filter out very short or non-descriptive labels
+            if len(label_text) <= 2 or label_text in GENERIC_LABELS or label_text in seen:
+                continue
+            seen.add(label_text)
+            labels.append(label_text)
+        return labels[:Config.VISION_MAX_LABELS]
+
+    def detect_ingredients_batch(self, image_files):
+        """
+        Detect ingredients across several photos of one pantry with one backend
+        batch call (a single batch_annotate_images request for Google Vision)
+        and one validation pass.
+        
+        Labels are merged and deduplicated across images before validation, so
+        a label seen in several photos is validated once. Images answered from
+        the image hash cache are not sent to Vision.
+        
+        Returns:
+            dict: 'images' (per-image 'ingredients', 'unverified', 'cached' and
+            'error'), plus merged 'ingredients' and 'unverified'
+        """
+        images = [{'ingredients': [], 'unverified': [], 'cached': False, 'error': None} for _ in image_files]
+        prepared_images = [None] * len(image_files)
+        pending = []
+        
+        for index, image_file in enumerate(image_files):
+            # A bad photo fails on its own instead of failing the whole batch
+            try:
+                prepared = prepare_image(image_file)
+            except ImagePreprocessingError as e:
+                images[index]['error'] = str(e)
+                continue
+            prepared_images[index] = prepared
             
-            # If no ingredients detected, return some common ones as fallback
-            if not validated_ingredients:
-                validated_ingredients = ['tomato', 'onion', 'garlic']
+            if prepared.dhash is not None:
+                cached = image_hash_cache.lookup(prepared.dhash)
+                if cached is not None:
+                    images[index].update(ingredients=list(cached), cached=True)
+                    continue
+            pending.append(index)
+        
+        image_labels = {}
+        if pending:
+            results = self.backend.detect_labels_batch([prepared_images[index].content for index in pending])
+            for index, result in zip(pending, results):
+                if result.error:
+                    images[index]['error'] = result.error
+                    continue
+                image_labels[index] = self._candidate_labels(result.labels)
+        
+        # One validation pass over the union of all labels
+        merged_labels = list(dict.fromkeys(label for labels in image_labels.values() for label in labels))
+        resolved, unverified = self._resolve_labels(merged_labels)
+        
+        for index, labels in image_labels.items():
+            ingredients, image_unverified = self._collect_ingredients(labels, resolved, unverified)
+            images[index].update(ingredients=ingredients, unverified=image_unverified)
+            dhash = prepared_images[index].dhash
+            if dhash is not None and ingredients and not image_unverified:
+                image_hash_cache.put(dhash, tuple(ingredients))
+        
+        merged_ingredients = list(dict.fromkeys(
+            ingredient for image in images for ingredient in image['ingredients']
+        ))
+        print(f"Vision batch: {len(image_files)} images, {len(pending)} sent, "
+              f"{len(merged_labels)} unique labels, {len(merged_ingredients)} ingredients")
+        return {
+            'images': images,
+            'ingredients': merged_ingredients,
+            'unverified': [label for label in merged_labels if label in unverified]
+        }
 
-            return validated_ingredients
+    def _validate_labels(self, labels):
+        """
+        Resolve labels from the local catalog first, then validate the rest
+        against Open Food Facts concurrently under VISION_VALIDATION_DEADLINE.
+        
+        Returns (validated ingredients in label order, unverified labels).
+        """
+        resolved, unverified = self._resolve_labels(labels)
+        return self._collect_ingredients(labels, resolved, unverified)
+
+    def _resolve_labels(self, labels):
+        """
+        Map each label to its ingredient name: local catalog first, then Open
+        Food Facts on the validation pool under VISION_VALIDATION_DEADLINE.
+        
+        Returns ({label: ingredient}, set of labels that couldn't be validated in time).
+        """
+        results = {}
+        remote = []
+        for label in labels:
+            local_result = self.food_validator.resolve_locally(label)
+            if local_result:
+                results[label] = local_result
+            else:
+                remote.append(label)
+        
+        unverified = set()
+        if remote:
+            # Running lookups can't be cancelled, so each one is bounded by the
+            # deadline itself and frees its pool thread soon after it passes
+            deadline = time.monotonic() + Config.VISION_VALIDATION_DEADLINE
+            futures = {
+                # Each task runs in a copy of the request's context (tracing and similar context vars)
+                _validation_pool.submit(
+                    contextvars.copy_context().run,
+                    _validate_before, self.food_validator, label, deadline
+                ): label
+                for label in remote
+            }
+            done, not_done = wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+            for future in done:
+                try:
+                    results[futures[future]] = future.result()
+                except Exception as e:
+                    print(f"Validation failed for '{futures[future]}': {str(e)}")
+                    unverified.add(futures[future])
+            for future in not_done:
+                unverified.add(futures[future])
+            if not_done:
+                print(f"Label validation deadline hit, unverified: {[futures[f] for f in not_done]}")
+        
+        resolved = {}
+        for label, validation_result in results.items():
+            if validation_result['is_valid']:
+                resolved[label] = validation_result['corrected']
+            elif validation_result['suggestions']:
+                # If not valid, try to use the best suggestion
+                resolved[label] = validation_result['suggestions'][0]
+            else:
+                # Keep the original if no suggestions available
+                resolved[label] = label
+        return resolved, unverified
 
-        except Exception as e:
-            print(f"Error detecting ingredients: {str(e)}")
-            return ['tomato', 'onion', 'garlic']  # Fallback ingredients
\ No newline at end of file
+    @staticmethod
+    def _collect_ingredients(labels, resolved, unverified):
+        """(deduplicated ingredients, unverified labels) for one image's labels, in label order"""
+        ingredients = list(dict.fromkeys(resolved[label] for label in labels if label in resolved))
+        return ingredients, [label for label in labels if label in unverified]
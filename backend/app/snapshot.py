@@ -0,0 +1,183 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import numpy as np
+from .cache import registered_caches
+from .config import Config
+
+# Bump when the layout of any section changes; older snapshots are ignored
+SNAPSHOT_VERSION = 2
+
+# Caches worth carrying across restarts, with a decoder for values that JSON
+# can't round-trip (tuples come back as lists)
+SNAPSHOT_CACHES = {
+    'ingredient_ids': None,
+    'nutrition_per_100g': None,
+    'recipe_bodies': None,
+    'image_ingredients': tuple,
+}
+
+# Keyed or valued by database ids; only restored into the database they came from
+DATABASE_CACHES = {'ingredient_ids', 'recipe_bodies'}
+
+_PANTRY_PREFIX = 'pantry_'
+
+# Identity of this process's database (see database_identity), written with every snapshot
+_database_identity = None
+
+_timer_lock = threading.Lock()
+_timer_pid = None
+
+def _recipe_service():
+    # Imported lazily: the routes module builds services at import
+    from .routes import recipes
+    return recipes._recipe_service
+
+def database_identity(app):
+    """
+    Fingerprint of the app's database: its URL without the password plus the
+    oldest ingredient row, so a different or recreated database doesn't match.
+    None if the database can't be reached.
+    """
+    from .database import db
+    from .models import Ingredient
+    try:
+        with app.app_context():
+            url = db.engine.url.render_as_string(hide_password=True)
+            oldest = db.session.query(
+                Ingredient.id, Ingredient.name, Ingredient.created_at
+            ).order_by(Ingredient.id).first()
+            db.session.remove()
+    except Exception as e:
+        print(f"Could not identify the database for snapshots: {str(e)}", flush=True)
+        return None
+    return hashlib.sha256(f'{url}|{tuple(oldest) if oldest else None}'.encode('utf-8')).hexdigest()[:16]
+
+def _collect():
+    """(meta dict, {name: array}) describing this process's warm state"""
+    caches = {name: cache for name, cache in registered_caches().items() if name in SNAPSHOT_CACHES}
+    meta = {
+        'version': SNAPSHOT_VERSION,
+        'created_at': time.time(),
+        'pid': os.getpid(),
+        'database': _database_identity,
+        'caches': {name: cache.items() for name, cache in caches.items()},
+    }
+
+    recipe_service = _recipe_service()
+    if recipe_service is not None and recipe_service.gemini_model_name:
+        meta['gemini_model'] = recipe_service.gemini_model_name
+
+    arrays = {}
+    from .services.pantry_search_service import pantry_index
+    pantry_arrays = pantry_index.export_arrays()
+    if pantry_arrays is not None:
+        arrays.update({_PANTRY_PREFIX + name: value for name, value in pantry_arrays.items()})
+    return meta, arrays
+
+def save_snapshot(path=None):
+    """
+    Write the warm in-memory state to one uncompressed .npz file: the pantry
+    index as flat arrays plus a JSON 'meta' entry holding the caches and the
+    Gemini model choice. Written to a temp file and renamed, so readers never
+    see a partial snapshot. Returns the path, or None if disabled or failed.
+    """
+    if not Config.SNAPSHOT_ENABLED:
+        return None
+    path = path or Config.SNAPSHOT_PATH
+    try:
+        start = time.perf_counter()
+        meta, arrays = _collect()
+        arrays['meta'] = np.frombuffer(json.dumps(meta).encode('utf-8'), dtype=np.uint8)
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+        print(f"Snapshot saved to {path} ({os.path.getsize(path)} bytes, "
+              f"{(time.perf_counter() - start) * 1000:.1f} ms)", flush=True)
+        return path
+    except Exception as e:
+        print(f"Snapshot save failed: {str(e)}", flush=True)
+        return None
+
+def restore_snapshot(path=None, app=None):
+    """
+    Load a snapshot written by save_snapshot() into this process's caches and
+    pantry index. Missing, stale (SNAPSHOT_MAX_AGE_SECONDS) or other-version
+    snapshots are ignored. With `app`, its database identity is recorded for
+    later saves, and the id-keyed state (DATABASE_CACHES, the pantry index)
+    is only restored from a snapshot of the same database. Returns True if
+    state was restored.
+    """
+    global _database_identity
+    if not Config.SNAPSHOT_ENABLED:
+        return False
+    if app is not None:
+        _database_identity = database_identity(app)
+    path = path or Config.SNAPSHOT_PATH
+    if not os.path.exists(path):
+        return False
+    try:
+        start = time.perf_counter()
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(data['meta'].tobytes())
+            if meta.get('version') != SNAPSHOT_VERSION:
+                print(f"Ignoring snapshot {path}: version {meta.get('version')} != {SNAPSHOT_VERSION}", flush=True)
+                return False
+            if time.time() - meta.get('created_at', 0) > Config.SNAPSHOT_MAX_AGE_SECONDS:
+                print(f"Ignoring snapshot {path}: older than {Config.SNAPSHOT_MAX_AGE_SECONDS} s", flush=True)
+                return False
+            same_database = _database_identity is not None and meta.get('database') == _database_identity
+            pantry_arrays = {
+                name[len(_PANTRY_PREFIX):]: data[name]
+                for name in data.files if name.startswith(_PANTRY_PREFIX)
+            } if same_database else {}
+        if not same_database:
+            print(f"Snapshot {path} is from another database; skipping ids and the pantry index", flush=True)
+
+        caches = registered_caches()
+        for name, items in meta.get('caches', {}).items():
+            cache = caches.get(name)
+            if cache is None or name not in SNAPSHOT_CACHES:
+                continue
+            if name in DATABASE_CACHES and not same_database:
+                continue
+            decode = SNAPSHOT_CACHES[name]
+            # Items are stored least recently used first, so replaying put() keeps the order
+            for key, value in items:
+                cache.put(key, decode(value) if decode else value)
+
+        if pantry_arrays:
+            from .services.pantry_search_service import pantry_index
+            pantry_index.restore_arrays(pantry_arrays)
+
+        if meta.get('gemini_model'):
+            from .services.recipe_service import RecipeService
+            RecipeService.known_gemini_model = meta['gemini_model']
+
+        print(f"Snapshot restored from {path} in {(time.perf_counter() - start) * 1000:.1f} ms", flush=True)
+        return True
+    except Exception as e:
+        print(f"Snapshot restore failed, starting cold: {str(e)}", flush=True)
+        return False
+
+def start_periodic_snapshots():
+    """Save a snapshot every SNAPSHOT_INTERVAL_SECONDS from a daemon thread, once per process"""
+    global _timer_pid
+    if not Config.SNAPSHOT_ENABLED or Config.SNAPSHOT_INTERVAL_SECONDS <= 0:
+        return
+    with _timer_lock:
+        if _timer_pid == os.getpid():
+            return
+        _timer_pid = os.getpid()
+
+    def run():
+        while True:
+            time.sleep(Config.SNAPSHOT_INTERVAL_SECONDS)
+            save_snapshot()
+
+    threading.Thread(target=run, name='snapshot', daemon=True).start()
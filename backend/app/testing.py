@@ -0,0 +1,41 @@
+"""
+pytest plugin with query-budget helpers. Enable it in a conftest.py:
+
+    pytest_plugins = ['app.testing']
+
+and assert how many statements an endpoint may run:
+
+    def test_my_recipes_query_budget(client, auth_headers, query_budget):
+        with query_budget(4):
+            client.get('/api/recipes/my-recipes', headers=auth_headers)
+"""
+from contextlib import contextmanager
+import pytest
+from .query_stats import N_PLUS_ONE_THRESHOLD, count_queries
+
+def _describe(stats):
+    lines = [f'  {count}x {shape[:160]}' for shape, count in stats.shapes.most_common()]
+    return '\n'.join(lines) or '  (none)'
+
+@contextmanager
+def assert_query_budget(max_queries, allow_n_plus_one=False, n_plus_one_threshold=N_PLUS_ONE_THRESHOLD):
+    """
+    Fail if the block runs more than `max_queries` SQL statements or, unless
+    `allow_n_plus_one`, repeats one SELECT shape `n_plus_one_threshold` times.
+    """
+    with count_queries() as stats:
+        yield stats
+
+    assert stats.count <= max_queries, (
+        f'Expected at most {max_queries} queries, got {stats.count}:\n{_describe(stats)}'
+    )
+    if not allow_n_plus_one:
+        suspects = stats.suspected_n_plus_one(n_plus_one_threshold)
+        assert not suspects, (
+            f'Suspected N+1: {suspects[0][1]}x {suspects[0][0][:160]}\n{_describe(stats)}'
+        )
+
+@pytest.fixture
+def query_budget():
+    """Context manager factory: `with query_budget(3): ...` (see assert_query_budget)"""
+    return assert_query_budget
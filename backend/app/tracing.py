@@ -0,0 +1,318 @@
+import os
+import json
+import time
+import queue
+import atexit
+import secrets
+import threading
+import contextvars
+from contextlib import contextmanager
+from flask import g, request
+
+# Optional OpenTelemetry SDK + OTLP exporter (TRACING_EXPORTER=otel)
+try:
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import ReadableSpan
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    from opentelemetry.trace import SpanContext, SpanKind, Status, StatusCode, TraceFlags
+    OTEL_AVAILABLE = True
+except ImportError:
+    OTEL_AVAILABLE = False
+
+from .config import Config
+from .metrics import observe_outbound
+
+# Trace of the request being handled; copied into pool threads with contextvars.copy_context()
+_current_trace = contextvars.ContextVar('current_trace', default=None)
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+def _new_id(n_bytes):
+    return secrets.token_hex(n_bytes)
+
+class Span:
+    """One timed operation: the request itself or an outbound call made while handling it"""
+
+    __slots__ = ('name', 'kind', 'trace_id', 'span_id', 'parent_id', 'start_ns', 'duration_ms',
+                 'outcome', 'error', 'attributes', '_start')
+
+    def __init__(self, name, kind, trace_id, parent_id=None, **attributes):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.duration_ms = None
+        self.outcome = 'ok'
+        self.error = None
+        self.attributes = {k: v for k, v in attributes.items() if v is not None}
+        self._start = time.perf_counter()
+
+    def set(self, **attributes):
+        """Record attributes such as response_bytes, input_tokens or output_tokens"""
+        self.attributes.update((k, v) for k, v in attributes.items() if v is not None)
+
+    def fail(self, error):
+        """Mark the call as failed without an exception (e.g. an error status in the response)"""
+        self.outcome = 'error'
+        self.error = str(error)[:300]
+
+    def finish(self):
+        self.duration_ms = round((time.perf_counter() - self._start) * 1000, 2)
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'kind': self.kind,
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'start_ns': self.start_ns,
+            'duration_ms': self.duration_ms,
+            'outcome': self.outcome,
+            'error': self.error,
+            'attributes': self.attributes,
+        }
+
+class RequestTrace:
+    """The request span plus the outbound spans recorded under it (from any thread)"""
+
+    def __init__(self, root):
+        self.root = root
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def provider_totals(self):
+        """provider -> (calls, total ms), for the Server-Timing header"""
+        totals = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            provider = span.attributes.get('provider', span.name)
+            calls, total = totals.get(provider, (0, 0.0))
+            totals[provider] = (calls + 1, total + (span.duration_ms or 0.0))
+        return totals
+
+@contextmanager
+def outbound_span(provider, operation, model=None, **attributes):
+    """
+    Time an outbound call to an external provider and attach it to the current
+    request's trace (or a trace of its own outside a request):
+
+        with outbound_span('groq', 'chat.completions.create', model=name, request_bytes=len(prompt)) as span:
+            completion = client.chat.completions.create(...)
+            span.set(input_tokens=completion.usage.prompt_tokens)
+
+    Exceptions mark the span as failed and propagate unchanged.
+    """
+    trace = _current_trace.get()
+    if trace is not None:
+        trace_id, parent_id = trace.root.trace_id, trace.root.span_id
+    else:
+        trace_id, parent_id = _new_id(16), None
+
+    span = Span(f'{provider} {operation}', 'client', trace_id, parent_id,
+                provider=provider, operation=operation, model=model, **attributes)
+    try:
+        yield span
+    except BaseException as e:
+        span.fail(f'{type(e).__name__}: {e}')
+        raise
+    finally:
+        span.finish()
+        observe_outbound(provider, operation, span.outcome, span.duration_ms / 1000)
+        if trace is not None:
+            trace.add(span)
+        elif Config.TRACING_ENABLED:
+            export_spans([span])
+
+def _parse_traceparent(header):
+    """(trace_id, parent span id) from a W3C traceparent header, or (None, None)"""
+    parts = (header or '').split('-')
+    if len(parts) == 4 and len(parts[1]) == 32 and len(parts[2]) == 16:
+        try:
+            int(parts[1], 16), int(parts[2], 16)
+        except ValueError:
+            return None, None
+        if parts[1] != '0' * 32:
+            return parts[1], parts[2]
+    return None, None
+
+class JsonLinesExporter:
+    """
+    Appends one JSON object per span to a local file (one line per span).
+    Spans are queued and written in batches by a background thread, so
+    request teardown never waits on disk; when the queue is full, spans are
+    dropped and counted. The file is rotated to <path>.1 once it grows past
+    `max_bytes`.
+    """
+
+    def __init__(self, path, max_bytes=None, queue_size=None):
+        self.path = path
+        self.max_bytes = max_bytes or Config.TRACING_JSONL_MAX_BYTES
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size or Config.TRACING_QUEUE_SIZE)
+        self._thread = threading.Thread(target=self._run, name='trace-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def export(self, spans):
+        for span in spans:
+            try:
+                self._queue.put_nowait(span)
+            except queue.Full:
+                self.dropped += 1
+
+    def flush(self):
+        """Wait until every queued span has been written"""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            spans = [self._queue.get()]
+            while True:
+                try:
+                    spans.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(spans)
+            except Exception as e:
+                print(f"Trace export failed: {str(e)}")
+            finally:
+                for _ in spans:
+                    self._queue.task_done()
+
+    def _write(self, spans):
+        lines = ''.join(json.dumps(span.to_dict(), separators=(',', ':')) + '\n' for span in spans)
+        try:
+            if os.path.getsize(self.path) >= self.max_bytes:
+                # Workers share the file; whichever notices first rotates it
+                os.replace(self.path, self.path + '.1')
+        except FileNotFoundError:
+            pass
+        # O_APPEND keeps lines from different workers intact
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(lines)
+        if self.dropped:
+            print(f"Tracing queue full: dropped {self.dropped} spans")
+            self.dropped = 0
+
+class OtlpExporter:
+    """
+    Sends spans to an OpenTelemetry collector over OTLP/HTTP. Endpoint and
+    headers come from the standard OTEL_EXPORTER_OTLP_* environment variables.
+    """
+
+    def __init__(self, service_name):
+        if not OTEL_AVAILABLE:
+            raise RuntimeError('opentelemetry-sdk and opentelemetry-exporter-otlp-proto-http are not installed')
+        self.resource = Resource.create({'service.name': service_name})
+        self.processor = BatchSpanProcessor(OTLPSpanExporter())
+
+    def _context(self, trace_id, span_id):
+        return SpanContext(int(trace_id, 16), int(span_id, 16), is_remote=False, trace_flags=TraceFlags(TraceFlags.SAMPLED))
+
+    def export(self, spans):
+        for span in spans:
+            end_ns = span.start_ns + int((span.duration_ms or 0) * 1_000_000)
+            status = Status(StatusCode.ERROR, span.error) if span.outcome == 'error' else Status(StatusCode.OK)
+            self.processor.on_end(ReadableSpan(
+                name=span.name,
+                context=self._context(span.trace_id, span.span_id),
+                parent=self._context(span.trace_id, span.parent_id) if span.parent_id else None,
+                resource=self.resource,
+                attributes=span.attributes,
+                kind=SpanKind.CLIENT if span.kind == 'client' else SpanKind.SERVER,
+                status=status,
+                start_time=span.start_ns,
+                end_time=end_ns,
+            ))
+
+def _create_exporter():
+    name = Config.TRACING_EXPORTER
+    if name == 'jsonl':
+        return JsonLinesExporter(Config.TRACING_JSONL_PATH)
+    if name == 'otel':
+        return OtlpExporter(Config.TRACING_SERVICE_NAME)
+    return None
+
+def export_spans(spans):
+    """Hand finished spans to the configured exporter; export errors are logged, not raised"""
+    global _exporter
+    if _exporter is None:
+        with _exporter_lock:
+            if _exporter is None:
+                try:
+                    _exporter = _create_exporter() or False
+                except Exception as e:
+                    print(f"Tracing exporter '{Config.TRACING_EXPORTER}' unavailable: {str(e)}")
+                    _exporter = False
+    if not _exporter:
+        return
+    try:
+        _exporter.export(spans)
+    except Exception as e:
+        print(f"Trace export failed: {str(e)}")
+
+def init_tracing(app):
+    """
+    Open a trace for every request, collect the outbound spans recorded while
+    handling it, summarise them per provider in a Server-Timing header, and
+    export the request span and its children when the request ends.
+    """
+    if not app.config.get('TRACING_ENABLED', True):
+        return
+
+    @app.before_request
+    def start_trace():
+        trace_id, parent_id = _parse_traceparent(request.headers.get('traceparent'))
+        root = Span(f'{request.method} {request.path}', 'server', trace_id or _new_id(16), parent_id,
+                    method=request.method)
+        trace = RequestTrace(root)
+        g._trace_token = _current_trace.set(trace)
+        g._trace = trace
+
+    @app.after_request
+    def add_server_timing(response):
+        trace = g.get('_trace')
+        if trace is not None:
+            totals = trace.provider_totals()
+            if totals:
+                response.headers['Server-Timing'] = ', '.join(
+                    f'{provider};dur={total:.1f};desc="{calls} call{"s" if calls != 1 else ""}"'
+                    for provider, (calls, total) in totals.items()
+                )
+            trace.root.set(status=response.status_code)
+            if response.status_code >= 500:
+                trace.root.fail(f'HTTP {response.status_code}')
+        return response
+
+    @app.teardown_request
+    def finish_trace(error=None):
+        trace = g.pop('_trace', None)
+        token = g.pop('_trace_token', None)
+        if trace is None:
+            return
+        if token is not None:
+            _current_trace.reset(token)
+
+        root = trace.root
+        rule = request.url_rule
+        root.set(route=rule.rule if rule is not None else None)
+        if error is not None:
+            root.fail(f'{type(error).__name__}: {error}')
+        root.finish()
+        # Skip requests that made no outbound calls unless asked to keep them all
+        if trace.spans or app.config.get('TRACING_ALL_REQUESTS'):
+            export_spans([root] + trace.spans)
@@ -0,0 +1,126 @@
+import os
+import time
+import threading
+from contextlib import ExitStack
+from sqlalchemy import text
+from .config import Config
+from .database import db
+from .metrics import observe_warmup
+
+# Per-process warm-up state; reset in each forked worker (see start_warmup)
+_lock = threading.Lock()
+_ready = threading.Event()
+_state = {'pid': None, 'status': 'pending', 'started_at': None, 'duration_ms': None, 'steps': {}}
+
+def _warm_database():
+    """Open pool connections up front so the first requests don't pay TCP/TLS/auth setup"""
+    pool_size = getattr(db.engine.pool, 'size', lambda: 1)()
+    with ExitStack() as stack:
+        for _ in range(max(1, min(Config.WARMUP_DB_CONNECTIONS, pool_size))):
+            connection = stack.enter_context(db.engine.connect())
+            connection.execute(text('SELECT 1'))
+
+def _warm_llm_clients():
+    from .routes.recipes import get_recipe_service
+    get_recipe_service()
+
+def _warm_vision():
+    from .routes.recipes import get_vision_service
+    get_vision_service()
+
+def _warm_nutrition():
+    from .routes.recipes import get_nutrition_service
+    get_nutrition_service()
+
+def _warm_food_validation():
+    # First fuzzy match loads the Levenshtein extension; the catalog set is built in __init__
+    from .routes.recipes import food_validation_service
+    food_validation_service.validate_ingredient('tomatoe')
+    food_validation_service.autocomplete_ingredients('tom', limit=1)
+
+def _warm_password_hasher():
+    # Starts the hashing processes
+    from .services.password_hasher import password_hasher
+    password_hasher.start()
+
+def _warm_pantry_index():
+    from .services.pantry_search_service import pantry_index
+    pantry_index.ensure_fresh()
+
+# (name, function) in run order; each runs inside an app context
+WARMUP_STEPS = [
+    ('database', _warm_database),
+    ('llm_clients', _warm_llm_clients),
+    ('vision', _warm_vision),
+    ('nutrition', _warm_nutrition),
+    ('food_validation', _warm_food_validation),
+    ('password_hasher', _warm_password_hasher),
+    ('pantry_index', _warm_pantry_index),
+]
+
+def run_warmup(app):
+    """
+    Run every warm-up step in order, recording per-step timings. A failing
+    step is logged and recorded but doesn't stop the others: the lazy getters
+    still work (or report the error) on first use.
+    """
+    start = time.perf_counter()
+    with app.app_context():
+        for name, step in WARMUP_STEPS:
+            step_start = time.perf_counter()
+            try:
+                step()
+                _state['steps'][name] = {'ok': True, 'duration_ms': round((time.perf_counter() - step_start) * 1000, 1)}
+            except Exception as e:
+                print(f"Warm-up step '{name}' failed: {str(e)}", flush=True)
+                _state['steps'][name] = {
+                    'ok': False,
+                    'duration_ms': round((time.perf_counter() - step_start) * 1000, 1),
+                    'error': str(e)
+                }
+        # Don't keep warm-up's checked-out session around in this thread
+        db.session.remove()
+
+    _state['duration_ms'] = round((time.perf_counter() - start) * 1000, 1)
+    observe_warmup(_state['duration_ms'] / 1000)
+    _state['status'] = 'ready'
+    _ready.set()
+    print(f"Warm-up finished in {_state['duration_ms']} ms (pid {os.getpid()})", flush=True)
+
+def start_warmup(app):
+    """
+    Start warm-up in a background thread, once per process. Safe to call
+    again after a fork: a worker forked from a warmed (or warming) parent
+    starts over, since threads, sockets and gRPC channels don't survive fork.
+    """
+    global _ready
+    with _lock:
+        if _state['pid'] == os.getpid():
+            return
+        _ready = threading.Event()
+        _state.update(pid=os.getpid(), status='warming', started_at=time.time(), duration_ms=None, steps={})
+
+        if not Config.WARMUP_ENABLED:
+            _state['status'] = 'ready'
+            _state['duration_ms'] = 0.0
+            _ready.set()
+            return
+
+        threading.Thread(target=run_warmup, args=(app,), name='warmup', daemon=True).start()
+
+def skip_warmup():
+    """Report ready right away in a process that doesn't warm up (WARMUP_MODE=off)"""
+    with _lock:
+        _state.update(pid=os.getpid(), status='off', started_at=None, duration_ms=0.0, steps={})
+        _ready.set()
+
+def is_ready():
+    return _ready.is_set()
+
+def warmup_status():
+    """Status, total duration and per-step timings for /ready and /health"""
+    return {
+        'status': _state['status'],
+        'duration_ms': _state['duration_ms'],
+        'steps': dict(_state['steps'])
+    }
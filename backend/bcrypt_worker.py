@@ -0,0 +1,14 @@
+# bcrypt_worker.py - functions run in the password hashing pool's processes
+# (app/services/password_hasher.py). Deliberately outside the app package and
+# importing nothing but bcrypt: pool children import this module to unpickle
+# the calls, and importing `app` would load the whole Flask app into each one.
+import bcrypt
+
+def hashpw(password, rounds):
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds))
+
+def checkpw(password, password_hash):
+    return bcrypt.checkpw(password, password_hash)
+
+def noop():
+    return None
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cold start from scratch vs. restoring a warm-state snapshot.
+
+Fills the pantry search index and the snapshotted caches with synthetic data
+(what a worker accumulates after serving for a while), then compares:
+
+  rebuild  - indexing every recipe row again (as _load_from_db does, minus the
+             database round trip itself) and refilling the caches entry by entry
+  restore  - app.snapshot.restore_snapshot() from the file save_snapshot() wrote
+
+and checks that the restored index answers searches exactly like the original.
+
+Run from the backend directory:
+    python benchmarks/bench_cold_start.py [--recipes 20000] [--ingredients 2000]
+"""
+
+import os
+import sys
+import time
+import random
+import tempfile
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.cache import registered_caches
+import app.snapshot
+from app.snapshot import save_snapshot, restore_snapshot, SNAPSHOT_CACHES
+from app.services.pantry_search_service import pantry_index
+from app.services.image_hash_cache import image_hash_cache
+import app.models.recipe  # registers recipe_bodies
+import app.services.nutrition_service  # registers nutrition_per_100g
+
+def synthetic_state(num_recipes, num_ingredients, seed=0):
+    """(recipe rows, {cache name: [(key, value)]}) shaped like production data"""
+    rng = random.Random(seed)
+    # Zipf-like popularity: a few staples appear in most recipes
+    weights = [1.0 / (rank + 1) for rank in range(num_ingredients)]
+    rows = [
+        (recipe_id, rng.randint(0, 50),
+         [f'ingredient {i}' for i in rng.choices(range(1, num_ingredients + 1), weights, k=rng.randint(4, 14))])
+        for recipe_id in range(1, num_recipes + 1)
+    ]
+    caches = {
+        'ingredient_ids': [(f'ingredient {i}', i) for i in range(1, num_ingredients + 1)],
+        'nutrition_per_100g': [
+            (f'ingredient {i}', {'calories': rng.uniform(10, 900), 'protein_g': rng.uniform(0, 40),
+                                 'fat_total_g': rng.uniform(0, 100), 'carbohydrates_total_g': rng.uniform(0, 90),
+                                 'source': 'calorieninjas'})
+            for i in range(1, num_ingredients + 1)
+        ],
+        'recipe_bodies': [(i, '## Steps\n' + 'Chop, stir and simmer. ' * 120) for i in range(1, 257)],
+        'image_ingredients': [(rng.getrandbits(64), ('tomato', 'onion', 'garlic')) for _ in range(512)],
+    }
+    return rows, caches
+
+def rebuild(rows, caches):
+    pantry_index.__init__()
+    for recipe_id, user_id, ingredient_names in rows:
+        pantry_index._add(recipe_id, user_id, ingredient_names)
+    pantry_index._built = True
+    registry = registered_caches()
+    for name, items in caches.items():
+        for key, value in items:
+            registry[name].put(key, value)
+
+def reset():
+    pantry_index.__init__()
+    for name, cache in registered_caches().items():
+        if name in SNAPSHOT_CACHES:
+            cache.clear()
+
+def search_all(queries):
+    return [pantry_index.search(query, limit=10) for query in queries]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--recipes', type=int, default=20000)
+    parser.add_argument('--ingredients', type=int, default=2000)
+    args = parser.parse_args()
+
+    rows, caches = synthetic_state(args.recipes, args.ingredients)
+    rng = random.Random(1)
+    queries = [[f'ingredient {i}' for i in rng.sample(range(1, 200), 8)] for _ in range(50)]
+    path = os.path.join(tempfile.mkdtemp(), 'warm_state.npz')
+    # No database here; stand in for one so the id-keyed state is restored
+    app.snapshot._database_identity = 'benchmark'
+
+    # Keep the snapshot module's own logging out of the report
+    stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+    try:
+        reset()
+        start = time.perf_counter()
+        rebuild(rows, caches)
+        rebuild_ms = (time.perf_counter() - start) * 1000
+        expected = search_all(queries)
+
+        start = time.perf_counter()
+        save_snapshot(path)
+        save_ms = (time.perf_counter() - start) * 1000
+
+        reset()
+        start = time.perf_counter()
+        restored = restore_snapshot(path)
+        restore_ms = (time.perf_counter() - start) * 1000
+        actual = search_all(queries)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    print(f"State: {args.recipes:,} recipes, {args.ingredients:,} ingredients, "
+          f"{sum(len(items) for items in caches.values()):,} cache entries")
+    print(f"  rebuild from rows      {rebuild_ms:9.1f} ms  (plus the database queries in production)")
+    print(f"  save snapshot          {save_ms:9.1f} ms  ({os.path.getsize(path) / 1e6:.2f} MB)")
+    print(f"  restore snapshot       {restore_ms:9.1f} ms")
+    print(f"  image hash cache after restore: {image_hash_cache.stats()['size']} hashes")
+
+    ok = restored and actual == expected
+    print(f"Restored index matches original: {'yes' if ok else 'NO'}")
+    sys.exit(0 if ok else 1)
+
+if __name__ == '__main__':
+    main()
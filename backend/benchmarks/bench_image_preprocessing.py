@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark: image preprocessing before Vision label detection.
+
+Generates phone-sized sample photos (smooth gradients plus sensor-like noise,
+saved as high-quality JPEG/PNG like a camera would) and reports, per sample,
+upload bytes before and after prepare_image() and the time it takes. The
+bytes saved are bytes Vision no longer has to receive and decode.
+
+Run from the backend directory:
+    python benchmarks/bench_image_preprocessing.py [--repeat 5]
+"""
+
+import io
+import os
+import sys
+import time
+import argparse
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.image_preprocessing import prepare_image
+
+# (label, width, height, extension, encode params)
+SAMPLES = [
+    ('12MP phone photo', 4032, 3024, '.jpg', [cv2.IMWRITE_JPEG_QUALITY, 95]),
+    ('8MP photo', 3264, 2448, '.jpg', [cv2.IMWRITE_JPEG_QUALITY, 92]),
+    ('4MP screenshot', 2560, 1600, '.png', []),
+    ('small photo', 800, 600, '.jpg', [cv2.IMWRITE_JPEG_QUALITY, 90]),
+]
+
+def synthetic_photo(width, height, seed=0):
+    """A photo-like image: smooth colour regions with fine noise"""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    image = np.empty((height, width, 3), dtype=np.float32)
+    for channel in range(3):
+        fx, fy = rng.uniform(1, 6, size=2)
+        image[..., channel] = 127 + 100 * np.sin(x / width * fx * np.pi) * np.cos(y / height * fy * np.pi)
+    image += rng.normal(0, 12, size=image.shape)
+    return np.clip(image, 0, 255).astype(np.uint8)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'sample':<18} {'input':>10} {'output':>10} {'ratio':>7} {'size':>11} {'ms':>8}")
+    for label, width, height, extension, params in SAMPLES:
+        ok, encoded = cv2.imencode(extension, synthetic_photo(width, height), params)
+        data = encoded.tobytes()
+
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            prepared = prepare_image(io.BytesIO(data))
+            timings.append(time.perf_counter() - start)
+
+        print(f"{label:<18} {len(data):>10,} {len(prepared.content):>10,} "
+              f"{len(data) / len(prepared.content):>6.1f}x {prepared.width:>5}x{prepared.height:<5} "
+              f"{min(timings) * 1000:>8.1f}")
+
+if __name__ == '__main__':
+    main()
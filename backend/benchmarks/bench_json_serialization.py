@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark: serialize a 10k-recipe dump.
+
+Compares the old hand-written to_dict() + json.dumps path with the attrgetter-based
+row serializers + orjson used by the app's JSON provider.
+
+Run from the backend directory:
+    python benchmarks/bench_json_serialization.py [--recipes 10000]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from app.models import Recipe
+from app.json_provider import OrjsonProvider, ORJSON_AVAILABLE
+
+MARKDOWN_BODY = (
+    "# Garlic Butter Chicken with Roasted Vegetables\n\n"
+    "## Ingredients\n" + "".join(f"- {i + 1} cup ingredient number {i}\n" for i in range(12)) +
+    "\n## Instructions\n" + "".join(f"{i + 1}. Do step {i} carefully, stirring every few minutes until golden.\n" for i in range(15)) +
+    "\n## Tips\n- Rest the chicken before slicing.\n"
+) * 3
+
+def legacy_to_dict(recipe):
+    """The pre-row_serializer Recipe.to_dict(), kept here for comparison"""
+    return {
+        'id': recipe.id,
+        'title': recipe.title,
+        'description': recipe.description,
+        'instructions': recipe.instructions or [],
+        'prep_time': recipe.prep_time,
+        'cook_time': recipe.cook_time,
+        'total_time': recipe.total_time,
+        'serving_size': recipe.serving_size,
+        'difficulty_level': recipe.difficulty_level,
+        'cuisine_type': recipe.cuisine_type,
+        'dietary_tags': recipe.dietary_tags or [],
+        'user_id': recipe.user_id,
+        'rating': recipe.rating,
+        'notes': recipe.notes,
+        'created_at': recipe.created_at.isoformat() if recipe.created_at else None,
+        'updated_at': recipe.updated_at.isoformat() if recipe.updated_at else None,
+        'last_made': recipe.last_made.isoformat() if recipe.last_made else None,
+        'times_made': recipe.times_made,
+        'ai_model_used': recipe.ai_model_used,
+        'generation_prompt': recipe.generation_prompt,
+        'is_saved': recipe.is_saved,
+        'original_ingredients': recipe.original_ingredients or [],
+        'ingredients': []
+    }
+
+def build_recipes(count):
+    """Create transient Recipe rows that look like real saved recipes"""
+    now = datetime.utcnow()
+    recipes = []
+    for i in range(count):
+        recipes.append(Recipe(
+            id=i + 1,
+            title=f"Recipe {i}",
+            description='',
+            instructions=MARKDOWN_BODY,
+            serving_size=2,
+            dietary_tags=['vegetarian'],
+            user_id=(i % 500) + 1,
+            created_at=now - timedelta(minutes=i),
+            updated_at=now - timedelta(minutes=i),
+            times_made=0,
+            ai_model_used='llama-3.1-8b-instant',
+            generation_prompt='Ingredients: chicken, garlic, butter',
+            is_saved=bool(i % 2),
+            original_ingredients=['chicken', 'garlic', 'butter']
+        ))
+    return recipes
+
+def timed(label, fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        payload = fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"  {label:<38} {best * 1000:9.1f} ms  ({len(payload) / 1e6:.1f} MB)")
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--recipes', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    recipes = build_recipes(args.recipes)
+    provider = OrjsonProvider(Flask(__name__))
+
+    print(f"Serializing {len(recipes)} recipes (orjson available: {ORJSON_AVAILABLE})")
+    legacy = timed(
+        'to_dict (legacy) + json.dumps',
+        lambda: json.dumps({'recipes': [legacy_to_dict(r) for r in recipes]}).encode('utf-8'),
+        args.repeat
+    )
+    fast = timed(
+        'row serializer + provider',
+        lambda: provider.dumps({'recipes': [r.to_dict() for r in recipes]}).encode('utf-8'),
+        args.repeat
+    )
+    print(f"  speedup: {legacy / fast:.2f}x")
+
+if __name__ == '__main__':
+    main()
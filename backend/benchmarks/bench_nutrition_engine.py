@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark: compute nutrition for a saved recipe locally.
+
+Times nutrition_engine.compute_recipe() on a typical 12-ingredient recipe whose
+per-100g data is already known, i.e. the path a saved recipe takes once every
+ingredient has been cached (no API calls).
+
+Run from the backend directory:
+    python benchmarks/bench_nutrition_engine.py [--iterations 5000]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.ingredient_parser import parse_ingredient
+from app.services import nutrition_engine
+
+RECIPE_LINES = [
+    "2 cups all-purpose flour",
+    "3 cloves garlic, minced",
+    "2 large eggs",
+    "1½ tbsp olive oil",
+    "1 cup fresh spinach",
+    "500g chicken breast",
+    "2 tomatoes, diced",
+    "1 can (400g) chickpeas",
+    "1/2 tsp ground cumin",
+    "1 cup rice",
+    "1 medium onion",
+    "salt",
+]
+
+PER_100G = {
+    'calories': 120.0, 'protein_g': 6.5, 'carbohydrates_total_g': 14.0, 'fat_total_g': 4.2,
+    'fat_saturated_g': 1.1, 'fiber_g': 2.0, 'sugar_g': 1.5, 'sodium_mg': 80.0,
+    'potassium_mg': 210.0, 'cholesterol_mg': 12.0,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--iterations', type=int, default=5000)
+    args = parser.parse_args()
+
+    rows = []
+    for line in RECIPE_LINES:
+        parsed = parse_ingredient(line)
+        rows.append((parsed.name, parsed.quantity, parsed.unit, PER_100G))
+
+    result = nutrition_engine.compute_recipe(rows, servings=4)
+    print(f"Per serving: {result['per_serving']}")
+
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        nutrition_engine.compute_recipe(rows, servings=4)
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(rows)} ingredients, {args.iterations} iterations: "
+          f"{elapsed / args.iterations * 1e6:.1f} µs per recipe")
+
+if __name__ == '__main__':
+    main()
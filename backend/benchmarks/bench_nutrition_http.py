@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark: nutrition API lookups, one-off requests vs the pooled service session.
+
+Starts a local stand-in for the CalorieNinjas API (threaded HTTP server with
+keep-alive and an optional simulated latency) and times sequential and
+concurrent lookups with:
+  - bare requests.get (a new connection per call, the old behaviour)
+  - NutritionService's pooled keep-alive session
+
+The stand-in speaks plain HTTP, so the numbers understate the saving against
+the real API, where every new connection also pays for a TLS handshake.
+
+Run from the backend directory:
+    python benchmarks/bench_nutrition_http.py [--requests 200] [--concurrency 8] [--latency-ms 5]
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.nutrition_service import NutritionService
+
+ITEM = {
+    'name': 'chicken', 'serving_size_g': 150.0, 'calories': 333.0, 'protein_g': 37.4,
+    'carbohydrates_total_g': 0.0, 'fat_total_g': 19.3, 'fat_saturated_g': 5.4, 'fiber_g': 0.0,
+    'sugar_g': 0.0, 'sodium_mg': 109.0, 'potassium_mg': 270.0, 'cholesterol_mg': 139.0,
+}
+
+def make_handler(latency_s):
+    body = json.dumps({'items': [ITEM]}).encode('utf-8')
+
+    class StandInHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # Keep-alive
+
+        def do_GET(self):
+            if latency_s:
+                time.sleep(latency_s)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StandInHandler
+
+def run(label, lookup, total, concurrency):
+    # The service logs every API response; keep that out of the timings
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        if concurrency == 1:
+            for _ in range(total):
+                lookup()
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                list(executor.map(lambda _: lookup(), range(total)))
+        elapsed = time.perf_counter() - start
+    print(f"  {label:<28} {elapsed * 1000:8.1f} ms total  {elapsed / total * 1000:6.2f} ms/lookup")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--latency-ms', type=float, default=5.0)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(args.latency_ms / 1000.0))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1/nutrition"
+
+    service = NutritionService(api_key='benchmark', base_url=base_url)
+
+    def bare_lookup():
+        response = requests.get(f"{base_url}?query=150g chicken", headers={'X-Api-Key': 'benchmark'})
+        response.json()
+
+    def pooled_lookup():
+        service._request_nutrition('150g chicken')
+
+    # Warm the pool so the pooled runs measure steady state
+    pooled_lookup()
+
+    for concurrency in (1, args.concurrency):
+        mode = 'sequential' if concurrency == 1 else f'concurrent ({concurrency} threads)'
+        print(f"{args.requests} lookups, {mode}, {args.latency_ms:g} ms server latency:")
+        run('bare requests.get', bare_lookup, args.requests, concurrency)
+        run('pooled NutritionService', pooled_lookup, args.requests, concurrency)
+
+    server.shutdown()
+
+if __name__ == '__main__':
+    main()
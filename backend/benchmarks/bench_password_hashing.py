@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark: login burst with bcrypt inline vs. on the password hashing pool.
+
+Simulates a burst of concurrent logins (password verifications) in one
+worker while a light request loop (standing in for autocomplete and recipe
+lookups) keeps running, and reports burst duration plus the latency of the
+light requests during it. Also suggests a BCRYPT_ROUNDS value for this
+machine (the highest cost within BCRYPT_TARGET_MS); set it in the
+environment of every worker.
+
+Run from the backend directory:
+    python benchmarks/bench_password_hashing.py [--logins 16] [--threads 8] [--workers 1] [--rounds 12]
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import Config
+from app.services.password_hasher import PasswordHasher, calibrate_rounds
+
+def light_request():
+    """A few hundred microseconds of pure-Python work, like a cached autocomplete"""
+    return sorted(str(i * 7919 % 1000) for i in range(600))
+
+def run_burst(hasher, password_hash, logins, threads):
+    latencies = []
+    done = threading.Event()
+
+    def light_loop():
+        while not done.is_set():
+            start = time.perf_counter()
+            light_request()
+            latencies.append(time.perf_counter() - start)
+            time.sleep(0.002)
+
+    light = threading.Thread(target=light_loop)
+    light.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(lambda _: hasher.verify_password('Correct-Horse-9', password_hash), range(logins)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    light.join()
+
+    assert all(results)
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    return elapsed * 1000, p50, p99
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--logins', type=int, default=16)
+    parser.add_argument('--threads', type=int, default=8, help='request threads logging in concurrently')
+    parser.add_argument('--workers', type=int, default=1, help='hashing processes for the pooled run')
+    parser.add_argument('--rounds', type=int, default=Config.BCRYPT_ROUNDS, help='bcrypt cost to benchmark')
+    args = parser.parse_args()
+
+    print(f"Suggested BCRYPT_ROUNDS for this machine ({Config.BCRYPT_TARGET_MS} ms target): {calibrate_rounds()}")
+    rounds = args.rounds
+    print(f"Benchmarking bcrypt cost {rounds}")
+
+    inline = PasswordHasher(rounds=rounds, workers=0)
+    pooled = PasswordHasher(rounds=rounds, workers=args.workers, max_pending=args.logins)
+    pooled.start()
+    password_hash = inline.hash_password('Correct-Horse-9')
+
+    print(f"{args.logins} logins from {args.threads} threads:")
+    print(f"  {'mode':<14} {'burst ms':>10} {'light p50 ms':>13} {'light p99 ms':>13}")
+    for label, hasher in (('inline', inline), (f'pool x{args.workers}', pooled)):
+        elapsed, p50, p99 = run_burst(hasher, password_hash, args.logins, args.threads)
+        print(f"  {label:<14} {elapsed:>10.0f} {p50:>13.2f} {p99:>13.2f}")
+
+if __name__ == '__main__':
+    main()
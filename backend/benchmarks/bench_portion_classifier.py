@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark and regression check: ingredient portion classification.
+
+Checks the compiled portion classifier and quantity detector against a
+regression corpus (exits non-zero on any mismatch), then times them against
+the old chain of substring scans.
+
+Run from the backend directory:
+    python benchmarks/bench_portion_classifier.py [--iterations 2000]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.ingredient_parser import portion_classifier, has_quantity
+
+# (ingredient text, expected category, expected has_quantity)
+CORPUS = [
+    ("peanut butter", 'spreads', False),
+    ("butter", 'fats', False),
+    ("unsalted butter", 'fats', False),
+    ("eggplant", 'vegetables', False),
+    ("eggs", 'eggs', False),
+    ("egg noodles", 'grains', False),
+    ("butter chicken", 'proteins', False),
+    ("chicken stock", 'liquids', False),
+    ("chicken breast", 'proteins', False),
+    ("olive oil", 'fats', False),
+    ("boiled potatoes", 'grains', False),
+    ("sweet potatoes", 'grains', False),
+    ("cherry tomatoes", 'vegetables', False),
+    ("tomato", 'vegetables', False),
+    ("garlic powder", 'seasonings', False),
+    ("garlic", 'vegetables', False),
+    ("salt", 'seasonings', False),
+    ("black pepper", 'seasonings', False),
+    ("bell peppers", 'vegetables', False),
+    ("cream cheese", 'dairy', False),
+    ("coconut milk", 'dairy', False),
+    ("greek yogurt", 'dairy', False),
+    ("honey", 'spreads', False),
+    ("soy sauce", 'liquids', False),
+    ("spoiled milk", 'dairy', False),
+    ("steak", 'proteins', False),
+    ("ground turkey", 'proteins', False),
+    ("mixed berries", None, False),
+    ("7up", None, False),
+    ("dragon fruit", None, False),
+    ("2 eggs", 'eggs', True),
+    ("200g chicken", 'proteins', True),
+    ("1 1/2 cups rice", 'grains', True),
+    ("½ cup milk", 'dairy', True),
+    ("a pinch of salt", 'seasonings', True),
+    ("an onion", 'vegetables', True),
+    ("a little olive oil", 'fats', False),
+    ("one onion", 'vegetables', True),
+    ("two cloves garlic", 'vegetables', True),
+    ("chicken breast 200g", 'proteins', True),
+    ("salmon fillet (150 g)", 'proteins', True),
+    ("3-4 carrots", 'vegetables', True),
+    ("1 tbsp peanut butter", 'spreads', True),
+]
+
+def legacy_portion(ingredient):
+    """The old NutritionService portion selection, kept here for comparison"""
+    ingredient_lower = ingredient.lower()
+    if any(char.isdigit() for char in ingredient):
+        return None
+    if any(word in ingredient_lower for word in ['chicken', 'beef', 'meat', 'pork', 'lamb', 'turkey']):
+        return 150
+    elif any(word in ingredient_lower for word in ['rice', 'pasta', 'potato', 'bread', 'noodles']):
+        return 80
+    elif any(word in ingredient_lower for word in ['vegetable', 'tomato', 'onion', 'carrot', 'broccoli', 'spinach']):
+        return 50
+    elif any(word in ingredient_lower for word in ['oil', 'butter', 'olive oil', 'coconut oil']):
+        return 15
+    elif any(word in ingredient_lower for word in ['egg', 'eggs']):
+        return 60
+    elif any(word in ingredient_lower for word in ['milk', 'cheese', 'yogurt']):
+        return 120
+    return 100
+
+def compiled_portion(ingredient):
+    if has_quantity(ingredient):
+        return None
+    return portion_classifier.portion_grams(ingredient)
+
+def check_corpus():
+    failures = 0
+    for text, category, quantity in CORPUS:
+        got_category = portion_classifier.classify(text)
+        got_quantity = has_quantity(text)
+        if got_category != category or got_quantity != quantity:
+            failures += 1
+            print(f"  MISMATCH {text!r}: category {got_category!r} (want {category!r}), "
+                  f"has_quantity {got_quantity} (want {quantity})")
+    print(f"Regression corpus: {len(CORPUS) - failures}/{len(CORPUS)} correct")
+    return failures
+
+def bench(label, fn, iterations):
+    texts = [text for text, _, _ in CORPUS]
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for text in texts:
+            fn(text)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<22} {elapsed / (iterations * len(texts)) * 1e6:6.2f} µs per ingredient")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    failures = check_corpus()
+
+    print(f"Portion selection, {len(CORPUS)} ingredients x {args.iterations}:")
+    bench('legacy substring scans', legacy_portion, args.iterations)
+    bench('compiled classifier', compiled_portion, args.iterations)
+
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark: ingredient detection pipeline without network or credentials.
+
+Runs VisionService end to end (preprocessing, image hash cache, label
+detection, label filtering and validation) on synthetic photos with a local
+backend: the deterministic stub by default, or the ONNX classifier when
+VISION_ONNX_MODEL / VISION_ONNX_LABELS are set. Reports single-image and
+batch latency, cold (cache cleared) and warm.
+
+Run from the backend directory:
+    python benchmarks/bench_vision_pipeline.py [--backend stub|onnx] [--images 8] [--repeat 5]
+"""
+
+import io
+import os
+import sys
+import time
+import argparse
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.vision_backends import create_backend
+from app.services.vision_service import VisionService
+from app.services.image_hash_cache import image_hash_cache
+from bench_image_preprocessing import synthetic_photo
+
+def sample_images(count, width=3024, height=4032):
+    images = []
+    for seed in range(count):
+        ok, encoded = cv2.imencode('.jpg', synthetic_photo(width, height, seed), [cv2.IMWRITE_JPEG_QUALITY, 92])
+        images.append(encoded.tobytes())
+    return images
+
+def timed(fn, repeat, cold):
+    timings = []
+    for _ in range(repeat):
+        if cold:
+            image_hash_cache.clear()
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--backend', default='stub')
+    parser.add_argument('--images', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    service = VisionService(backend=create_backend(args.backend))
+    images = sample_images(args.images)
+    print(f"Backend: {service.backend.name}, {len(images)} images of {sum(map(len, images)) / len(images) / 1e6:.1f} MB")
+
+    # Silence the service's per-request logging while timing
+    stdout, sys.stdout = sys.stdout, io.StringIO()
+    try:
+        single_cold, result = timed(lambda: service.detect_ingredients(io.BytesIO(images[0])), args.repeat, True)
+        single_warm, _ = timed(lambda: service.detect_ingredients(io.BytesIO(images[0])), args.repeat, False)
+        sequential, _ = timed(lambda: [service.detect_ingredients(io.BytesIO(i)) for i in images], args.repeat, True)
+        batch, batch_result = timed(lambda: service.detect_ingredients_batch([io.BytesIO(i) for i in images]),
+                                    args.repeat, True)
+    finally:
+        sys.stdout = stdout
+
+    print(f"  single image, cold       {single_cold:8.1f} ms  -> {result['ingredients']}")
+    print(f"  single image, cached     {single_warm:8.1f} ms")
+    print(f"  {len(images)} images, one by one  {sequential:8.1f} ms")
+    print(f"  {len(images)} images, batch       {batch:8.1f} ms  -> {len(batch_result['ingredients'])} merged ingredients")
+
+if __name__ == '__main__':
+    main()
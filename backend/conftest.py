@@ -0,0 +1,48 @@
+import os
+
+# Read by app.config at import: cheap inline hashing, no warm-up, snapshots or trace files
+os.environ.setdefault('BCRYPT_ROUNDS', '4')
+os.environ.setdefault('PASSWORD_HASH_WORKERS', '0')
+os.environ.setdefault('WARMUP_MODE', 'off')
+os.environ.setdefault('SNAPSHOT_ENABLED', 'false')
+os.environ.setdefault('TRACING_EXPORTER', 'none')
+
+import pytest
+from app import create_app
+from app.cache import registered_caches
+from app.database import db
+from app.services.pantry_search_service import pantry_index
+
+pytest_plugins = ['app.testing']
+
+@pytest.fixture
+def app():
+    # Ids restart in every fresh database, so process-wide caches must too
+    for cache in registered_caches().values():
+        cache.clear()
+    pantry_index.__init__()
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def register(client):
+    """Register a user and return the access token"""
+    def register(username='cook', email='cook@example.com', password='Secret123'):
+        response = client.post('/api/auth/register', json={
+            'username': username, 'email': email, 'password': password
+        })
+        assert response.status_code == 201, response.get_json()
+        return response.get_json()['tokens']['access_token']
+    return register
+
+@pytest.fixture
+def auth_headers(register):
+    return {'Authorization': f'Bearer {register()}'}
@@ -0,0 +1,42 @@
+# gunicorn.conf.py - picked up automatically by `gunicorn wsgi:app` from the backend directory
+import os
+import glob
+import tempfile
+
+# Warm up each worker after it has loaded the app (threads, sockets and gRPC
+# channels don't survive fork, so warming the master would be wasted)
+os.environ.setdefault('WARMUP_MODE', 'post_fork')
+
+# Workers write Prometheus samples here and /metrics aggregates them; must be
+# set before the app (and prometheus_client) is imported
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'snackhack-metrics'))
+
+# bind and workers keep gunicorn's defaults, which follow $PORT and $WEB_CONCURRENCY
+
+def on_starting(server):
+    """Start every deploy with an empty metrics directory"""
+    metrics_dir = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    os.makedirs(metrics_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(metrics_dir, '*.db')):
+        os.remove(path)
+
+def post_worker_init(worker):
+    """Runs in each worker right after it has loaded wsgi:app"""
+    from app.warmup import start_warmup
+    from app.snapshot import restore_snapshot, start_periodic_snapshots
+    restore_snapshot(app=worker.wsgi)
+    start_warmup(worker.wsgi)
+    start_periodic_snapshots()
+
+def worker_exit(server, worker):
+    """Save this worker's warm state so the next boot can restore it"""
+    from app.snapshot import save_snapshot
+    save_snapshot()
+
+def child_exit(server, worker):
+    """Drop a dead worker's live gauges (in-flight requests) from /metrics"""
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
@@ -26,6 +26,10 @@ def init_database():
             db.create_all()
             print("✅ Database tables created successfully!")
             
+            # create_all() never alters tables that already exist
+            ensure_user_indexes()
+            ensure_recipe_columns()
+            
             # Add sample ingredients if none exist
             if Ingredient.query.count() == 0:
                 print("Adding sample ingredients...")
@@ -44,6 +48,55 @@ def init_database():
             print(f"❌ Error initializing database: {e}")
             sys.exit(1)
 
+def ensure_user_indexes():
+    """Lowercase stored emails and create the lower() login indexes on an existing users table"""
+    try:
+        db.session.execute(db.text("UPDATE users SET email = lower(email) WHERE email <> lower(email)"))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"⚠️ Could not lowercase existing emails (case-only duplicates?): {e}")
+    
+    for index in User.__table__.indexes:
+        try:
+            index.create(bind=db.engine, checkfirst=True)
+        except Exception as e:
+            print(f"⚠️ Could not create index {index.name}: {e}")
+
+# Columns added to the recipes table after it was first created, in the order they were added
+RECIPE_ADDED_COLUMNS = ['instructions_blob_id', 'nutrition']
+
+def add_missing_columns(table, column_names):
+    """ALTER TABLE ... ADD COLUMN for each of the model's columns the existing table lacks (idempotent)"""
+    existing = {column['name'] for column in db.inspect(db.engine).get_columns(table.name)}
+    preparer = db.engine.dialect.identifier_preparer
+    
+    for name in column_names:
+        if name in existing:
+            continue
+        column = table.columns[name]
+        ddl = f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {preparer.format_column(column)} {column.type.compile(dialect=db.engine.dialect)}"
+        for foreign_key in column.foreign_keys:
+            target = foreign_key.column
+            ddl += f" REFERENCES {preparer.format_table(target.table)} ({preparer.format_column(target)})"
+        try:
+            db.session.execute(db.text(ddl))
+            db.session.commit()
+            print(f"✅ Added column {table.name}.{name}")
+        except Exception as e:
+            db.session.rollback()
+            print(f"⚠️ Could not add column {table.name}.{name}: {e}")
+    
+    for index in table.indexes:
+        try:
+            index.create(bind=db.engine, checkfirst=True)
+        except Exception as e:
+            print(f"⚠️ Could not create index {index.name}: {e}")
+
+def ensure_recipe_columns():
+    """Add columns introduced since the recipes table was created (blob reference, precomputed nutrition)"""
+    add_missing_columns(Recipe.__table__, RECIPE_ADDED_COLUMNS)
+
 def add_sample_ingredients():
     """Add sample ingredients to the database"""
     
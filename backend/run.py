@@ -1,4 +1,9 @@
 # run.py
+import os
+
+# Development server: warm up and snapshot from a background thread
+os.environ.setdefault('WARMUP_MODE', 'thread')
+
 from app import create_app
 
 app = create_app()
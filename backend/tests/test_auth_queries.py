@@ -0,0 +1,36 @@
+def test_register_is_one_statement(client, query_budget):
+    with query_budget(1):
+        response = client.post('/api/auth/register', json={
+            'username': 'cook', 'email': 'Cook@Example.com', 'password': 'Secret123'
+        })
+    assert response.status_code == 201
+    assert response.get_json()['tokens']['user']['email'] == 'cook@example.com'
+
+def test_register_duplicate_is_one_statement(client, register, query_budget):
+    register()
+    with query_budget(1):
+        response = client.post('/api/auth/register', json={
+            'username': 'COOK', 'email': 'other@example.com', 'password': 'Secret123'
+        })
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Username already taken'
+
+def test_login_is_one_statement(client, register, query_budget):
+    register()
+    for email_or_username in ('COOK@example.com', 'Cook'):
+        with query_budget(1):
+            response = client.post('/api/auth/login', json={
+                'email_or_username': email_or_username, 'password': 'Secret123'
+            })
+        assert response.status_code == 200
+        assert response.get_json()['tokens']['user']['username'] == 'cook'
+
+def test_profile_is_one_statement(client, auth_headers, query_budget):
+    with query_budget(1):
+        response = client.get('/api/auth/profile', headers=auth_headers)
+    assert response.status_code == 200
+    assert response.get_json()['user']['username'] == 'cook'
+
+    # Served from the user cache afterwards
+    with query_budget(0):
+        assert client.get('/api/auth/profile', headers=auth_headers).status_code == 200
@@ -0,0 +1,36 @@
+from app.database import db
+from app.models import Recipe, User
+
+def add_recipes(count):
+    user_id = User.query.one().id
+    recipes = [Recipe(title=f'Recipe {i}', instructions=['Cook'], user_id=user_id, is_saved=True) for i in range(count)]
+    db.session.add_all(recipes)
+    db.session.commit()
+    return [recipe.id for recipe in recipes]
+
+def test_recipe_list_revalidates_after_delete(client, auth_headers):
+    oldest_id, _ = add_recipes(2)
+
+    response = client.get('/api/recipes/my-recipes', headers=auth_headers)
+    assert response.get_json()['count'] == 2
+    assert 'Last-Modified' not in response.headers
+    etag = response.headers['ETag']
+
+    assert client.get('/api/recipes/my-recipes', headers={**auth_headers, 'If-None-Match': etag}).status_code == 304
+
+    assert client.delete(f'/api/recipes/saved-recipe/{oldest_id}', headers=auth_headers).status_code == 200
+    for validator in ({'If-None-Match': etag}, {'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'}):
+        response = client.get('/api/recipes/my-recipes', headers={**auth_headers, **validator})
+        assert response.status_code == 200
+        assert response.get_json()['count'] == 1
+
+def test_favourites_revalidate_after_unfavouriting_an_older_recipe(client, auth_headers):
+    oldest_id, _ = add_recipes(2)
+    etag = client.get('/api/recipes/favourite-recipes', headers=auth_headers).headers['ETag']
+
+    response = client.post('/api/recipes/toggle-favourite', headers=auth_headers, json={'recipe_id': oldest_id})
+    assert response.get_json()['is_favourite'] is False
+
+    response = client.get('/api/recipes/favourite-recipes', headers={**auth_headers, 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['count'] == 1
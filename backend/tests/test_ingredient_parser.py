@@ -0,0 +1,23 @@
+import pytest
+from app.services.ingredient_parser import has_quantity, parse_ingredient
+
+@pytest.mark.parametrize('text, quantity, unit, name', [
+    ('2 1/2 cups tomatoes, diced', 2.5, 'cup', 'tomatoes'),
+    ('200g chicken', 200.0, 'g', 'chicken'),
+    ('chicken breast 200g', 200.0, 'g', 'chicken breast'),
+    ('chicken breast 200 g, diced', 200.0, 'g', 'chicken breast'),
+    ('milk 1 cup', 1.0, 'cup', 'milk'),
+    ('salmon fillet (150 g)', 150.0, 'g', 'salmon fillet'),
+    ('an onion', 1.0, None, 'onion'),
+    ('a pinch of salt', 1.0, 'pinch', 'salt'),
+    ('two cloves garlic', 2.0, 'clove', 'garlic'),
+    ('3-4 carrots', 3.5, None, 'carrots'),
+    ('a little olive oil', None, None, 'a little olive oil'),
+    ('salt', None, None, 'salt'),
+    ('7up', None, None, '7up'),
+])
+def test_parse_ingredient_amounts(text, quantity, unit, name):
+    parsed = parse_ingredient(text)
+    assert (parsed.quantity, parsed.unit, parsed.name) == (quantity, unit, name)
+    # The detector and the parser share one grammar
+    assert has_quantity(text) == (quantity is not None)
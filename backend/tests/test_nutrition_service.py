@@ -0,0 +1,66 @@
+import requests
+from app.database import db
+from app.models import Ingredient, Recipe, RecipeIngredient
+from app.services.nutrition_service import NutritionService, nutrition_cache, store_recipe_nutrition
+
+class FakeResponse:
+    ok = True
+    status_code = 200
+
+    def __init__(self, items):
+        self._items = items
+        self.content = b'{}'
+
+    def json(self):
+        return {'items': self._items}
+
+class FailingSession:
+    def get(self, url, params=None, **kwargs):
+        raise requests.Timeout('read timed out')
+
+class FakeSession:
+    """Stands in for the CalorieNinjas HTTP session and records the queries"""
+
+    def __init__(self, items):
+        self.items = items
+        self.queries = []
+
+    def get(self, url, params=None, **kwargs):
+        self.queries.append(params['query'])
+        return FakeResponse(self.items)
+
+def api_item(name, calories, serving_size_g=100.0):
+    return {
+        'name': name, 'serving_size_g': serving_size_g, 'calories': calories,
+        'protein_g': 10.0, 'carbohydrates_total_g': 1.0, 'fat_total_g': 5.0
+    }
+
+def test_api_items_are_matched_by_whole_name_only(app):
+    service = NutritionService(api_key='test', session=FakeSession([api_item('egg', 147.0)]))
+    result = service.get_nutrition_facts(['200g eggplant', '2 quail eggs'])
+
+    # "egg" is neither eggplant nor quail eggs: counted, but cached for neither
+    assert [item['name'] for item in result['items']] == ['egg']
+    assert nutrition_cache.get('eggplant') is None
+    assert Ingredient.query.filter(Ingredient.nutrition_data.isnot(None)).count() == 0
+
+def test_plural_portion_matches_singular_api_item(app):
+    service = NutritionService(api_key='test', session=FakeSession([api_item('tomato', 18.0, 200.0)]))
+    service.get_nutrition_facts(['200g tomatoes'])
+
+    assert nutrition_cache.get('tomatoes')['calories'] == 9.0
+
+def test_failed_fetch_does_not_store_partial_nutrition(app):
+    recipe = Recipe(title='Omelette', instructions=['Cook'])
+    recipe.recipe_ingredients = [RecipeIngredient(ingredient=Ingredient(name='egg'), quantity=2, unit='piece')]
+    db.session.add(recipe)
+    db.session.commit()
+
+    service = NutritionService(api_key='test', session=FailingSession())
+    assert store_recipe_nutrition(recipe.id, service) is None
+    db.session.expire_all()
+    assert db.session.get(Recipe, recipe.id).nutrition is None
+
+    service = NutritionService(api_key='test', session=FakeSession([api_item('egg', 147.0)]))
+    nutrition = store_recipe_nutrition(recipe.id, service)
+    assert nutrition['unresolved'] == [] and nutrition['totals']['calories'] > 0
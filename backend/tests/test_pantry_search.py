@@ -0,0 +1,33 @@
+from app.database import db
+from app.models import Ingredient, Recipe, RecipeIngredient, User
+
+def add_recipe(user_id, title, ingredient_names):
+    recipe = Recipe(title=title, instructions=['Cook'], user_id=user_id)
+    recipe.recipe_ingredients = [
+        RecipeIngredient(ingredient=Ingredient.query.filter_by(name=name).first() or Ingredient(name=name))
+        for name in ingredient_names
+    ]
+    db.session.add(recipe)
+    db.session.commit()
+    return recipe.id
+
+def test_singular_pantry_terms_match_plural_recipe_ingredients(client, auth_headers):
+    user_id = User.query.one().id
+    recipe_id = add_recipe(user_id, 'Salsa', ['tomatoes', 'onion', 'cherry tomatoes', 'lime'])
+
+    response = client.post('/api/recipes/pantry-search', headers=auth_headers,
+                           json={'ingredients': ['Tomato', 'onions', 'cherry tomato', 'lime', 'basil']})
+    assert response.status_code == 200
+    [result] = response.get_json()['results']
+    assert result['recipe_id'] == recipe_id
+    assert result['coverage'] == 1.0
+    assert result['missing'] == []
+    assert response.get_json()['unknown_ingredients'] == ['basil']
+
+def test_other_users_recipes_are_not_searched(client, auth_headers, register):
+    register(username='other', email='other@example.com')
+    other_id = User.query.filter_by(username='other').one().id
+    add_recipe(other_id, 'Salsa', ['tomatoes'])
+
+    response = client.post('/api/recipes/pantry-search', headers=auth_headers, json={'ingredients': ['tomato']})
+    assert response.get_json()['results'] == []
@@ -0,0 +1,50 @@
+import pytest
+from app.database import db
+from app.models import Ingredient, Recipe, RecipeIngredient, User
+from app.query_stats import count_queries, statement_shape
+from app.testing import assert_query_budget
+
+@pytest.fixture
+def recipes(app, register):
+    """A registered user's token and ten recipes with three ingredients each"""
+    token = register()
+    user_id = User.query.one().id
+    ingredients = [Ingredient(name=name) for name in ('tomato', 'onion', 'garlic')]
+    db.session.add_all(ingredients)
+    for i in range(10):
+        recipe = Recipe(title=f'Recipe {i}', instructions=['Cook'], user_id=user_id, is_saved=i % 2 == 0)
+        recipe.recipe_ingredients = [
+            RecipeIngredient(ingredient=ingredient, quantity=1, unit='piece', order_index=order)
+            for order, ingredient in enumerate(ingredients)
+        ]
+        db.session.add(recipe)
+    db.session.commit()
+    db.session.expunge_all()
+    return {'Authorization': f'Bearer {token}'}
+
+def test_statement_shape_collapses_parameters():
+    assert statement_shape("SELECT * FROM users WHERE id IN (?, ?, ?) AND name = 'x'") == \
+        statement_shape("SELECT * FROM users WHERE id IN (?)  AND name = 'y'")
+
+def test_my_recipes_query_budget(client, recipes, query_budget):
+    # User, list validators, recipes, their ingredients (with names joined): the same for any count
+    with query_budget(4) as stats:
+        response = client.get('/api/recipes/my-recipes', headers=recipes)
+    assert response.status_code == 200
+    assert response.get_json()['count'] == 10
+    assert all(len(recipe['ingredients']) == 3 for recipe in response.get_json()['recipes'])
+    assert response.headers['X-DB-Queries'] == str(stats.count)
+    assert response.headers['X-DB-N-Plus-One'] == '0'
+
+def test_lazy_loading_in_a_loop_is_flagged(app, recipes):
+    with pytest.raises(AssertionError, match='Suspected N\\+1'):
+        with assert_query_budget(100):
+            for recipe in Recipe.query.all():
+                recipe.recipe_ingredients
+
+    db.session.expunge_all()
+    with count_queries() as stats:
+        for recipe in Recipe.query.all():
+            recipe.recipe_ingredients
+    [(shape, count)] = stats.suspected_n_plus_one()
+    assert count == 10 and 'FROM recipe_ingredients' in shape
@@ -0,0 +1,5 @@
+def test_ready_without_warmup(client):
+    # conftest runs the app with WARMUP_MODE=off
+    response = client.get('/ready')
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'off'
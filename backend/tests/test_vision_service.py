@@ -0,0 +1,57 @@
+import time
+import threading
+import requests
+from app.config import Config
+from app.services.food_validation_service import FoodValidationService
+from app.services.vision_service import VisionService
+
+class FakeResponse:
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {'products': []}
+
+class RecordingSession:
+    """Stands in for the Open Food Facts HTTP session; records each call's timeout"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.timeouts = []
+        self.finished = threading.Event()
+
+    def get(self, url, params=None, timeout=None, **kwargs):
+        self.timeouts.append(timeout)
+        try:
+            if self.delay > timeout:
+                # A real timeout fires a little after the limit
+                time.sleep(timeout + 0.05)
+                raise requests.Timeout('read timed out')
+            time.sleep(self.delay)
+            return FakeResponse()
+        finally:
+            self.finished.set()
+
+def vision_service(session):
+    service = VisionService(backend=object())
+    service.food_validator = FoodValidationService(session=session)
+    return service
+
+def test_lookups_get_the_remaining_deadline_as_timeout(monkeypatch):
+    monkeypatch.setattr(Config, 'VISION_VALIDATION_DEADLINE', 2.0)
+    session = RecordingSession()
+    vision_service(session)._resolve_labels(['xanthan gum powder'])
+    assert len(session.timeouts) == 1
+    assert 0 < session.timeouts[0] <= 2.0
+
+def test_slow_lookup_is_unverified_and_stops_at_the_deadline(monkeypatch):
+    monkeypatch.setattr(Config, 'VISION_VALIDATION_DEADLINE', 0.2)
+    session = RecordingSession(delay=5.0)
+    start = time.monotonic()
+    resolved, unverified = vision_service(session)._resolve_labels(['xanthan gum powder'])
+    assert time.monotonic() - start < 1.0
+    assert unverified == {'xanthan gum powder'}
+    assert resolved == {}
+    # The lookup itself gives up at the deadline rather than holding its pool thread
+    assert session.timeouts[0] <= 0.2
+    assert session.finished.wait(1.0)
@@ -1,4 +1,10 @@
 # wsgi.py - Production WSGI entry point for Render.com
+import os
+
+# Serving process: warm up and snapshot from a background thread (gunicorn.conf.py
+# sets post_fork first, so under gunicorn each worker does it instead)
+os.environ.setdefault('WARMUP_MODE', 'thread')
+
 from app import create_app
 
 app = create_app()